@@ -3,29 +3,64 @@ from config import Config
 import os
 from datetime import datetime
 from app.webhook_routes import bp as webhook_bp, init_signal_service
+from app.telemetry import bp as telemetry_bp, init_telemetry
+from app.plant_names import init_plant_names
+from app.plant_status import init_plant_status
+from app.chat import init_chat
+from app.presence import init_presence
+from app.online_status import init_online_status
+# Imported for their mapper and session listeners, which must be registered
+# once per process rather than once per app
+from app import strain_stats  # noqa: F401 - strain counter listeners
+from app import achievements  # noqa: F401 - achievement progress listeners
+from app import followers  # noqa: F401 - public plant event listeners
 from app.scheduler import init_scheduler
 from app.extensions import db, login_manager, socketio
 from flask_migrate import Migrate
 
 def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(config_class)
+    if isinstance(config_class, dict):
+        # Allow tests to override individual settings on top of the defaults
+        app.config.from_object(Config)
+        app.config.from_mapping(config_class)
+    else:
+        app.config.from_object(config_class)
     app.debug = True
     
     db.init_app(app)
     migrate = Migrate(app, db)
     login_manager.init_app(app)
-    socketio.init_app(app, cors_allowed_origins="*")
+    # With a message queue, broadcasts reach clients of every worker process
+    socketio.init_app(app, cors_allowed_origins="*",
+                      message_queue=app.config.get('SOCKETIO_MESSAGE_QUEUE'))
     
     # Ensure upload directory exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
-    # Initialize scheduler
-    init_scheduler(app)
+    # Jobs run in whichever process holds the scheduler lease. An embedded
+    # scheduler waits for the first request, so CLI commands and scripts
+    # that only build the app never take the lease
+    if app.config.get('SCHEDULER_EMBEDDED') and not app.testing:
+        @app.before_request
+        def start_embedded_scheduler():
+            init_scheduler(app)
     
     # Initialize Signal service
     init_signal_service(app)
     
+    # Initialize sensor telemetry buffering
+    init_telemetry(app)
+    
+    # Initialize the Signal plant name and status caches
+    init_plant_names(app)
+    init_plant_status(app)
+    
+    # Warm the recent chat history served to connecting clients
+    init_chat(app)
+    init_presence(app)
+    init_online_status(app)
+    
     # Add route to serve uploaded files
     @app.route('/uploads/<filename>')
     def uploaded_file(filename):
@@ -40,6 +75,11 @@ def create_app(config_class=Config):
     app.register_blueprint(main_bp)
     app.register_blueprint(plants_bp)
     app.register_blueprint(webhook_bp)
+    app.register_blueprint(telemetry_bp)
+    
+    # Register maintenance CLI commands
+    from app.commands import register_commands
+    register_commands(app)
     
     @app.context_processor
     def utility_processor():
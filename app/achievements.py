@@ -0,0 +1,266 @@
+"""Event-driven achievement evaluation.
+
+Every user has a UserProgress row of activity counters (waterings, harvests,
+unique strains, notes, growth readings). Mapper events collect the changes
+made during a flush and apply them with one UPDATE per user; the same
+statement's new values decide which achievements were crossed, and those
+are awarded with a single INSERT ... SELECT. Nothing ever rescans a user's
+history; backfill_achievement_progress computes the initial counters with
+one grouped query per counter.
+
+Counters record activity as it happens: deleting an old watering or note
+does not take it back. Harvests follow the plant's archive state, so
+unarchiving or re-labelling a harvest is subtracted again.
+"""
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models import (Plant, Watering, Note, GrowthData, Achievement, UserAchievement,
+                        UserProgress, UserStrainHarvest)
+
+REQUIREMENTS = ('waterings', 'harvests', 'unique_strains', 'notes', 'growth_readings')
+HARVEST_ATTRIBUTES = ('owner_id', 'strain', 'is_archived', 'archive_reason')
+
+_PENDING = 'achievement_progress'
+
+
+def strain_key(strain):
+    """Strains are told apart case-insensitively for unique_strains"""
+    return (strain or '').strip().lower() or None
+
+
+def harvest_outcome(owner_id, strain, is_archived, archive_reason):
+    """(owner, strain key) a plant contributes to harvest progress, or None"""
+    if not is_archived or archive_reason != 'harvested':
+        return None
+    return owner_id, strain_key(strain)
+
+
+def _pending(session):
+    return session.info.setdefault(_PENDING, {
+        'counters': defaultdict(lambda: defaultdict(int)),
+        'strains': defaultdict(int),
+        'readings': defaultdict(int),
+    })
+
+
+def _track_harvest(pending, outcome, sign):
+    if outcome is None:
+        return
+    owner_id, strain = outcome
+    pending['counters'][owner_id]['harvests'] += sign
+    if strain:
+        pending['strains'][(owner_id, strain)] += sign
+
+
+def award_crossed(connection, user_id, before, after, now=None):
+    """Award the achievements whose threshold lies in (before, after] for any counter."""
+    ranges = [
+        db.and_(
+            Achievement.requirement == name,
+            Achievement.requirement_value > before[name],
+            Achievement.requirement_value <= after[name]
+        )
+        for name in REQUIREMENTS if after[name] > before[name]
+    ]
+    if not ranges:
+        return 0
+    already = db.select(UserAchievement.id).where(
+        UserAchievement.user_id == user_id,
+        UserAchievement.achievement_id == Achievement.id
+    ).exists()
+    earned = db.select(
+        db.literal(user_id), Achievement.id, db.literal(now or datetime.utcnow())
+    ).where(db.or_(*ranges), ~already)
+    result = connection.execute(db.insert(UserAchievement).from_select(
+        ['user_id', 'achievement_id', 'earned_at'], earned
+    ))
+    return result.rowcount
+
+
+def _apply_strains(connection, strains, counters):
+    """Move per-strain harvest counts; a strain appearing or vanishing moves unique_strains."""
+    table = UserStrainHarvest.__table__
+    for (user_id, strain), delta in strains.items():
+        if not delta:
+            continue
+        match = db.and_(table.c.user_id == user_id, table.c.strain == strain)
+        updated = connection.execute(table.update().where(match).values(
+            harvests=table.c.harvests + delta
+        )).rowcount
+        if not updated and delta > 0:
+            connection.execute(table.insert().values(user_id=user_id, strain=strain, harvests=delta))
+            counters[user_id]['unique_strains'] += 1
+        elif updated and delta < 0:
+            removed = connection.execute(table.delete().where(match, table.c.harvests <= 0)).rowcount
+            counters[user_id]['unique_strains'] -= removed
+
+
+def apply_progress(connection, counters, strains=None, now=None):
+    """Add counter deltas ({user_id: {requirement: delta}}) and award crossed achievements."""
+    counters = defaultdict(lambda: defaultdict(int), {
+        user_id: defaultdict(int, deltas) for user_id, deltas in counters.items()
+    })
+    if strains:
+        _apply_strains(connection, strains, counters)
+
+    table = UserProgress.__table__
+    columns = [table.c[name] for name in REQUIREMENTS]
+    awarded = 0
+    for user_id, deltas in counters.items():
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if user_id is None or not deltas:
+            continue
+        row = connection.execute(table.update().where(table.c.user_id == user_id).values({
+            name: table.c[name] + delta for name, delta in deltas.items()
+        }).returning(*columns)).first()
+        if row is None:
+            row = {name: max(deltas.get(name, 0), 0) for name in REQUIREMENTS}
+            connection.execute(table.insert().values(user_id=user_id, **row))
+            after = row
+        else:
+            after = dict(zip(REQUIREMENTS, row))
+        before = {name: after[name] - deltas.get(name, 0) for name in REQUIREMENTS}
+        awarded += award_crossed(connection, user_id, before, after, now)
+    return awarded
+
+
+def _keep_previous(target, value, oldvalue, initiator):
+    """No-op set listener; registering it makes the ORM load the old value"""
+
+
+# The harvest listeners need the pre-update values even for expired attributes
+event.listen(Plant.owner_id, 'set', _keep_previous, active_history=True)
+
+
+def _previous(state, name):
+    history = state.attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, name)
+
+
+@event.listens_for(Watering, 'after_insert')
+def _watering_inserted(mapper, connection, target):
+    _pending(inspect(target).session)['counters'][target.user_id]['waterings'] += 1
+
+
+@event.listens_for(Note, 'after_insert')
+def _note_inserted(mapper, connection, target):
+    _pending(inspect(target).session)['counters'][target.user_id]['notes'] += 1
+
+
+@event.listens_for(GrowthData, 'after_insert')
+def _reading_inserted(mapper, connection, target):
+    # Readings belong to the plant's owner, resolved once per flush
+    _pending(inspect(target).session)['readings'][target.plant_id] += 1
+
+
+@event.listens_for(Plant, 'after_insert')
+def _plant_inserted(mapper, connection, target):
+    outcome = harvest_outcome(*[getattr(target, name) for name in HARVEST_ATTRIBUTES])
+    if outcome:
+        _track_harvest(_pending(inspect(target).session), outcome, 1)
+
+
+@event.listens_for(Plant, 'after_update')
+def _plant_updated(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in HARVEST_ATTRIBUTES):
+        return
+    before = harvest_outcome(*[_previous(state, name) for name in HARVEST_ATTRIBUTES])
+    after = harvest_outcome(*[getattr(target, name) for name in HARVEST_ATTRIBUTES])
+    if before != after:
+        pending = _pending(state.session)
+        _track_harvest(pending, before, -1)
+        _track_harvest(pending, after, 1)
+
+
+def owner_counts(connection, readings):
+    """Fold {plant_id: count} into {owner_id: count} with one query."""
+    by_owner = defaultdict(int)
+    if readings:
+        rows = connection.execute(db.select(Plant.id, Plant.owner_id).where(Plant.id.in_(readings.keys())))
+        for plant_id, owner_id in rows:
+            by_owner[owner_id] += readings[plant_id]
+    return by_owner
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_pending(session, flush_context):
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    connection = session.connection()
+    counters = pending['counters']
+    for owner_id, count in owner_counts(connection, pending['readings']).items():
+        counters[owner_id]['growth_readings'] += count
+    apply_progress(connection, counters, pending['strains'])
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING, None)
+
+
+def backfill_achievement_progress():
+    """Recompute every user's counters with one grouped pass and award what they have earned.
+
+    The caller commits. Returns the number of users with progress.
+    """
+    counters = defaultdict(lambda: dict.fromkeys(REQUIREMENTS, 0))
+    for model, name in ((Watering, 'waterings'), (Note, 'notes')):
+        for user_id, count in db.session.query(model.user_id, db.func.count(model.id)).filter(
+            model.user_id.isnot(None)
+        ).group_by(model.user_id):
+            counters[user_id][name] = count
+    for owner_id, count in db.session.query(Plant.owner_id, db.func.count(GrowthData.id)).join(
+        GrowthData, GrowthData.plant_id == Plant.id
+    ).group_by(Plant.owner_id):
+        counters[owner_id]['growth_readings'] = count
+
+    strains = defaultdict(int)
+    for owner_id, strain, count in db.session.query(
+        Plant.owner_id, Plant.strain, db.func.count(Plant.id)
+    ).filter(
+        Plant.is_archived == True,
+        Plant.archive_reason == 'harvested'
+    ).group_by(Plant.owner_id, Plant.strain):
+        counters[owner_id]['harvests'] += count
+        if strain_key(strain):
+            strains[(owner_id, strain_key(strain))] += count
+    for owner_id, strain in strains:
+        counters[owner_id]['unique_strains'] += 1
+
+    db.session.execute(db.delete(UserStrainHarvest))
+    db.session.execute(db.delete(UserProgress))
+    if strains:
+        db.session.execute(db.insert(UserStrainHarvest), [
+            {'user_id': owner_id, 'strain': strain, 'harvests': count}
+            for (owner_id, strain), count in strains.items()
+        ])
+    if counters:
+        db.session.execute(db.insert(UserProgress), [
+            dict(values, user_id=user_id) for user_id, values in counters.items()
+        ])
+
+    # Award everything already earned in one statement
+    progress = db.case(
+        {name: getattr(UserProgress, name) for name in REQUIREMENTS},
+        value=Achievement.requirement
+    )
+    already = db.select(UserAchievement.id).where(
+        UserAchievement.user_id == UserProgress.user_id,
+        UserAchievement.achievement_id == Achievement.id
+    ).exists()
+    earned = db.select(UserProgress.user_id, Achievement.id, db.literal(datetime.utcnow())).where(
+        Achievement.requirement.in_(REQUIREMENTS),
+        Achievement.requirement_value <= progress,
+        ~already
+    )
+    db.session.execute(db.insert(UserAchievement).from_select(
+        ['user_id', 'achievement_id', 'earned_at'], earned
+    ))
+    return len(counters)
@@ -1,58 +1,161 @@
-from flask import request
+"""Group chat over Socket.IO.
+
+The most recent messages are kept serialized in an in-process ring buffer
+(CHAT_HISTORY_SIZE entries), warmed from the database at startup and
+appended to as messages are posted, so a connecting client gets its
+history without a query. Older history is fetched on demand with the
+load_older event, which pages backwards by message id with the authors
+loaded in the same query. Who is online comes from the shared presence
+store (see app.presence).
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from operator import itemgetter
+from flask import current_app
 from flask_login import current_user
 from flask_socketio import emit
-from app import socketio, db
-from app.models import ChatMessage, User
-from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
+from app.extensions import socketio, db
+from app.models import ChatMessage
+from app.presence import presence_store
+from app.followers import join_followed_plants
+
+
+def older_messages(before_id=None, limit=50):
+    """Up to limit messages older than before_id, oldest first, with their authors"""
+    query = ChatMessage.query.options(joinedload(ChatMessage.author))
+    if before_id is not None:
+        query = query.filter(ChatMessage.id < before_id)
+    messages = query.order_by(ChatMessage.id.desc()).limit(limit).all()
+    messages.reverse()
+    return messages
+
+
+class ChatHistory:
+    """Ring buffer of the newest serialized chat messages
+
+    Messages posted through other worker processes never pass through this
+    buffer; with sync_interval set, recent() picks them up with one primary
+    key range query at most that often.
+    """
+
+    def __init__(self, size=100, sync_interval=None):
+        self.size = size
+        self.sync_interval = sync_interval
+        self._messages = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._synced_at = None
+        self.warmed = False
+
+    def warm(self):
+        """Load the newest messages from the database, replacing the buffer"""
+        messages = [message.to_dict() for message in older_messages(limit=self.size)]
+        with self._lock:
+            self._messages.clear()
+            self._messages.extend(messages)
+            self._synced_at = time.monotonic()
+            self.warmed = True
+
+    def append(self, message):
+        """Buffer a posted message at its id position
+
+        Two posts can commit in one order and reach the buffer in the other,
+        so a message older than the tail is inserted rather than dropped.
+        """
+        with self._lock:
+            if not self.warmed:
+                return
+            messages = self._messages
+            if not messages or message['id'] > messages[-1]['id']:
+                messages.append(message)
+                return
+            position = bisect_left(messages, message['id'], key=itemgetter('id'))
+            if messages[position]['id'] == message['id']:
+                return
+            if len(messages) == messages.maxlen:
+                if position == 0:
+                    # Older than everything the buffer keeps
+                    return
+                messages.popleft()
+                position -= 1
+            messages.insert(position, message)
+
+    def catch_up(self):
+        """Append messages newer than the buffer that were posted elsewhere"""
+        with self._lock:
+            last_id = self._messages[-1]['id'] if self._messages else 0
+            self._synced_at = time.monotonic()
+        newer = ChatMessage.query.options(joinedload(ChatMessage.author)).filter(
+            ChatMessage.id > last_id
+        ).order_by(ChatMessage.id.desc()).limit(self.size).all()
+        for message in reversed(newer):
+            self.append(message.to_dict())
+
+    def recent(self):
+        """The buffered messages, oldest first; warms the buffer if startup could not"""
+        if not self.warmed:
+            self.warm()
+        elif self.sync_interval is not None and time.monotonic() - self._synced_at >= self.sync_interval:
+            self.catch_up()
+        with self._lock:
+            return list(self._messages)
+
+
+def init_chat(app):
+    # Only several workers sharing a message queue can miss each other's messages
+    sync_interval = app.config.get('CHAT_HISTORY_SYNC_SECONDS') if app.config.get('SOCKETIO_MESSAGE_QUEUE') else None
+    history = ChatHistory(app.config.get('CHAT_HISTORY_SIZE', 100), sync_interval)
+    app.extensions['chat_history'] = history
+    with app.app_context():
+        try:
+            history.warm()
+        except SQLAlchemyError:
+            # No schema yet (fresh install, migrations pending); warm on first connect
+            db.session.rollback()
+
+
+def chat_history():
+    """The chat history buffer of the current app"""
+    return current_app.extensions['chat_history']
 
-# Track connected users
-connected_users = {}
 
 @socketio.on('connect')
 def handle_connect():
     """Handle user connection to the chat."""
     if not current_user.is_authenticated:
         return False
-    
-    # Update user's online status
-    current_user.update_user_online_status(True)
-    
-    # Add user to connected users
-    connected_users[current_user.id] = current_user
-    
-    # Fetch recent messages (last 100)
-    messages = ChatMessage.query.order_by(ChatMessage.timestamp.desc()).limit(100).all()
-    messages.reverse()
-    
-    # Get online users
-    online_users = [{'id': user.id, 'username': user.username} 
-                    for user in connected_users.values()]
-    
+
+    # Further tabs of an online user change nothing for anyone else
+    first = presence_store().connect(current_user.id, current_user.username)
+    if first:
+        current_user.update_user_online_status(True)
+    join_followed_plants(current_user.id)
+
     # Send initial data to the connected user
     emit('chat_history', {
-        'messages': [msg.to_dict() for msg in messages],
-        'online_users': online_users
+        'messages': chat_history().recent(),
+        'online_users': presence_store().online()
     })
-    
+
     # Notify others that a new user connected
-    emit('user_connected', {
-        'user': {
-            'id': current_user.id,
-            'username': current_user.username
-        }
-    }, broadcast=True, include_self=False)
+    if first:
+        emit('user_connected', {
+            'user': {
+                'id': current_user.id,
+                'username': current_user.username
+            }
+        }, broadcast=True, include_self=False)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle user disconnection from the chat."""
-    if current_user.is_authenticated:
-        # Update user's online status
+    # Only the user's last connection takes them offline
+    if current_user.is_authenticated and presence_store().disconnect(current_user.id):
         current_user.update_user_online_status(False)
-        
-        # Remove from connected users
-        if current_user.id in connected_users:
-            del connected_users[current_user.id]
-        
+
         # Notify others that a user disconnected
         emit('user_disconnected', {
             'user': {
@@ -66,20 +169,43 @@ def handle_new_message(data):
     """Handle new chat message."""
     if not current_user.is_authenticated:
         return False
-    
+
+    current_user.update_last_seen()
+
     # Create and save new chat message
     new_message = ChatMessage(
         content=data['content'],
         user_id=current_user.id
     )
-    
+
     try:
         db.session.add(new_message)
         db.session.commit()
-        
+
         # Broadcast the new message to all connected clients
-        emit('new_message', new_message.to_dict(), broadcast=True)
+        message = new_message.to_dict()
+        chat_history().append(message)
+        emit('new_message', message, broadcast=True)
     except Exception as e:
         db.session.rollback()
         print(f"Error saving message: {e}")
         return False
+
+@socketio.on('load_older')
+def handle_load_older(data):
+    """Send the page of messages before the oldest one the client has."""
+    if not current_user.is_authenticated:
+        return False
+
+    try:
+        before_id = int(data['before_id'])
+    except (KeyError, TypeError, ValueError):
+        emit('older_messages', {'error': 'before_id is required'})
+        return
+
+    limit = current_app.config.get('CHAT_PAGE_SIZE', 50)
+    messages = older_messages(before_id, limit)
+    emit('older_messages', {
+        'messages': [message.to_dict() for message in messages],
+        'has_more': len(messages) == limit
+    })
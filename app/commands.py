@@ -0,0 +1,124 @@
+"""Maintenance commands registered on the Flask CLI."""
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app.extensions import db
+from app.models import Plant, Note, GrowthData
+from app.watering import last_watered_subquery, refit_watering_model
+from app.rollups import roll_up_growth_data
+from app.strain_stats import rebuild_strain_stats
+from app.achievements import backfill_achievement_progress
+from app.leaderboard import refresh_leaderboards
+from app.scheduler import run_scheduler
+
+
+def latest_row_id(model):
+    """Correlated subquery selecting the newest row of model for each plant."""
+    return db.select(model.id).where(
+        model.plant_id == Plant.id
+    ).order_by(model.timestamp.desc(), model.id.desc()).limit(1).correlate(Plant).scalar_subquery()
+
+
+def find_stale_plant_caches():
+    """Return plants whose cached timeline columns disagree with the source tables."""
+    last_watered = last_watered_subquery()
+    expected_note_id = latest_row_id(Note)
+    expected_growth_data_id = latest_row_id(GrowthData)
+
+    rows = db.session.query(
+        Plant,
+        last_watered.c.last_watered,
+        expected_note_id,
+        expected_growth_data_id
+    ).outerjoin(last_watered, last_watered.c.plant_id == Plant.id).filter(
+        db.or_(
+            Plant.last_watered_at.isnot_distinct_from(last_watered.c.last_watered) == False,
+            Plant.last_note_id.isnot_distinct_from(expected_note_id) == False,
+            Plant.latest_growth_data_id.isnot_distinct_from(expected_growth_data_id) == False
+        )
+    ).all()
+    return [row[0] for row in rows]
+
+
+@click.command('check-plant-cache')
+@click.option('--repair', is_flag=True, help='Recompute the cached columns of stale plants.')
+@with_appcontext
+def check_plant_cache_command(repair):
+    """Verify the cached last watering/note/growth pointers on plants."""
+    stale = find_stale_plant_caches()
+    for plant in stale:
+        click.echo(f'Plant {plant.id} ({plant.name}) has a stale timeline cache')
+        if repair:
+            plant.refresh_timeline_cache()
+
+    if repair and stale:
+        db.session.commit()
+        click.echo(f'Repaired {len(stale)} plant(s)')
+    elif not stale:
+        click.echo('All plant timeline caches are consistent')
+
+
+@click.command('refit-watering-models')
+@with_appcontext
+def refit_watering_models_command():
+    """Refit every plant's watering interval estimate from its watering history."""
+    count = 0
+    for plant in Plant.query.filter(Plant.last_watered_at.isnot(None)).order_by(Plant.id):
+        refit_watering_model(plant)
+        count += 1
+    db.session.commit()
+    click.echo(f'Refitted the watering model of {count} plant(s)')
+
+
+@click.command('rollup-growth-data')
+@with_appcontext
+def rollup_growth_data_command():
+    """Fold growth readings not yet rolled up into the hourly/daily rollups."""
+    folded = roll_up_growth_data()
+    click.echo(f'Rolled up {folded} growth reading(s)')
+
+
+@click.command('rebuild-strain-stats')
+@with_appcontext
+def rebuild_strain_stats_command():
+    """Recompute the materialized strain rating and grow counters."""
+    count = rebuild_strain_stats()
+    db.session.commit()
+    click.echo(f'Rebuilt statistics for {count} strain(s)')
+
+
+@click.command('backfill-achievements')
+@with_appcontext
+def backfill_achievements_command():
+    """Recompute achievement progress counters and award anything already earned."""
+    count = backfill_achievement_progress()
+    db.session.commit()
+    click.echo(f'Backfilled achievement progress for {count} user(s)')
+
+
+@click.command('refresh-leaderboards')
+@with_appcontext
+def refresh_leaderboards_command():
+    """Recompute the community leaderboard rankings now."""
+    written = refresh_leaderboards()
+    db.session.commit()
+    click.echo(f'Ranked {written} leaderboard entr(ies)')
+
+
+@click.command('scheduler')
+@with_appcontext
+def scheduler_command():
+    """Run the scheduled jobs in this process (a dedicated scheduler process)."""
+    click.echo('Starting scheduler; jobs run while this process holds the lease')
+    run_scheduler(current_app._get_current_object())
+
+
+def register_commands(app):
+    """Attach the maintenance commands to the app's CLI."""
+    app.cli.add_command(check_plant_cache_command)
+    app.cli.add_command(refit_watering_models_command)
+    app.cli.add_command(rollup_growth_data_command)
+    app.cli.add_command(rebuild_strain_stats_command)
+    app.cli.add_command(backfill_achievements_command)
+    app.cli.add_command(refresh_leaderboards_command)
+    app.cli.add_command(scheduler_command)
@@ -0,0 +1,242 @@
+"""Fan-out of public plant updates to their followers.
+
+A watering, stage change or milestone on a public plant writes a single
+PlantEvent in the same transaction, whatever the number of followers.
+Once committed, the event is emitted to the plant's Socket.IO room
+(plant_<id>), which connected followers join, so live delivery costs one
+emit per event.
+
+Signal delivery goes through the followers' notification digests. The
+scheduler's fan-out job walks each plant's followers in batches by
+PlantFollower.id (keyset, resumable through PlantEvent.follower_cursor)
+and folds every pending event of the plant into one FollowerUpdate row per
+follower with a set-based UPDATE and INSERT..SELECT per batch. A hot plant
+therefore costs one pass over its followers per run, not one per event,
+and its followers see a single line per digest.
+"""
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from flask_socketio import join_room
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.extensions import db, socketio
+from app.models import (Plant, Watering, GrowthStage, Milestone, PlantEvent,
+                        PlantFollower, FollowerUpdate, NotificationAlert)
+
+_PENDING = 'plant_events'
+_COMMITTED = 'plant_updates'
+
+
+def plant_room(plant_id):
+    return f'plant_{plant_id}'
+
+
+def describe(kind, name, detail=None):
+    """The one-line text of a plant event"""
+    if kind == 'watering':
+        return f'{name} was watered'
+    if kind == 'stage':
+        return f'{name} entered the {detail} stage'
+    return f'{name}: {detail}'
+
+
+def publish_plant_events(session, events, now=None):
+    """Write an event per (plant_id, kind, detail) for the public plants among them.
+
+    Bulk write paths that bypass the mapper events call this themselves.
+    The events are emitted to the plants' rooms once the session commits.
+    """
+    plant_ids = {plant_id for plant_id, _, _ in events}
+    if not plant_ids:
+        return []
+    connection = session.connection()
+    names = dict(connection.execute(db.select(Plant.id, Plant.name).where(
+        Plant.id.in_(plant_ids),
+        Plant.is_public == True,
+        Plant.is_archived == False
+    )).all())
+    if not names:
+        return []
+
+    now = now or datetime.utcnow()
+    rows = [
+        {'plant_id': plant_id, 'kind': kind, 'body': describe(kind, names[plant_id], detail),
+         'created_at': now, 'status': 'pending', 'follower_cursor': 0}
+        for plant_id, kind, detail in events if plant_id in names
+    ]
+    connection.execute(PlantEvent.__table__.insert(), rows)
+    session.info.setdefault(_COMMITTED, []).extend(rows)
+    return rows
+
+
+def _pending(target):
+    return inspect(target).session.info.setdefault(_PENDING, [])
+
+
+@event.listens_for(Watering, 'after_insert')
+def _watering_inserted(mapper, connection, target):
+    _pending(target).append((target.plant_id, 'watering', None))
+
+
+@event.listens_for(GrowthStage, 'after_insert')
+def _stage_inserted(mapper, connection, target):
+    _pending(target).append((target.plant_id, 'stage', target.stage_name))
+
+
+@event.listens_for(Milestone, 'after_insert')
+def _milestone_inserted(mapper, connection, target):
+    _pending(target).append((target.plant_id, 'milestone', target.title))
+
+
+@event.listens_for(Session, 'after_flush')
+def _write_events(session, flush_context):
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        publish_plant_events(session, pending)
+
+
+@event.listens_for(Session, 'after_commit')
+def _emit_committed(session):
+    rows = session.info.pop(_COMMITTED, None)
+    if not rows or not has_app_context():
+        return
+    for row in rows:
+        socketio.emit('plant_update', {
+            'plant_id': row['plant_id'],
+            'kind': row['kind'],
+            'body': row['body'],
+            'timestamp': row['created_at'].isoformat()
+        }, to=plant_room(row['plant_id']))
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING, None)
+    session.info.pop(_COMMITTED, None)
+
+
+def join_followed_plants(user_id):
+    """Put the current Socket.IO connection in the rooms of the plants the user follows"""
+    for plant_id, in db.session.query(PlantFollower.plant_id).filter(PlantFollower.user_id == user_id):
+        join_room(plant_room(plant_id))
+
+
+def _fold_batch(plant_id, low, high, count, latest_id, summary, now):
+    """Add count events ending with latest_id to the followers with ids in [low, high]"""
+    followers = db.select(PlantFollower.user_id).where(
+        PlantFollower.plant_id == plant_id,
+        PlantFollower.id.between(low, high)
+    )
+    db.session.execute(db.update(FollowerUpdate).where(
+        FollowerUpdate.plant_id == plant_id,
+        FollowerUpdate.user_id.in_(followers)
+    ).values(
+        events=FollowerUpdate.events + count,
+        last_event_id=latest_id,
+        summary=summary,
+        updated_at=now
+    ))
+    existing = db.select(FollowerUpdate.user_id).where(
+        FollowerUpdate.plant_id == plant_id,
+        FollowerUpdate.user_id == PlantFollower.user_id
+    )
+    db.session.execute(db.insert(FollowerUpdate).from_select(
+        ['user_id', 'plant_id', 'events', 'last_event_id', 'summary', 'updated_at'],
+        db.select(
+            PlantFollower.user_id,
+            db.literal(plant_id),
+            db.literal(count),
+            db.literal(latest_id),
+            db.literal(summary),
+            db.literal(now)
+        ).where(
+            PlantFollower.plant_id == plant_id,
+            PlantFollower.id.between(low, high),
+            ~existing.exists()
+        )
+    ))
+
+
+def fan_out_events(batch_size=500, limit=1000, now=None):
+    """Fold pending plant events into their followers' FollowerUpdate rows; commits per batch.
+
+    Pending events of a plant that reached the same follower are folded in together.
+    Returns counts of events finished and follower batches written.
+    """
+    now = now or datetime.utcnow()
+    stats = {'events': 0, 'batches': 0}
+    events = PlantEvent.query.filter(PlantEvent.status == 'pending').order_by(PlantEvent.id).limit(limit).all()
+
+    groups = {}
+    for plant_event in events:
+        groups.setdefault((plant_event.plant_id, plant_event.follower_cursor), []).append(plant_event)
+
+    for (plant_id, cursor), group in groups.items():
+        event_ids = [plant_event.id for plant_event in group]
+        latest_id, summary = group[-1].id, group[-1].body
+        while True:
+            ids = [row[0] for row in db.session.query(PlantFollower.id).filter(
+                PlantFollower.plant_id == plant_id,
+                PlantFollower.id > cursor
+            ).order_by(PlantFollower.id).limit(batch_size)]
+            if ids:
+                _fold_batch(plant_id, ids[0], ids[-1], len(group), latest_id, summary, now)
+                cursor = ids[-1]
+                stats['batches'] += 1
+            done = len(ids) < batch_size
+            db.session.execute(db.update(PlantEvent).where(PlantEvent.id.in_(event_ids)).values(
+                follower_cursor=cursor,
+                status='done' if done else 'pending'
+            ))
+            db.session.commit()
+            if done:
+                break
+        stats['events'] += len(group)
+
+    retention = timedelta(days=current_app.config.get('PLANT_EVENT_RETENTION_DAYS', 7))
+    db.session.execute(db.delete(PlantEvent).where(
+        PlantEvent.status == 'done',
+        PlantEvent.created_at < now - retention
+    ))
+    db.session.commit()
+    return stats
+
+
+def follower_alerts(user_ids):
+    """Unsaved 'following' alerts summarising each followed plant's undelivered updates"""
+    updates = db.session.query(FollowerUpdate).join(
+        PlantFollower, db.and_(
+            PlantFollower.user_id == FollowerUpdate.user_id,
+            PlantFollower.plant_id == FollowerUpdate.plant_id
+        )
+    ).filter(
+        FollowerUpdate.user_id.in_(user_ids),
+        FollowerUpdate.events > 0
+    ).order_by(FollowerUpdate.user_id, FollowerUpdate.plant_id).all()
+
+    alerts = []
+    for update in updates:
+        body = update.summary
+        if update.events > 1:
+            body += f' (+{update.events - 1} more update{"s" if update.events > 2 else ""})'
+        alerts.append(NotificationAlert(
+            user_id=update.user_id,
+            plant_id=update.plant_id,
+            kind='following',
+            alert_key=str(update.last_event_id),
+            body=body
+        ))
+    return alerts
+
+
+def mark_delivered(alerts):
+    """Reset the coalesced counters that went into a digest.
+
+    Rows that received newer events in the meantime keep them for the next digest.
+    """
+    for alert in alerts:
+        db.session.execute(db.update(FollowerUpdate).where(
+            FollowerUpdate.user_id == alert.user_id,
+            FollowerUpdate.plant_id == alert.plant_id,
+            FollowerUpdate.last_event_id == int(alert.alert_key)
+        ).values(events=0))
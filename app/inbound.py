@@ -0,0 +1,177 @@
+"""Asynchronous processing of Signal commands received by the webhook.
+
+The webhook stores each message in InboundMessage, keyed by its message id so
+bridge retries are ignored, and hands the sender to an InboundDispatcher.
+Each sender is pinned to one worker thread of a fixed-size pool, and a worker
+runs a sender's pending messages in arrival order, so replies to one sender
+never overtake each other while different senders are served in parallel.
+
+Messages are claimed with a conditional UPDATE that only succeeds while no
+other message of the same sender is being processed, so several processes
+can share the table without running a command twice or out of order. The
+sweep hands claims older than SIGNAL_WEBHOOK_CLAIM_TIMEOUT (a worker that
+died mid-command) back to the queue and prunes handled messages after
+SIGNAL_WEBHOOK_RETENTION_DAYS.
+"""
+import hashlib
+import queue
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from app.extensions import db
+from app.models import InboundMessage
+
+
+def message_key(data, raw_body):
+    """Idempotency key for a webhook payload.
+
+    Prefers the bridge's message id, then sender and send timestamp, and
+    falls back to a digest of the raw request body.
+    """
+    if data.get('message_id'):
+        return str(data['message_id'])
+    if data.get('timestamp'):
+        return f"{data['sender']}:{data['timestamp']}"
+    return hashlib.sha256(raw_body).hexdigest()
+
+
+def store_message(message_id, sender, body):
+    """Persist an inbound message; returns False if it was already received."""
+    db.session.add(InboundMessage(message_id=message_id, sender=sender, body=body))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
+
+
+class InboundDispatcher:
+    """Bounded worker pool that runs stored Signal commands per sender."""
+
+    def __init__(self, app, signal_service, workers=4, queue_size=1000, sweep_interval=30,
+                 claim_timeout=300, retention_days=7):
+        self.app = app
+        self.signal_service = signal_service
+        self.workers = workers
+        self.sweep_interval = sweep_interval
+        self.claim_timeout = claim_timeout
+        self.retention_days = retention_days
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def worker_for(self, sender):
+        """Index of the worker that owns sender's messages"""
+        return zlib.crc32(sender.encode()) % self.workers
+
+    def submit(self, sender):
+        """Wake the worker that owns sender.
+
+        Returns False when that worker's queue is full; the stored messages
+        are then picked up by the next sweep.
+        """
+        self.start()
+        try:
+            self._queues[self.worker_for(sender)].put_nowait(sender)
+        except queue.Full:
+            return False
+        return True
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, args=(index,),
+                                          name=f'signal-inbound-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if self.sweep_interval:
+                thread = threading.Thread(target=self._sweep_forever, name='signal-inbound-sweep', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self, index):
+        while True:
+            sender = self._queues[index].get()
+            try:
+                self.process_sender(sender)
+            except Exception as e:
+                self.app.logger.error('Signal command worker failed for %s: %s', sender, e)
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                self.app.logger.error('Signal inbound sweep failed: %s', e)
+
+    def sweep(self, now=None):
+        """Release stale claims, prune handled messages and resubmit every sender with pending ones."""
+        now = now or datetime.utcnow()
+        with self.app.app_context():
+            released = db.session.execute(db.update(InboundMessage).where(
+                InboundMessage.status == 'processing',
+                InboundMessage.claimed_at < now - timedelta(seconds=self.claim_timeout)
+            ).values(status='pending', claimed_at=None)).rowcount
+            if released:
+                self.app.logger.warning('Released %d stale Signal command claim(s)', released)
+            db.session.execute(db.delete(InboundMessage).where(
+                InboundMessage.status.in_(('done', 'failed')),
+                InboundMessage.processed_at < now - timedelta(days=self.retention_days)
+            ))
+            db.session.commit()
+
+            senders = [sender for sender, in db.session.query(InboundMessage.sender).filter(
+                InboundMessage.status == 'pending'
+            ).distinct()]
+        for sender in senders:
+            self.submit(sender)
+        return senders
+
+    def claim(self, message_id, sender):
+        """Mark a pending message as processing; False if it or another of the sender's is taken.
+
+        Commits the claim.
+        """
+        busy = aliased(InboundMessage)
+        claimed = db.session.execute(db.update(InboundMessage).where(
+            InboundMessage.id == message_id,
+            InboundMessage.status == 'pending',
+            ~db.select(busy.id).where(busy.sender == sender, busy.status == 'processing').exists()
+        ).values(status='processing', claimed_at=datetime.utcnow())).rowcount
+        db.session.commit()
+        return bool(claimed)
+
+    def process_sender(self, sender):
+        """Run sender's pending messages in arrival order and queue the replies.
+
+        A message is claimed before its command runs, so a command is never
+        run by two workers at once. Stops when the sender has nothing
+        pending or is being served elsewhere. Returns the number processed.
+        """
+        processed = 0
+        with self.app.app_context():
+            while True:
+                message = InboundMessage.query.filter_by(
+                    sender=sender, status='pending'
+                ).order_by(InboundMessage.id).first()
+                if message is None or not self.claim(message.id, sender):
+                    return processed
+
+                result = self.signal_service.process_incoming_message(sender, message.body)
+                if not result['success']:
+                    db.session.rollback()
+                message.status = 'done' if result['success'] else 'failed'
+                message.error = result.get('error')
+                message.processed_at = datetime.utcnow()
+                reply = result['message'] if result['success'] else f"❌ Error: {result['error']}"
+                self.signal_service.send_message(sender, reply)
+                # The message status is committed together with the queued reply
+                db.session.commit()
+                processed += 1
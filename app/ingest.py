@@ -0,0 +1,207 @@
+"""Batch ingestion of waterings and growth readings for many plants."""
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import func
+from app.extensions import db
+from app.models import Watering, GrowthData, GrowthStage
+from app.permissions import load_plants_with_access
+from app.achievements import apply_progress
+from app.watering import observe_watering
+from app.followers import publish_plant_events
+
+READING_FIELDS = ('temperature', 'humidity', 'ph_level', 'height')
+
+
+def _optional_float(value):
+    return None if value is None or value == '' else float(value)
+
+
+def _failure(plant_id, error):
+    return {'plant_id': plant_id, 'success': False, 'error': error}
+
+
+def _authorize(items, user, right):
+    """Pair each item with its plant, or with an error result.
+
+    Plants and the user's rights on them are loaded with a single query.
+    """
+    plant_ids = []
+    for item in items:
+        try:
+            plant_ids.append(int(item.get('plant_id')))
+        except (TypeError, ValueError):
+            plant_ids.append(None)
+
+    plants = load_plants_with_access([i for i in plant_ids if i is not None], user)
+    for item, plant_id in zip(items, plant_ids):
+        if plant_id not in plants:
+            yield item, None, _failure(item.get('plant_id'), 'Plant not found')
+            continue
+        plant, access = plants[plant_id]
+        if not getattr(access, right):
+            yield item, None, _failure(plant_id, 'Access denied')
+            continue
+        yield item, plant, None
+
+
+def record_waterings(user, items):
+    """Record a watering per item with one bulk insert and one commit.
+
+    Each item is a dict with plant_id and optional amount and nutrients.
+    Returns one result dict per item, in input order.
+    """
+    now = datetime.utcnow()
+    rows, results, watered = [], [], {}
+    for item, plant, failure in _authorize(items, user, 'can_water'):
+        if failure:
+            results.append(failure)
+            continue
+        try:
+            amount = _optional_float(item.get('amount'))
+        except (TypeError, ValueError):
+            results.append(_failure(plant.id, 'Invalid amount'))
+            continue
+
+        rows.append({
+            'plant_id': plant.id,
+            'user_id': user.id,
+            'amount': amount,
+            'nutrients': item.get('nutrients', ''),
+            'timestamp': now
+        })
+        watered[plant.id] = plant
+        results.append({'plant_id': plant.id, 'success': True})
+
+    if rows:
+        db.session.execute(db.insert(Watering), rows)
+        # Bulk inserts bypass the mapper events that keep achievement progress
+        apply_progress(db.session.connection(), {user.id: {'waterings': len(rows)}})
+        publish_plant_events(db.session, [(plant_id, 'watering', None) for plant_id in watered])
+        for plant in watered.values():
+            observe_watering(plant, now)
+        db.session.commit()
+
+    return results
+
+
+def score_readings(rows, plants):
+    """Fill health_score and growth_rate for a batch of reading rows.
+
+    Uses one query for the plants' current stages and one for each plant's
+    latest height, then walks the batch in timestamp order so readings in
+    the same batch build on each other.
+    """
+    stage_ids = {plant.current_stage_id for plant in plants.values() if plant.current_stage_id}
+    stages = {}
+    if stage_ids:
+        stages = {stage.id: stage for stage in GrowthStage.query.filter(GrowthStage.id.in_(stage_ids))}
+
+    latest = db.session.query(
+        GrowthData.plant_id.label('plant_id'),
+        func.max(GrowthData.timestamp).label('timestamp')
+    ).filter(
+        GrowthData.plant_id.in_(plants.keys()),
+        GrowthData.height.isnot(None)
+    ).group_by(GrowthData.plant_id).subquery()
+    previous = {
+        plant_id: (timestamp, height)
+        for plant_id, timestamp, height in db.session.query(
+            GrowthData.plant_id, GrowthData.timestamp, GrowthData.height
+        ).join(latest, db.and_(
+            GrowthData.plant_id == latest.c.plant_id,
+            GrowthData.timestamp == latest.c.timestamp
+        ))
+    }
+
+    for row in sorted(rows, key=lambda r: (r['plant_id'], r['timestamp'])):
+        plant = plants[row['plant_id']]
+        row['health_score'] = GrowthData.score_conditions(
+            stages.get(plant.current_stage_id),
+            row['temperature'],
+            row['humidity'],
+            row['ph_level']
+        )
+        row['growth_rate'] = None
+        if row['height'] is None:
+            continue
+        last = previous.get(plant.id)
+        if last:
+            days = (row['timestamp'] - last[0]).days
+            if days > 0:
+                row['growth_rate'] = (row['height'] - last[1]) / days
+        previous[plant.id] = (row['timestamp'], row['height'])
+
+    return rows
+
+
+def insert_readings(rows, plants):
+    """Bulk insert scored reading rows and move the plants' latest pointers."""
+    ids = db.session.scalars(
+        db.insert(GrowthData).returning(GrowthData.id, sort_by_parameter_order=True),
+        rows
+    ).all()
+
+    readings = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        readings[plants[row['plant_id']].owner_id]['growth_readings'] += 1
+    apply_progress(db.session.connection(), readings)
+
+    newest = {}
+    for row, row_id in zip(rows, ids):
+        current = newest.get(row['plant_id'])
+        if current is None or row['timestamp'] >= current[0]:
+            newest[row['plant_id']] = (row['timestamp'], row_id)
+
+    # One query for the timestamps the plants' current pointers refer to
+    pointers = {plants[plant_id].latest_growth_data_id for plant_id in newest} - {None}
+    latest = dict(db.session.query(GrowthData.id, GrowthData.timestamp).filter(
+        GrowthData.id.in_(pointers)
+    )) if pointers else {}
+
+    for plant_id, (timestamp, row_id) in newest.items():
+        plant = plants[plant_id]
+        current = latest.get(plant.latest_growth_data_id)
+        if current is None or timestamp >= current:
+            plant.latest_growth_data_id = row_id
+    return ids
+
+
+def record_growth_data(user, items):
+    """Record growth readings for many plants with one bulk insert and one commit.
+
+    Each item is a dict with plant_id and any of temperature, humidity,
+    ph_level and height. Returns one result dict per item, in input order,
+    including the computed health score and growth rate.
+    """
+    now = datetime.utcnow()
+    rows, results, plants = [], [], {}
+    for item, plant, failure in _authorize(items, user, 'can_edit'):
+        if failure:
+            results.append(failure)
+            continue
+        try:
+            row = {field: _optional_float(item.get(field)) for field in READING_FIELDS}
+        except (TypeError, ValueError):
+            results.append(_failure(plant.id, 'Invalid reading'))
+            continue
+
+        row.update(plant_id=plant.id, timestamp=now)
+        rows.append(row)
+        plants[plant.id] = plant
+        # Replaced by a result dict once the batch has been scored
+        results.append(row)
+
+    if rows:
+        score_readings(rows, plants)
+        insert_readings(rows, plants)
+        db.session.commit()
+
+    return [
+        result if 'success' in result else {
+            'plant_id': result['plant_id'],
+            'success': True,
+            'health_score': result['health_score'],
+            'growth_rate': result['growth_rate']
+        }
+        for result in results
+    ]
@@ -0,0 +1,81 @@
+"""Community leaderboards precomputed into a ranking table.
+
+refresh_leaderboards runs one ORDER BY ... LIMIT query per board on a
+schedule and swaps the results into LeaderboardEntry in a single
+transaction. Readers only ever fetch a board's first rows by primary key,
+so serving a leaderboard costs the same no matter how many users exist.
+"""
+from datetime import datetime
+from flask import current_app
+from app.extensions import db
+from app.models import User, Plant, UserProgress, UserAchievement, LeaderboardEntry
+
+BOARDS = {
+    'harvests': 'Harvests',
+    'success_rate': 'Success Rate',
+    'strains': 'Strains Grown',
+    'achievements': 'Achievements',
+}
+
+
+def grow_counts():
+    """Subquery of (owner_id, grows, harvests) over completed grows"""
+    return db.session.query(
+        Plant.owner_id.label('user_id'),
+        db.func.count(Plant.id).label('grows'),
+        db.func.sum(db.case((Plant.archive_reason == 'harvested', 1), else_=0)).label('harvests')
+    ).filter(Plant.is_archived == True).group_by(Plant.owner_id).subquery()
+
+
+def _board_queries(min_grows):
+    grows = grow_counts()
+    rate = (grows.c.harvests * 100.0 / grows.c.grows).label('value')
+    achievements = db.session.query(
+        UserAchievement.user_id.label('user_id'),
+        db.func.count(UserAchievement.id).label('value')
+    ).group_by(UserAchievement.user_id).subquery()
+    return {
+        'harvests': (grows.c.user_id, grows.c.harvests, grows.c.harvests > 0),
+        'success_rate': (grows.c.user_id, rate, grows.c.grows >= min_grows),
+        'strains': (UserProgress.user_id, UserProgress.unique_strains, UserProgress.unique_strains > 0),
+        'achievements': (achievements.c.user_id, achievements.c.value, achievements.c.value > 0),
+    }
+
+
+def refresh_leaderboards(size=None, min_grows=None, now=None):
+    """Recompute every board's top rows; the caller commits. Returns rows written."""
+    size = size or current_app.config.get('LEADERBOARD_SIZE', 10)
+    if min_grows is None:
+        min_grows = current_app.config.get('LEADERBOARD_MIN_GROWS', 3)
+    now = now or datetime.utcnow()
+
+    rows = []
+    for board, (user_id, value, qualifies) in _board_queries(min_grows).items():
+        ranked = db.session.query(user_id, User.username, value).join(
+            User, User.id == user_id
+        ).filter(qualifies).order_by(value.desc(), user_id).limit(size)
+        rows.extend(
+            {'board': board, 'rank': rank, 'user_id': uid, 'username': username,
+             'value': float(score), 'computed_at': now}
+            for rank, (uid, username, score) in enumerate(ranked, 1)
+        )
+
+    # Readers see either the previous rankings or the new ones, never a mix
+    db.session.execute(db.delete(LeaderboardEntry))
+    if rows:
+        db.session.execute(db.insert(LeaderboardEntry), rows)
+    return len(rows)
+
+
+def leaderboard(board, limit=None):
+    """The precomputed top entries of a board, best first"""
+    query = LeaderboardEntry.query.filter_by(board=board).order_by(LeaderboardEntry.rank)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def format_value(board, value):
+    if board == 'success_rate':
+        return f"{value:.1f}%"
+    return f"{value:.0f}"
@@ -0,0 +1,77 @@
+"""Database-backed leader leases.
+
+Several processes (web workers, a dedicated scheduler process) may try to
+run the same scheduled jobs. Each holds a LeaderLease and renews it
+periodically; the renewal is a single conditional UPDATE that only
+succeeds for the current holder or once the lease has expired, so at most
+one process is leader at a time. A crashed leader is replaced once its
+lease runs out.
+"""
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models import SchedulerLease
+
+
+def default_holder():
+    """A name identifying this process in the lease table and job history"""
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+
+
+class LeaderLease:
+    """A named lease this process tries to hold"""
+
+    def __init__(self, name, holder=None, ttl=60):
+        self.name = name
+        self.holder = holder or default_holder()
+        self.ttl = ttl
+        self.expires_at = None
+
+    @property
+    def is_leader(self):
+        """True while this process holds an unexpired lease"""
+        return self.expires_at is not None and datetime.utcnow() < self.expires_at
+
+    def acquire(self, now=None):
+        """Take the lease if it is free or expired, or extend it if held; commits."""
+        now = now or datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        table = SchedulerLease.__table__
+        taken = db.session.execute(table.update().where(
+            table.c.name == self.name,
+            db.or_(table.c.holder == self.holder, table.c.expires_at < now)
+        ).values(
+            holder=self.holder,
+            expires_at=expires_at,
+            acquired_at=db.case((table.c.holder == self.holder, table.c.acquired_at), else_=now)
+        )).rowcount
+        if not taken:
+            try:
+                db.session.execute(table.insert().values(
+                    name=self.name, holder=self.holder, acquired_at=now, expires_at=expires_at
+                ))
+                taken = 1
+            except IntegrityError:
+                # Held by another process
+                db.session.rollback()
+        db.session.commit()
+
+        self.expires_at = expires_at if taken else None
+        return bool(taken)
+
+    def release(self):
+        """Give the lease up so another process can take over immediately; commits."""
+        table = SchedulerLease.__table__
+        db.session.execute(table.delete().where(
+            table.c.name == self.name,
+            table.c.holder == self.holder
+        ))
+        db.session.commit()
+        self.expires_at = None
+
+
+def current_lease(name):
+    return db.session.get(SchedulerLease, name)
@@ -0,0 +1,54 @@
+"""Data loading for the dashboard."""
+from sqlalchemy.orm import joinedload
+from app.extensions import db
+from app.models import Plant, PlantPermission
+from app.permissions import remember_access
+
+
+def load_dashboard(user, public_page=1, per_page=12):
+    """Load the plants shown on main.index in a fixed number of queries.
+
+    Owned and shared plants come back from a single query together with
+    the user's permission rows, which seed the per-request access cache.
+    The public group grows are paginated. Profile images are joined in
+    through Plant.profile_image_id so the template never queries per card.
+    """
+    rows = db.session.execute(
+        db.select(Plant, PlantPermission).outerjoin(
+            PlantPermission,
+            db.and_(PlantPermission.plant_id == Plant.id, PlantPermission.user_id == user.id)
+        ).options(
+            joinedload(Plant.profile_image)
+        ).where(
+            Plant.is_archived == False,
+            db.or_(
+                db.and_(Plant.owner_id == user.id, Plant.is_group_grow == False),
+                PlantPermission.id.isnot(None)
+            )
+        ).order_by(Plant.id)
+    ).all()
+
+    access = {plant.id: remember_access(user, plant, permission) for plant, permission in rows}
+    owned_plants = [plant for plant, _ in rows
+                    if plant.owner_id == user.id and not plant.is_group_grow]
+    permitted_plants = [plant for plant, permission in rows if permission is not None]
+
+    public_plants = db.paginate(
+        db.select(Plant).options(
+            joinedload(Plant.profile_image)
+        ).where(
+            Plant.is_group_grow == True,
+            Plant.is_archived == False
+        ).order_by(Plant.start_date.desc(), Plant.id.desc()),
+        page=public_page,
+        per_page=per_page,
+        error_out=False
+    )
+
+    return {
+        'owned_plants': owned_plants,
+        'permitted_plants': permitted_plants,
+        'access': access,
+        'public_plants': public_plants.items,
+        'public_pagination': public_plants
+    }
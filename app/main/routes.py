@@ -2,7 +2,13 @@ from flask import render_template, redirect, url_for, flash, request, jsonify, c
 from flask_login import login_required, current_user
 from app import db
 from app.main import bp
-from app.models import Plant, Note, Watering, PlantImage, Milestone, PlantPermission, User
+from app.models import Plant, Note, Watering, PlantImage, Milestone, User, JobRun
+from app.timeline import TIMELINES, timeline_page
+from app.main.dashboard import load_dashboard
+from app.permissions import resolve_access
+from app.leaderboard import BOARDS, leaderboard
+from app.leases import current_lease
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 import os
 from werkzeug.utils import secure_filename
@@ -14,51 +20,62 @@ def allowed_file(filename):
 @bp.route('/')
 @login_required
 def index():
-    # Get private plants user owns (not archived and not public)
-    owned_plants = Plant.query.filter_by(
-        owner_id=current_user.id,
-        is_group_grow=False,
-        is_archived=False
-    ).all()
-    
-    # Get plants user has permissions for (not archived)
-    permitted_plants = Plant.query.join(PlantPermission).filter(
-        PlantPermission.user_id == current_user.id,
-        Plant.is_archived == False
-    ).all()
-    
-    # Get public plants (not archived)
-    public_plants = Plant.query.filter_by(
-        is_group_grow=True,
-        is_archived=False
-    ).order_by(Plant.start_date.desc()).all()
-    
-    return render_template('main/index.html',
-                         owned_plants=owned_plants,
-                         permitted_plants=permitted_plants,
-                         public_plants=public_plants)
+    dashboard = load_dashboard(
+        current_user,
+        public_page=request.args.get('page', 1, type=int),
+        per_page=current_app.config['DASHBOARD_PUBLIC_PAGE_SIZE']
+    )
+    return render_template('main/index.html', **dashboard)
 
 @bp.route('/plant/<int:id>', methods=['GET'])
 @login_required
 def plant_profile(id):
     plant = Plant.query.get_or_404(id)
-    if plant.owner_id != current_user.id:
-        permission = PlantPermission.query.filter_by(plant_id=plant.id, user_id=current_user.id).first()
-        if not permission:
-            flash('Access denied')
-            return redirect(url_for('main.index'))
+    access = resolve_access(plant)
+    if not access.can_view:
+        flash('Access denied')
+        return redirect(url_for('main.index'))
     
-    has_edit_permission = plant.owner_id == current_user.id or (
-        permission and permission.can_edit if 'permission' in locals() else False
-    )
+    has_edit_permission = access.can_edit
+    
+    # Only the first page of each timeline is rendered; the rest is
+    # fetched on demand from plant_timeline
+    page_size = current_app.config['TIMELINE_PAGE_SIZE']
+    timelines = {
+        kind: timeline_page(model, plant.id, limit=page_size)
+        for kind, model in TIMELINES.items()
+    }
     
     return render_template('main/plant_profile.html', 
                          plant=plant,
                          has_edit_permission=has_edit_permission,
-                         Watering=Watering,
-                         PlantImage=PlantImage,
-                         Milestone=Milestone,
-                         Note=Note)
+                         timelines=timelines)
+
+@bp.route('/plant/<int:id>/timeline/<kind>', methods=['GET'])
+@login_required
+def plant_timeline(id, kind):
+    plant = Plant.query.get_or_404(id)
+    if not resolve_access(plant).can_view:
+        return jsonify({'error': 'Access denied'}), 403
+    
+    model = TIMELINES.get(kind)
+    if model is None:
+        return jsonify({'error': 'Unknown timeline'}), 404
+    
+    try:
+        rows, next_cursor = timeline_page(
+            model,
+            plant.id,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', current_app.config['TIMELINE_PAGE_SIZE'], type=int)
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    return jsonify({
+        'items': [row.to_dict() for row in rows],
+        'next_cursor': next_cursor
+    })
 
 @bp.route('/plant/new', methods=['GET', 'POST'])
 @login_required
@@ -86,14 +103,8 @@ def new_plant():
 @login_required
 def water_plant(id):
     plant = Plant.query.get_or_404(id)
-    if plant.owner_id != current_user.id:
-        permission = PlantPermission.query.filter_by(
-            plant_id=plant.id,
-            user_id=current_user.id,
-            can_water=True
-        ).first()
-        if not permission:
-            return jsonify({'error': 'Access denied'}), 403
+    if not resolve_access(plant).can_water:
+        return jsonify({'error': 'Access denied'}), 403
     
     amount = float(request.form['amount'])
     nutrients = request.form.get('nutrients', '')
@@ -105,6 +116,7 @@ def water_plant(id):
         user_id=current_user.id
     )
     db.session.add(watering)
+    plant.record_watering(watering)
     db.session.commit()
     
     return jsonify({'success': True})
@@ -113,14 +125,8 @@ def water_plant(id):
 @login_required
 def add_note(id):
     plant = Plant.query.get_or_404(id)
-    if plant.owner_id != current_user.id:
-        permission = PlantPermission.query.filter_by(
-            plant_id=plant.id,
-            user_id=current_user.id,
-            can_add_notes=True
-        ).first()
-        if not permission:
-            return jsonify({'error': 'Access denied'}), 403
+    if not resolve_access(plant).can_add_notes:
+        return jsonify({'error': 'Access denied'}), 403
     
     content = request.form['content']
     note = Note(
@@ -129,6 +135,7 @@ def add_note(id):
         user_id=current_user.id
     )
     db.session.add(note)
+    plant.record_note(note)
     db.session.commit()
     
     return jsonify({'success': True})
@@ -137,14 +144,8 @@ def add_note(id):
 @login_required
 def add_image(id):
     plant = Plant.query.get_or_404(id)
-    if plant.owner_id != current_user.id:
-        permission = PlantPermission.query.filter_by(
-            plant_id=plant.id,
-            user_id=current_user.id,
-            can_edit=True
-        ).first()
-        if not permission:
-            return jsonify({'error': 'Access denied'}), 403
+    if not resolve_access(plant).can_edit:
+        return jsonify({'error': 'Access denied'}), 403
     
     if 'image' not in request.files:
         return jsonify({'error': 'No image provided'}), 400
@@ -167,6 +168,10 @@ def add_image(id):
             user_id=current_user.id
         )
         db.session.add(image)
+        if image.is_profile:
+            if plant.profile_image:
+                plant.profile_image.is_profile = False
+            plant.profile_image = image
         db.session.commit()
         
         return jsonify({'success': True})
@@ -177,14 +182,8 @@ def add_image(id):
 @login_required
 def add_milestone(id):
     plant = Plant.query.get_or_404(id)
-    if plant.owner_id != current_user.id:
-        permission = PlantPermission.query.filter_by(
-            plant_id=plant.id,
-            user_id=current_user.id,
-            can_edit=True
-        ).first()
-        if not permission:
-            return jsonify({'error': 'Access denied'}), 403
+    if not resolve_access(plant).can_edit:
+        return jsonify({'error': 'Access denied'}), 403
     
     title = request.form['title']
     description = request.form.get('description', '')
@@ -204,14 +203,8 @@ def add_milestone(id):
 @login_required
 def edit_plant(id):
     plant = Plant.query.get_or_404(id)
-    if plant.owner_id != current_user.id:
-        permission = PlantPermission.query.filter_by(
-            plant_id=plant.id,
-            user_id=current_user.id,
-            can_edit=True
-        ).first()
-        if not permission:
-            return jsonify({'error': 'Access denied'}), 403
+    if not resolve_access(plant).can_edit:
+        return jsonify({'error': 'Access denied'}), 403
 
     try:
         if 'name' in request.form:
@@ -232,14 +225,8 @@ def edit_plant(id):
 @login_required
 def edit_watering(id):
     watering = Watering.query.get_or_404(id)
-    if watering.plant.owner_id != current_user.id:
-        permission = PlantPermission.query.filter_by(
-            plant_id=watering.plant_id,
-            user_id=current_user.id,
-            can_edit=True
-        ).first()
-        if not permission:
-            return jsonify({'error': 'Access denied'}), 403
+    if not resolve_access(watering.plant).can_edit:
+        return jsonify({'error': 'Access denied'}), 403
 
     try:
         watering.amount = float(request.form['amount'])
@@ -248,6 +235,7 @@ def edit_watering(id):
             f"{request.form['date']} {request.form['time']}", 
             '%Y-%m-%d %H:%M'
         )
+        watering.plant.refresh_last_watering()
         
         db.session.commit()
         return jsonify({'success': True})
@@ -259,17 +247,13 @@ def edit_watering(id):
 @login_required
 def delete_watering(id):
     watering = Watering.query.get_or_404(id)
-    if watering.plant.owner_id != current_user.id:
-        permission = PlantPermission.query.filter_by(
-            plant_id=watering.plant_id,
-            user_id=current_user.id,
-            can_edit=True
-        ).first()
-        if not permission:
-            return jsonify({'error': 'Access denied'}), 403
+    if not resolve_access(watering.plant).can_edit:
+        return jsonify({'error': 'Access denied'}), 403
 
     try:
+        plant = watering.plant
         db.session.delete(watering)
+        plant.refresh_last_watering()
         db.session.commit()
         return jsonify({'success': True})
     except Exception as e:
@@ -280,14 +264,8 @@ def delete_watering(id):
 @login_required
 def delete_plant_image(id):
     image = PlantImage.query.get_or_404(id)
-    if image.plant.owner_id != current_user.id:
-        permission = PlantPermission.query.filter_by(
-            plant_id=image.plant_id,
-            user_id=current_user.id,
-            can_edit=True
-        ).first()
-        if not permission:
-            return jsonify({'error': 'Access denied'}), 403
+    if not resolve_access(image.plant).can_edit:
+        return jsonify({'error': 'Access denied'}), 403
 
     try:
         # Delete the actual file
@@ -296,8 +274,8 @@ def delete_plant_image(id):
             os.remove(file_path)
             
         # If this was the profile image, unset it
-        if image.is_profile:
-            image.plant.profile_image_id = None
+        if image.plant.profile_image_id == image.id:
+            image.plant.profile_image = None
             
         # Delete the database record
         db.session.delete(image)
@@ -311,7 +289,7 @@ def delete_plant_image(id):
 @login_required
 def archive_plant(id):
     plant = Plant.query.get_or_404(id)
-    if plant.owner_id != current_user.id:
+    if not resolve_access(plant).is_owner:
         return jsonify({'error': 'Access denied'}), 403
 
     try:
@@ -330,7 +308,7 @@ def archive_plant(id):
 @login_required
 def unarchive_plant(id):
     plant = Plant.query.get_or_404(id)
-    if plant.owner_id != current_user.id:
+    if not resolve_access(plant).is_owner:
         return jsonify({'error': 'Access denied'}), 403
 
     try:
@@ -351,7 +329,7 @@ def delete_plant(id):
     plant = Plant.query.get_or_404(id)
     
     # Allow deletion if user is the owner or if it's a public archived plant
-    if plant.owner_id != current_user.id and not (plant.is_group_grow and plant.is_archived):
+    if not resolve_access(plant).is_owner and not (plant.is_group_grow and plant.is_archived):
         return jsonify({'error': 'Access denied'}), 403
 
     try:
@@ -397,8 +375,44 @@ def archives():
             )
         )
     
-    plants = plants_query.order_by(Plant.archive_date.desc()).all()
+    plants = plants_query.options(
+        joinedload(Plant.profile_image)
+    ).order_by(Plant.archive_date.desc()).all()
     return render_template('main/archives.html', 
                          plants=plants, 
                          search=search,
                          show_public=show_public)
+
+@bp.route('/api/leaderboard/<board>', methods=['GET'])
+@login_required
+def leaderboard_api(board):
+    """Precomputed community ranking, best first"""
+    if board not in BOARDS:
+        return jsonify({'error': 'Unknown leaderboard'}), 404
+    
+    entries = leaderboard(board, request.args.get('limit', type=int))
+    return jsonify({
+        'board': board,
+        'title': BOARDS[board],
+        'computed_at': entries[0].computed_at.isoformat() if entries else None,
+        'entries': [entry.to_dict() for entry in entries]
+    })
+
+@bp.route('/api/scheduler', methods=['GET'])
+@login_required
+def scheduler_status():
+    """Current scheduler leader and recent job runs, newest first"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Access denied'}), 403
+    
+    runs = JobRun.query
+    if request.args.get('job'):
+        runs = runs.filter_by(job_id=request.args['job'])
+    runs = runs.order_by(JobRun.started_at.desc(), JobRun.id.desc()).limit(
+        min(request.args.get('limit', 50, type=int), 500)
+    ).all()
+    lease = current_lease('scheduler')
+    return jsonify({
+        'leader': lease.to_dict() if lease else None,
+        'runs': [run.to_dict() for run in runs]
+    })
@@ -1,5 +1,6 @@
 from app.extensions import db, login_manager
 from flask_login import UserMixin, current_user
+from sqlalchemy import func
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
 import base64
@@ -16,6 +17,11 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(128))
     phone_number = db.Column(db.String(15), unique=True, nullable=True)
     notifications_enabled = db.Column(db.Boolean, default=True)
+    # Digest settings such as {'watering': False, 'quiet_hours': [22, 7],
+    # 'timezone': 'Europe/Berlin'}; alert kinds not listed are on
+    notification_preferences = db.Column(db.JSON, nullable=True)
+    signal_verified = db.Column(db.Boolean, default=False)
+    signal_verification_code = db.Column(db.String(6), nullable=True)
     is_admin = db.Column(db.Boolean, default=False)
     plants = db.relationship('Plant', backref='owner', lazy='dynamic')
     chat_messages = db.relationship('ChatMessage', backref='author', lazy='dynamic')
@@ -29,16 +35,22 @@ class User(UserMixin, db.Model):
         return check_password_hash(self.password_hash, password)
 
     def update_last_seen(self):
-        self.last_seen = datetime.utcnow()
-        self.is_online = True
-        db.session.commit()
+        self.update_user_online_status(True)
 
     def set_offline(self):
-        self.is_online = False
-        db.session.commit()
+        self.update_user_online_status(False)
 
     def update_user_online_status(self, is_online):
-        """Update user's online status."""
+        """Update user's online status.
+
+        Inside the app the change is coalesced and written in the next
+        batched flush (see app.online_status) instead of committed here.
+        """
+        from app.online_status import online_status_tracker
+        tracker = online_status_tracker()
+        if tracker is not None:
+            tracker.record(self.id, is_online)
+            return
         self.is_online = is_online
         self.last_seen = datetime.utcnow()
         db.session.commit()
@@ -69,9 +81,35 @@ class Plant(db.Model):
     current_stage_id = db.Column(db.Integer, db.ForeignKey('growth_stage.id'), nullable=True)
     last_growth_update = db.Column(db.DateTime)
     target_harvest_date = db.Column(db.DateTime)
+    # When the current stage's duration runs out and the plant moves on
+    next_stage_at = db.Column(db.DateTime, nullable=True, index=True)
+    
+    # Cached pointers to the newest timeline rows, maintained by the write paths
+    last_watered_at = db.Column(db.DateTime, nullable=True)
+    # Moving estimate of the watering interval in hours and the predicted
+    # next watering, maintained with last_watered_at (see app.watering)
+    watering_interval_mean = db.Column(db.Float, nullable=True)
+    watering_interval_var = db.Column(db.Float, nullable=True)
+    next_watering_due = db.Column(db.DateTime, nullable=True)
+    # When the watering check announced next_watering_due; cleared when it changes
+    watering_alerted_at = db.Column(db.DateTime, nullable=True)
+    last_note_id = db.Column(db.Integer, db.ForeignKey('note.id'), nullable=True)
+    last_note_at = db.Column(db.DateTime, nullable=True)
+    latest_growth_data_id = db.Column(db.Integer, db.ForeignKey('growth_data.id'), nullable=True)
+    
+    __table_args__ = (
+        # Signal commands look plants up by case-insensitive name per owner
+        db.Index('ix_plant_owner_id_lower_name', owner_id, func.lower(name)),
+        # The watering check reads the unannounced predictions by due time
+        db.Index('ix_plant_watering_alerted_at_next_watering_due', watering_alerted_at, next_watering_due),
+    )
     
     # Relationships
-    notes = db.relationship('Note', backref='plant', lazy='dynamic', cascade='all, delete-orphan')
+    notes = db.relationship('Note',
+                          foreign_keys='Note.plant_id',
+                          backref='plant',
+                          lazy='dynamic',
+                          cascade='all, delete-orphan')
     waterings = db.relationship('Watering', backref='plant', lazy='dynamic', cascade='all, delete-orphan')
     images = db.relationship('PlantImage', 
                            foreign_keys='PlantImage.plant_id',
@@ -83,13 +121,28 @@ class Plant(db.Model):
                                   post_update=True)
     milestones = db.relationship('Milestone', backref='plant', lazy='dynamic', cascade='all, delete-orphan')
     followers = db.relationship('PlantFollower', backref='plant', lazy='dynamic', cascade='all, delete-orphan')
+    growth_data = db.relationship('GrowthData',
+                                foreign_keys='GrowthData.plant_id',
+                                backref='plant',
+                                lazy='dynamic',
+                                cascade='all, delete-orphan')
+    growth_rollups = db.relationship('GrowthDataRollup', lazy='dynamic', cascade='all, delete-orphan')
+    last_note = db.relationship('Note',
+                              foreign_keys=[last_note_id],
+                              post_update=True)
+    latest_growth_data = db.relationship('GrowthData',
+                                       foreign_keys=[latest_growth_data_id],
+                                       post_update=True)
+    current_stage = db.relationship('GrowthStage',
+                                  foreign_keys=[current_stage_id],
+                                  post_update=True)
     
     def current_growth_stage(self):
         """Get the current growth stage"""
-        return GrowthStage.query.get(self.current_stage_id)
+        return self.current_stage
     
     def advance_growth_stage(self, stage_name, notes=None):
-        """Advance to the next growth stage"""
+        """Advance to the next growth stage; the caller commits"""
         # End current stage if exists
         current = self.current_growth_stage()
         if current:
@@ -97,31 +150,83 @@ class Plant(db.Model):
         
         # Get stage defaults
         defaults = GrowthStage.get_default_stages().get(stage_name, {})
+        now = datetime.utcnow()
         
         # Create new stage
         new_stage = GrowthStage(
             plant_id=self.id,
             stage_name=stage_name,
+            start_date=now,
             notes=notes,
             **{k: v for k, v in defaults.items() if k != 'duration_days'}
         )
         
         db.session.add(new_stage)
-        self.current_stage_id = new_stage.id
-        self.last_growth_update = datetime.utcnow()
+        self.current_stage = new_stage
+        self.last_growth_update = now
+        
+        # Schedule the automatic move to the following stage, if there is one
+        duration = defaults.get('duration_days')
+        if duration and GrowthStage.next_stage_name(stage_name):
+            self.next_stage_at = now + timedelta(days=duration)
+        else:
+            self.next_stage_at = None
         
         # Update target harvest date
         if stage_name == 'flowering':
             self.target_harvest_date = datetime.utcnow() + timedelta(days=70)
         
-        db.session.commit()
+        db.session.flush()
         return new_stage
     
+    def record_watering(self, watering):
+        """Update the cached last watering time and interval estimate for a newly added watering"""
+        from app.watering import observe_watering
+        if watering.timestamp is None:
+            db.session.flush()
+        observe_watering(self, watering.timestamp)
+    
+    def record_note(self, note):
+        """Point the cached latest note at a newly added note"""
+        if note.timestamp is None:
+            db.session.flush()
+        if self.last_note_at is None or note.timestamp >= self.last_note_at:
+            self.last_note = note
+            self.last_note_at = note.timestamp
+    
+    def record_growth_data(self, growth_data):
+        """Point the cached latest reading at a newly added growth reading"""
+        if growth_data.timestamp is None:
+            db.session.flush()
+        latest = self.latest_growth_data
+        if latest is None or growth_data.timestamp >= latest.timestamp:
+            self.latest_growth_data = growth_data
+    
+    def refresh_last_watering(self):
+        """Recompute the cached last watering time and interval estimate after an edit or delete"""
+        from app.watering import refit_watering_model
+        refit_watering_model(self)
+    
+    def refresh_last_note(self):
+        """Recompute the cached latest note from the notes table"""
+        self.last_note = self.notes.order_by(Note.timestamp.desc(), Note.id.desc()).first()
+        self.last_note_at = self.last_note.timestamp if self.last_note else None
+    
+    def refresh_latest_growth_data(self):
+        """Recompute the cached latest growth reading from the readings table"""
+        self.latest_growth_data = self.growth_data.order_by(
+            GrowthData.timestamp.desc(), GrowthData.id.desc()
+        ).first()
+    
+    def refresh_timeline_cache(self):
+        """Recompute every cached timeline pointer"""
+        self.refresh_last_watering()
+        self.refresh_last_note()
+        self.refresh_latest_growth_data()
+    
     def get_growth_summary(self):
         """Get a summary of plant growth data"""
-        latest_data = GrowthData.query.filter_by(plant_id=self.id).order_by(
-            GrowthData.timestamp.desc()
-        ).first()
+        latest_data = self.latest_growth_data
         
         current_stage = self.current_growth_stage()
         days_in_stage = None
@@ -142,51 +247,59 @@ class Plant(db.Model):
     
     def get_stage_recommendations(self):
         """Get recommendations based on current growth stage"""
+        alerts = self.get_stage_alerts()
+        if alerts is None:
+            return None
+        return [text for _, text in alerts]
+    
+    def get_stage_alerts(self):
+        """(key, recommendation) for each latest reading outside the current stage's ideal range"""
         stage = self.current_growth_stage()
         if not stage:
             return None
             
-        latest_data = GrowthData.query.filter_by(plant_id=self.id).order_by(
-            GrowthData.timestamp.desc()
-        ).first()
+        latest_data = self.latest_growth_data
         
-        recommendations = []
+        alerts = []
         
         if latest_data:
-            if latest_data.temperature < stage.ideal_temp_low:
-                recommendations.append(
-                    f"🌡️ Temperature is low ({latest_data.temperature}°C). "
-                    f"Increase to {stage.ideal_temp_low}-{stage.ideal_temp_high}°C"
-                )
-            elif latest_data.temperature > stage.ideal_temp_high:
-                recommendations.append(
-                    f"🌡️ Temperature is high ({latest_data.temperature}°C). "
-                    f"Decrease to {stage.ideal_temp_low}-{stage.ideal_temp_high}°C"
-                )
+            if latest_data.temperature is not None:
+                if latest_data.temperature < stage.ideal_temp_low:
+                    alerts.append(('temperature_low',
+                        f"🌡️ Temperature is low ({latest_data.temperature}°C). "
+                        f"Increase to {stage.ideal_temp_low}-{stage.ideal_temp_high}°C"
+                    ))
+                elif latest_data.temperature > stage.ideal_temp_high:
+                    alerts.append(('temperature_high',
+                        f"🌡️ Temperature is high ({latest_data.temperature}°C). "
+                        f"Decrease to {stage.ideal_temp_low}-{stage.ideal_temp_high}°C"
+                    ))
                 
-            if latest_data.humidity < stage.ideal_humidity_low:
-                recommendations.append(
-                    f"💧 Humidity is low ({latest_data.humidity}%). "
-                    f"Increase to {stage.ideal_humidity_low}-{stage.ideal_humidity_high}%"
-                )
-            elif latest_data.humidity > stage.ideal_humidity_high:
-                recommendations.append(
-                    f"💧 Humidity is high ({latest_data.humidity}%). "
-                    f"Decrease to {stage.ideal_humidity_low}-{stage.ideal_humidity_high}%"
-                )
+            if latest_data.humidity is not None:
+                if latest_data.humidity < stage.ideal_humidity_low:
+                    alerts.append(('humidity_low',
+                        f"💧 Humidity is low ({latest_data.humidity}%). "
+                        f"Increase to {stage.ideal_humidity_low}-{stage.ideal_humidity_high}%"
+                    ))
+                elif latest_data.humidity > stage.ideal_humidity_high:
+                    alerts.append(('humidity_high',
+                        f"💧 Humidity is high ({latest_data.humidity}%). "
+                        f"Decrease to {stage.ideal_humidity_low}-{stage.ideal_humidity_high}%"
+                    ))
                 
-            if latest_data.ph_level < stage.ideal_ph_low:
-                recommendations.append(
-                    f"⚗️ pH is low ({latest_data.ph_level}). "
-                    f"Adjust to {stage.ideal_ph_low}-{stage.ideal_ph_high}"
-                )
-            elif latest_data.ph_level > stage.ideal_ph_high:
-                recommendations.append(
-                    f"⚗️ pH is high ({latest_data.ph_level}). "
-                    f"Adjust to {stage.ideal_ph_low}-{stage.ideal_ph_high}"
-                )
+            if latest_data.ph_level is not None:
+                if latest_data.ph_level < stage.ideal_ph_low:
+                    alerts.append(('ph_low',
+                        f"⚗️ pH is low ({latest_data.ph_level}). "
+                        f"Adjust to {stage.ideal_ph_low}-{stage.ideal_ph_high}"
+                    ))
+                elif latest_data.ph_level > stage.ideal_ph_high:
+                    alerts.append(('ph_high',
+                        f"⚗️ pH is high ({latest_data.ph_level}). "
+                        f"Adjust to {stage.ideal_ph_low}-{stage.ideal_ph_high}"
+                    ))
         
-        return recommendations
+        return alerts
 
 class PlantPermission(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -202,6 +315,14 @@ class Note(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     plant_id = db.Column(db.Integer, db.ForeignKey('plant.id'))
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    __table_args__ = (db.Index('ix_note_plant_id_timestamp', 'plant_id', 'timestamp'),)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'content': self.content,
+            'timestamp': self.timestamp.isoformat()
+        }
 
 class Watering(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -210,6 +331,15 @@ class Watering(db.Model):
     nutrients = db.Column(db.Text)  # JSON string of nutrients
     plant_id = db.Column(db.Integer, db.ForeignKey('plant.id'))
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    __table_args__ = (db.Index('ix_watering_plant_id_timestamp', 'plant_id', 'timestamp'),)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'amount': self.amount,
+            'nutrients': self.nutrients,
+            'timestamp': self.timestamp.isoformat()
+        }
 
 class PlantImage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -219,6 +349,16 @@ class PlantImage(db.Model):
     is_profile = db.Column(db.Boolean, default=False)
     plant_id = db.Column(db.Integer, db.ForeignKey('plant.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    __table_args__ = (db.Index('ix_plant_image_plant_id_timestamp', 'plant_id', 'timestamp'),)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'description': self.description,
+            'is_profile': self.is_profile,
+            'timestamp': self.timestamp.isoformat()
+        }
 
 class Milestone(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -227,12 +367,21 @@ class Milestone(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     plant_id = db.Column(db.Integer, db.ForeignKey('plant.id'))
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    __table_args__ = (db.Index('ix_milestone_plant_id_timestamp', 'plant_id', 'timestamp'),)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'timestamp': self.timestamp.isoformat()
+        }
 
 class ChatMessage(db.Model):
     """Model for storing chat messages."""
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
     def to_dict(self):
@@ -242,16 +391,90 @@ class ChatMessage(db.Model):
             'content': self.content,
             'timestamp': self.timestamp.isoformat(),
             'user_id': self.user_id,
-            'username': self.user.username if self.user else None
+            'username': self.author.username if self.author else None
         }
 
+class OutboundMessage(db.Model):
+    """Signal message waiting to be delivered by the outbound worker"""
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(20), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # 'pending', 'sent' or 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    __table_args__ = (
+        db.Index('ix_outbound_message_status_next_attempt_at', 'status', 'next_attempt_at'),
+        db.Index('ix_outbound_message_recipient_sent_at', 'recipient', 'sent_at'),
+    )
+
+class NotificationAlert(db.Model):
+    """Alert waiting for its recipient's next digest, kept afterwards as the record of what was sent"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    plant_id = db.Column(db.Integer, db.ForeignKey('plant.id'), nullable=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'watering', 'stage' or 'readings'
+    alert_key = db.Column(db.String(64), nullable=False)  # identifies repeats of the same alert
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # 'pending', 'sent' or 'suppressed'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    user = db.relationship('User', backref=db.backref('notification_alerts', lazy='dynamic', cascade='all, delete-orphan'))
+    plant = db.relationship('Plant', backref=db.backref('notification_alerts', lazy='dynamic', cascade='all, delete-orphan'))
+    __table_args__ = (
+        db.Index('ix_notification_alert_status_user_id', 'status', 'user_id'),
+        db.Index('ix_notification_alert_user_id_sent_at', 'user_id', 'sent_at'),
+    )
+
+class InboundMessage(db.Model):
+    """Signal message received by the webhook, waiting for a command worker"""
+    id = db.Column(db.Integer, primary_key=True)
+    message_id = db.Column(db.String(128), unique=True, nullable=False)
+    sender = db.Column(db.String(20), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # 'pending', 'processing', 'done' or 'failed'
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime, nullable=True)  # when a worker started processing it
+    processed_at = db.Column(db.DateTime, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    __table_args__ = (db.Index('ix_inbound_message_sender_status', 'sender', 'status'),)
+
 class PlantFollower(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     plant_id = db.Column(db.Integer, db.ForeignKey('plant.id'), nullable=False)
     followed_at = db.Column(db.DateTime, default=datetime.utcnow)
     user = db.relationship('User', backref=db.backref('followed_plants', lazy='dynamic'))
-    __table_args__ = (db.UniqueConstraint('user_id', 'plant_id', name='_user_plant_follow_uc'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'plant_id', name='_user_plant_follow_uc'),
+        # Fan-out walks a plant's followers in id order
+        db.Index('ix_plant_follower_plant_id_id', 'plant_id', 'id'),
+    )
+
+class PlantEvent(db.Model):
+    """A change on a public plant's timeline, waiting to be fanned out to its followers"""
+    id = db.Column(db.Integer, primary_key=True)
+    plant_id = db.Column(db.Integer, db.ForeignKey('plant.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # 'watering', 'stage' or 'milestone'
+    body = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # 'pending' or 'done'
+    follower_cursor = db.Column(db.Integer, nullable=False, default=0)  # last PlantFollower.id reached
+    plant = db.relationship('Plant', backref=db.backref('events', lazy='dynamic', cascade='all, delete-orphan'))
+    __table_args__ = (db.Index('ix_plant_event_status_id', 'status', 'id'),)
+
+class FollowerUpdate(db.Model):
+    """Updates on a followed plant not yet in the follower's digest, coalesced into one row"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    plant_id = db.Column(db.Integer, db.ForeignKey('plant.id'), primary_key=True)
+    events = db.Column(db.Integer, nullable=False, default=0)
+    last_event_id = db.Column(db.Integer, nullable=True)
+    summary = db.Column(db.Text, nullable=True)  # body of the latest event
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    user = db.relationship('User', backref=db.backref('follower_updates', lazy='dynamic', cascade='all, delete-orphan'))
+    plant = db.relationship('Plant', backref=db.backref('follower_updates', lazy='dynamic', cascade='all, delete-orphan'))
 
 class GrowthStage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -267,6 +490,9 @@ class GrowthStage(db.Model):
     ideal_ph_low = db.Column(db.Float)
     ideal_ph_high = db.Column(db.Float)
     
+    # Stages a plant moves through automatically, in order
+    STAGE_ORDER = ('germination', 'seedling', 'vegetative', 'flowering')
+    
     @classmethod
     def get_default_stages(cls):
         return {
@@ -276,7 +502,8 @@ class GrowthStage(db.Model):
                 'ideal_humidity_low': 70,
                 'ideal_humidity_high': 90,
                 'ideal_ph_low': 6.0,
-                'ideal_ph_high': 7.0
+                'ideal_ph_high': 7.0,
+                'duration_days': 7
             },
             'seedling': {
                 'ideal_temp_low': 22,
@@ -284,7 +511,8 @@ class GrowthStage(db.Model):
                 'ideal_humidity_low': 60,
                 'ideal_humidity_high': 80,
                 'ideal_ph_low': 6.0,
-                'ideal_ph_high': 7.0
+                'ideal_ph_high': 7.0,
+                'duration_days': 14
             },
             'vegetative': {
                 'ideal_temp_low': 24,
@@ -292,7 +520,8 @@ class GrowthStage(db.Model):
                 'ideal_humidity_low': 50,
                 'ideal_humidity_high': 70,
                 'ideal_ph_low': 6.0,
-                'ideal_ph_high': 7.0
+                'ideal_ph_high': 7.0,
+                'duration_days': 28
             },
             'flowering': {
                 'ideal_temp_low': 26,
@@ -300,9 +529,18 @@ class GrowthStage(db.Model):
                 'ideal_humidity_low': 40,
                 'ideal_humidity_high': 60,
                 'ideal_ph_low': 6.0,
-                'ideal_ph_high': 7.0
+                'ideal_ph_high': 7.0,
+                'duration_days': 56
             }
         }
+    
+    @classmethod
+    def next_stage_name(cls, stage_name):
+        """The stage that follows stage_name, or None after the last one"""
+        if stage_name not in cls.STAGE_ORDER:
+            return None
+        index = cls.STAGE_ORDER.index(stage_name) + 1
+        return cls.STAGE_ORDER[index] if index < len(cls.STAGE_ORDER) else None
 
 class GrowthData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -314,6 +552,103 @@ class GrowthData(db.Model):
     health_score = db.Column(db.Float)
     growth_rate = db.Column(db.Float)
     height = db.Column(db.Float)
+    __table_args__ = (
+        db.Index('ix_growth_data_plant_id_timestamp', 'plant_id', 'timestamp'),
+        # Rollups re-read the latest readings and a plant's readings above the watermark
+        db.Index('ix_growth_data_timestamp', 'timestamp'),
+        db.Index('ix_growth_data_plant_id_id', 'plant_id', 'id'),
+    )
+
+    @staticmethod
+    def score_conditions(stage, temperature=None, humidity=None, ph_level=None):
+        """Score readings taken during stage against its ideal ranges"""
+        score = 100
+        
+        if stage:
+            # Temperature check
+            if temperature:
+                if temperature < stage.ideal_temp_low:
+                    score -= 10
+                elif temperature > stage.ideal_temp_high:
+                    score -= 10
+                    
+            # Humidity check
+            if humidity:
+                if humidity < stage.ideal_humidity_low:
+                    score -= 10
+                elif humidity > stage.ideal_humidity_high:
+                    score -= 10
+                    
+            # pH check
+            if ph_level:
+                if ph_level < stage.ideal_ph_low:
+                    score -= 10
+                elif ph_level > stage.ideal_ph_high:
+                    score -= 10
+        
+        return max(0, score)  # Ensure score doesn't go below 0
+
+    def calculate_health_score(self):
+        """Calculate plant health score based on environmental factors"""
+        self.health_score = self.score_conditions(
+            self.plant.current_growth_stage(),
+            self.temperature,
+            self.humidity,
+            self.ph_level
+        )
+        return self.health_score
+
+    def calculate_growth_rate(self):
+        """Calculate growth rate based on previous measurements"""
+        timestamp = self.timestamp or datetime.utcnow()
+        previous = GrowthData.query.filter(
+            GrowthData.plant_id == self.plant_id,
+            GrowthData.timestamp < timestamp,
+            GrowthData.height.isnot(None)
+        ).order_by(GrowthData.timestamp.desc()).first()
+        
+        if previous and self.height:
+            days = (timestamp - previous.timestamp).days
+            if days > 0:
+                self.growth_rate = (self.height - previous.height) / days
+                return self.growth_rate
+        
+        return None
+
+class GrowthDataRollup(db.Model):
+    """Per-plant aggregates of growth readings over one hour or one day"""
+    id = db.Column(db.Integer, primary_key=True)
+    plant_id = db.Column(db.Integer, db.ForeignKey('plant.id'), nullable=False)
+    period = db.Column(db.String(4), nullable=False)  # 'hour' or 'day'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    readings = db.Column(db.Integer, nullable=False, default=0)
+    temperature_count = db.Column(db.Integer, nullable=False, default=0)
+    temperature_sum = db.Column(db.Float)
+    temperature_min = db.Column(db.Float)
+    temperature_max = db.Column(db.Float)
+    humidity_count = db.Column(db.Integer, nullable=False, default=0)
+    humidity_sum = db.Column(db.Float)
+    humidity_min = db.Column(db.Float)
+    humidity_max = db.Column(db.Float)
+    ph_level_count = db.Column(db.Integer, nullable=False, default=0)
+    ph_level_sum = db.Column(db.Float)
+    ph_level_min = db.Column(db.Float)
+    ph_level_max = db.Column(db.Float)
+    height_count = db.Column(db.Integer, nullable=False, default=0)
+    height_sum = db.Column(db.Float)
+    height_min = db.Column(db.Float)
+    height_max = db.Column(db.Float)
+    health_score_count = db.Column(db.Integer, nullable=False, default=0)
+    health_score_sum = db.Column(db.Float)
+    health_score_min = db.Column(db.Float)
+    health_score_max = db.Column(db.Float)
+    __table_args__ = (db.UniqueConstraint('plant_id', 'period', 'bucket_start',
+                                          name='uq_growth_data_rollup_bucket'),)
+
+class RollupWatermark(db.Model):
+    """Highest source row id already folded into the rollups"""
+    name = db.Column(db.String(50), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
 
 class Strain(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -325,14 +660,45 @@ class Strain(db.Model):
     yield_outdoor = db.Column(db.String(64))
     height_indoor = db.Column(db.String(64))
     height_outdoor = db.Column(db.String(64))
+    type = db.Column(db.String(20))  # indica, sativa, hybrid
+    
+    # Growing characteristics
+    ideal_temp_low = db.Column(db.Float)
+    ideal_temp_high = db.Column(db.Float)
+    ideal_humidity_low = db.Column(db.Float)
+    ideal_humidity_high = db.Column(db.Float)
+    height_low = db.Column(db.Float)  # typical height range in cm
+    height_high = db.Column(db.Float)
+    
+    # Community counters, maintained incrementally by app.strain_stats
+    total_ratings = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    total_grows = db.Column(db.Integer, nullable=False, default=0)  # archived plants of this strain
+    successful_grows = db.Column(db.Integer, nullable=False, default=0)  # of which harvested
+    growth_days_total = db.Column(db.Integer, nullable=False, default=0)  # start to harvest, summed
+    
     growing_tips = db.relationship('GrowingTip', backref='strain', lazy='dynamic')
     ratings = db.relationship('StrainRating', backref='strain', lazy='dynamic')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    @property
+    def rating(self):
+        """Average user rating"""
+        return self.rating_sum / self.total_ratings if self.total_ratings else 0
+
+    @property
+    def success_rate(self):
+        """Percentage of completed grows that were harvested"""
+        return self.successful_grows / self.total_grows * 100 if self.total_grows else 0
+
+    @property
+    def average_growth_time(self):
+        """Average days from start to harvest"""
+        return self.growth_days_total / self.successful_grows if self.successful_grows else None
+
     def average_rating(self):
-        ratings = [r.rating for r in self.ratings]
-        return sum(ratings) / len(ratings) if ratings else 0
+        return self.rating
 
     def get_tips_by_stage(self, stage_name):
         return self.growing_tips.filter_by(growth_stage=stage_name).all()
@@ -354,6 +720,7 @@ class GrowingTip(db.Model):
     content = db.Column(db.Text, nullable=False)
     upvotes = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    author = db.relationship('User', backref='growing_tips')
 
 class Achievement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -370,3 +737,76 @@ class UserAchievement(db.Model):
     achievement_id = db.Column(db.Integer, db.ForeignKey('achievement.id'), nullable=False)
     earned_at = db.Column(db.DateTime, default=datetime.utcnow)
     __table_args__ = (db.UniqueConstraint('user_id', 'achievement_id', name='_user_achievement_uc'),)
+    achievement = db.relationship('Achievement')
+
+class UserProgress(db.Model):
+    """Per-user activity counters that achievement requirements are checked against"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    waterings = db.Column(db.Integer, nullable=False, default=0)
+    harvests = db.Column(db.Integer, nullable=False, default=0)
+    unique_strains = db.Column(db.Integer, nullable=False, default=0)
+    notes = db.Column(db.Integer, nullable=False, default=0)
+    growth_readings = db.Column(db.Integer, nullable=False, default=0)
+    user = db.relationship('User', backref=db.backref('progress', uselist=False, cascade='all, delete-orphan'))
+
+class LeaderboardEntry(db.Model):
+    """One precomputed row of a community ranking, replaced on every refresh"""
+    board = db.Column(db.String(20), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    username = db.Column(db.String(64))
+    value = db.Column(db.Float, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'rank': self.rank,
+            'user_id': self.user_id,
+            'username': self.username,
+            'value': self.value
+        }
+
+class SchedulerLease(db.Model):
+    """Which process currently runs the scheduled jobs, and until when"""
+    name = db.Column(db.String(64), primary_key=True)
+    holder = db.Column(db.String(128), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'holder': self.holder,
+            'acquired_at': self.acquired_at.isoformat(),
+            'expires_at': self.expires_at.isoformat()
+        }
+
+class JobRun(db.Model):
+    """One execution of a scheduled job, for monitoring"""
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(64), nullable=False)
+    holder = db.Column(db.String(128))
+    status = db.Column(db.String(10), nullable=False, default='running')  # running, succeeded, failed
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    rows_processed = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    __table_args__ = (db.Index('ix_job_run_job_id_started_at', 'job_id', 'started_at'),)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_id': self.job_id,
+            'holder': self.holder,
+            'status': self.status,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'rows_processed': self.rows_processed,
+            'error': self.error
+        }
+
+class UserStrainHarvest(db.Model):
+    """Harvested plants per user and strain, so unique_strains never needs a DISTINCT scan"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    strain = db.Column(db.String(64), primary_key=True)
+    harvests = db.Column(db.Integer, nullable=False, default=0)
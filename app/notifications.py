@@ -0,0 +1,199 @@
+"""Per-recipient notification digests.
+
+Alerts are not sent as they happen. The watering check and automatic stage
+transitions queue a NotificationAlert for the plant's owner; readings
+outside the current stage's ideal range (Plant.get_stage_alerts) and the
+coalesced updates of followed plants (see app.followers) are collected
+when a digest is built. send_digests, run by the scheduler, folds
+everything for a recipient into a single Signal message at most once per
+NOTIFICATION_DIGEST_HOURS, holding it back during the user's quiet hours
+and leaving out the kinds they switched off.
+
+Sent alerts stay in the table as the log of what went out: an alert for the
+same plant, kind and key is suppressed for NOTIFICATION_REPEAT_HOURS.
+"""
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from app.extensions import db
+from app.models import NotificationAlert, Plant, User
+from app.outbox import enqueue_message
+from app.followers import follower_alerts, mark_delivered
+
+# Alert kinds in digest order, with their section headings
+KINDS = {
+    'watering': '💧 Watering',
+    'stage': '🌱 Growth stages',
+    'readings': '⚠️ Conditions',
+    'following': '👀 Plants you follow',
+}
+
+
+def wants(user, kind):
+    """Whether the user can receive alerts of this kind and has not switched them off"""
+    if not user.phone_number or not user.notifications_enabled:
+        return False
+    return (user.notification_preferences or {}).get(kind, True) is not False
+
+
+def queue_alert(user, plant, kind, key, body):
+    """Add an alert to the user's next digest; the caller commits.
+
+    Returns None without queueing when the user does not want it.
+    """
+    if not wants(user, kind):
+        return None
+    alert = NotificationAlert(
+        user_id=user.id,
+        plant_id=plant.id if plant else None,
+        kind=kind,
+        alert_key=str(key)[:64],
+        body=body
+    )
+    db.session.add(alert)
+    return alert
+
+
+def in_quiet_hours(user, now):
+    """Whether now (UTC) falls within the user's quiet hours, given in their local time"""
+    preferences = user.notification_preferences or {}
+    quiet = preferences.get('quiet_hours')
+    if not quiet:
+        return False
+    start, end = quiet
+
+    hour = now.hour
+    if preferences.get('timezone'):
+        try:
+            hour = now.replace(tzinfo=timezone.utc).astimezone(ZoneInfo(preferences['timezone'])).hour
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def format_digest(alerts):
+    """One message listing the alerts grouped by kind"""
+    lines = ['🌱 Your grow digest']
+    for kind, heading in KINDS.items():
+        bodies = [alert.body for alert in alerts if alert.kind == kind]
+        if bodies:
+            lines.append(f'\n{heading}:')
+            lines.extend(f'• {body}' for body in bodies)
+    return '\n'.join(lines)
+
+
+def reading_alerts(user_ids):
+    """Unsaved 'readings' alerts for the latest out-of-range reading of each active plant"""
+    plants = Plant.query.options(
+        joinedload(Plant.current_stage),
+        joinedload(Plant.latest_growth_data)
+    ).filter(
+        Plant.owner_id.in_(user_ids),
+        Plant.is_archived == False,
+        Plant.current_stage_id.isnot(None),
+        Plant.latest_growth_data_id.isnot(None)
+    ).order_by(Plant.id).all()
+
+    alerts = []
+    for plant in plants:
+        for key, text in plant.get_stage_alerts() or []:
+            alerts.append(NotificationAlert(
+                user_id=plant.owner_id,
+                plant_id=plant.id,
+                kind='readings',
+                alert_key=key,
+                body=f'{plant.name}: {text}'
+            ))
+    return alerts
+
+
+def send_digests(now=None):
+    """Queue one digest message per recipient whose window is open; commits.
+
+    Returns counts of digests queued, alerts sent in them and alerts
+    suppressed as opted out or repeated.
+    """
+    config = current_app.config
+    now = now or datetime.utcnow()
+    window = timedelta(hours=config.get('NOTIFICATION_DIGEST_HOURS', 24))
+    repeat_since = now - timedelta(hours=config.get('NOTIFICATION_REPEAT_HOURS', 72))
+    stats = {'digests': 0, 'alerts': 0, 'suppressed': 0}
+
+    pending_users = db.select(NotificationAlert.user_id).where(NotificationAlert.status == 'pending')
+    users = User.query.filter(db.or_(
+        db.and_(User.phone_number.isnot(None), User.notifications_enabled == True),
+        User.id.in_(pending_users)
+    )).all()
+    last_digest = dict(db.session.query(
+        NotificationAlert.user_id, func.max(NotificationAlert.sent_at)
+    ).filter(NotificationAlert.status == 'sent').group_by(NotificationAlert.user_id))
+
+    recipients = {}
+    for user in users:
+        last = last_digest.get(user.id)
+        if (last is None or now - last >= window) and not in_quiet_hours(user, now):
+            recipients[user.id] = user
+
+    if recipients:
+        alerts = {user_id: [] for user_id in recipients}
+        for alert in NotificationAlert.query.filter(
+            NotificationAlert.status == 'pending',
+            NotificationAlert.user_id.in_(recipients.keys())
+        ).order_by(NotificationAlert.id):
+            alerts[alert.user_id].append(alert)
+        for alert in reading_alerts(list(recipients.keys())) + follower_alerts(list(recipients.keys())):
+            alerts[alert.user_id].append(alert)
+
+        recently_sent = set(db.session.query(
+            NotificationAlert.user_id, NotificationAlert.plant_id,
+            NotificationAlert.kind, NotificationAlert.alert_key
+        ).filter(
+            NotificationAlert.user_id.in_(recipients.keys()),
+            NotificationAlert.status == 'sent',
+            NotificationAlert.sent_at >= repeat_since
+        ))
+
+        for user_id, user_alerts in alerts.items():
+            user = recipients[user_id]
+            included = []
+            for alert in user_alerts:
+                key = (alert.user_id, alert.plant_id, alert.kind, alert.alert_key)
+                if not wants(user, alert.kind) or key in recently_sent:
+                    # Collected alerts are only recorded once they are sent
+                    if alert.id is not None:
+                        alert.status = 'suppressed'
+                        stats['suppressed'] += 1
+                    continue
+                recently_sent.add(key)
+                included.append(alert)
+            if not included:
+                continue
+
+            enqueue_message(user.phone_number, format_digest(included))
+            for alert in included:
+                alert.status = 'sent'
+                alert.sent_at = now
+                db.session.add(alert)
+            mark_delivered([alert for alert in included if alert.kind == 'following'])
+            stats['digests'] += 1
+            stats['alerts'] += len(included)
+
+    # Whatever the remaining users have pending can never be delivered
+    stats['suppressed'] += db.session.execute(db.update(NotificationAlert).where(
+        NotificationAlert.status == 'pending',
+        NotificationAlert.user_id.in_(
+            db.select(User.id).where(db.or_(User.phone_number.is_(None), User.notifications_enabled == False))
+        )
+    ).values(status='suppressed')).rowcount
+
+    # The log only has to reach back as far as repeats are suppressed
+    db.session.execute(db.delete(NotificationAlert).where(
+        NotificationAlert.status != 'pending',
+        NotificationAlert.created_at < now - timedelta(days=config.get('NOTIFICATION_LOG_DAYS', 30))
+    ))
+    db.session.commit()
+    return stats
@@ -0,0 +1,94 @@
+"""Coalesced writes of User.last_seen and User.is_online.
+
+Socket connects, disconnects and messages only record the user's latest
+state in memory. A background thread writes whatever changed every
+ONLINE_STATUS_FLUSH_INTERVAL seconds with one executemany UPDATE, so a
+reconnect storm costs one row write per user per interval instead of a
+transaction per event.
+"""
+import atexit
+import threading
+import time
+from datetime import datetime
+from flask import current_app, has_app_context
+from app.extensions import db
+from app.models import User
+
+
+class OnlineStatusTracker:
+    """Latest (last_seen, is_online) per user, waiting to be written"""
+
+    def __init__(self, app, flush_interval=30.0):
+        self.app = app
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self.recorded = 0
+        self.written = 0
+        self.flushes = 0
+
+    def record(self, user_id, is_online=True, seen_at=None):
+        """Remember the user's state; later calls for the same user replace it."""
+        with self._lock:
+            self._pending[user_id] = (seen_at or datetime.utcnow(), is_online)
+            self.recorded += 1
+        self._ensure_flusher()
+
+    def status(self, user_id):
+        """The not yet written (last_seen, is_online) of a user, or None"""
+        with self._lock:
+            return self._pending.get(user_id)
+
+    def _ensure_flusher(self):
+        if self.flush_interval and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name='online-status-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write every pending state with a single batched UPDATE."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            rows = [
+                {'id': user_id, 'last_seen': last_seen, 'is_online': is_online}
+                for user_id, (last_seen, is_online) in pending.items()
+            ]
+            with self.app.app_context():
+                try:
+                    db.session.execute(db.update(User), rows)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error('Online status flush failed: %s', e)
+                    # Keep the states for the next flush; states recorded
+                    # since the swap are newer and win
+                    with self._lock:
+                        pending.update(self._pending)
+                        self._pending = pending
+                    return 0
+
+            self.flushes += 1
+            self.written += len(rows)
+            return len(rows)
+
+
+def init_online_status(app):
+    tracker = OnlineStatusTracker(app, app.config.get('ONLINE_STATUS_FLUSH_INTERVAL', 30))
+    app.extensions['online_status'] = tracker
+    # Do not lose the last states on a clean shutdown
+    atexit.register(tracker.flush)
+
+
+def online_status_tracker():
+    """The tracker of the current app, or None outside one"""
+    return current_app.extensions.get('online_status') if has_app_context() else None
@@ -0,0 +1,191 @@
+"""Persisted outbound Signal message queue and its delivery worker.
+
+Messages are written to OutboundMessage by enqueue_message and sent later by
+deliver_pending, which the scheduler runs on an interval. Due messages for
+the same recipient are coalesced into one request, each recipient is sent
+at most once per SIGNAL_RECIPIENT_INTERVAL seconds, and failed sends are
+retried with exponential backoff.
+
+Workers claim a recipient's messages with a conditional UPDATE that pushes
+their next_attempt_at SIGNAL_DELIVERY_CLAIM_TIMEOUT seconds ahead, so two
+workers never send the same message and the messages of a worker that died
+mid-send become due again. Sent and failed messages are pruned after
+SIGNAL_OUTBOX_RETENTION_DAYS.
+"""
+import threading
+from datetime import datetime, timedelta
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+from sqlalchemy import func
+from app.extensions import db
+from app.models import OutboundMessage
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class DeliveryError(Exception):
+    """Raised when the Signal REST bridge does not accept a message."""
+
+    def __init__(self, message, permanent=False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+def http_session():
+    """Shared requests session so deliveries reuse pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=current_app.config.get('SIGNAL_POOL_SIZE', 10))
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+    return _session
+
+
+def enqueue_message(recipient, body, send_after=None):
+    """Queue a message for delivery; the caller commits."""
+    message = OutboundMessage(
+        recipient=recipient,
+        body=body,
+        next_attempt_at=send_after or datetime.utcnow()
+    )
+    db.session.add(message)
+    return message
+
+
+def post_message(api_url, sender, recipient, body, timeout):
+    """Send one message through the Signal REST bridge."""
+    try:
+        response = http_session().post(
+            f"{api_url.rstrip('/')}/v2/send",
+            json={'message': body, 'number': sender, 'recipients': [recipient]},
+            timeout=timeout
+        )
+    except requests.RequestException as e:
+        raise DeliveryError(str(e))
+
+    if response.status_code >= 400:
+        # Client errors other than rate limiting will not succeed on retry
+        permanent = response.status_code < 500 and response.status_code != 429
+        raise DeliveryError(f'HTTP {response.status_code}: {response.text[:200]}', permanent)
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt after `attempts` failed sends."""
+    config = current_app.config
+    seconds = config['SIGNAL_RETRY_BACKOFF'] * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, config['SIGNAL_RETRY_BACKOFF_MAX']))
+
+
+def claim_messages(messages, now):
+    """Claim due messages for sending; commits.
+
+    Returns False, claiming none, when another worker got to any of them first.
+    """
+    ids = [message.id for message in messages]
+    claimed = db.session.execute(db.update(OutboundMessage).where(
+        OutboundMessage.id.in_(ids),
+        OutboundMessage.status == 'pending',
+        OutboundMessage.next_attempt_at <= now
+    ).values(
+        next_attempt_at=now + timedelta(seconds=current_app.config.get('SIGNAL_DELIVERY_CLAIM_TIMEOUT', 120))
+    )).rowcount
+    if claimed != len(ids):
+        db.session.rollback()
+        return False
+    db.session.commit()
+    return True
+
+
+def prune_messages(now):
+    """Delete sent and failed messages past their retention; the caller commits."""
+    cutoff = now - timedelta(days=current_app.config.get('SIGNAL_OUTBOX_RETENTION_DAYS', 7))
+    return db.session.execute(db.delete(OutboundMessage).where(db.or_(
+        db.and_(OutboundMessage.status == 'sent', OutboundMessage.sent_at < cutoff),
+        db.and_(OutboundMessage.status == 'failed', OutboundMessage.created_at < cutoff)
+    ))).rowcount
+
+
+def deliver_pending(now=None, limit=None):
+    """Send due messages, one coalesced request per recipient.
+
+    Claims and commits per recipient so a crash never resends delivered
+    messages. Returns counts of messages sent, deferred by the rate limit,
+    scheduled for retry and failed, plus the number of requests made.
+    """
+    config = current_app.config
+    stats = {'sent': 0, 'requests': 0, 'deferred': 0, 'retried': 0, 'failed': 0}
+    if not config.get('SIGNAL_BOT_NUMBER') or not config.get('SIGNAL_API_URL'):
+        return stats
+
+    now = now or datetime.utcnow()
+    if prune_messages(now):
+        db.session.commit()
+    interval = timedelta(seconds=config['SIGNAL_RECIPIENT_INTERVAL'])
+    due = OutboundMessage.query.filter(
+        OutboundMessage.status == 'pending',
+        OutboundMessage.next_attempt_at <= now
+    ).order_by(OutboundMessage.id).limit(limit or config['SIGNAL_DELIVERY_BATCH']).all()
+
+    by_recipient = {}
+    for message in due:
+        by_recipient.setdefault(message.recipient, []).append(message)
+    if not by_recipient:
+        return stats
+
+    last_sent = dict(db.session.query(
+        OutboundMessage.recipient, func.max(OutboundMessage.sent_at)
+    ).filter(
+        OutboundMessage.recipient.in_(by_recipient.keys()),
+        OutboundMessage.status == 'sent'
+    ).group_by(OutboundMessage.recipient))
+
+    for recipient, messages in by_recipient.items():
+        if not claim_messages(messages, now):
+            continue
+        allowed_at = last_sent[recipient] + interval if last_sent.get(recipient) else now
+        if allowed_at > now:
+            batch, held = [], messages
+        else:
+            batch = messages[:config['SIGNAL_COALESCE_LIMIT']]
+            held = messages[len(batch):]
+            allowed_at = now + interval
+        for message in held:
+            message.next_attempt_at = allowed_at
+        stats['deferred'] += len(held)
+
+        if batch:
+            stats['requests'] += 1
+            try:
+                post_message(
+                    config['SIGNAL_API_URL'],
+                    config['SIGNAL_BOT_NUMBER'],
+                    recipient,
+                    '\n\n'.join(message.body for message in batch),
+                    config['SIGNAL_SEND_TIMEOUT']
+                )
+            except DeliveryError as e:
+                current_app.logger.warning('Signal delivery to %s failed: %s', recipient, e)
+                for message in batch:
+                    message.attempts += 1
+                    message.last_error = str(e)
+                    if e.permanent or message.attempts >= config['SIGNAL_MAX_ATTEMPTS']:
+                        message.status = 'failed'
+                        stats['failed'] += 1
+                    else:
+                        message.next_attempt_at = now + retry_delay(message.attempts)
+                        stats['retried'] += 1
+            else:
+                for message in batch:
+                    message.attempts += 1
+                    message.status = 'sent'
+                    message.sent_at = now
+                    message.last_error = None
+                stats['sent'] += len(batch)
+
+        db.session.commit()
+
+    return stats
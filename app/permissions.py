@@ -0,0 +1,90 @@
+"""Per-request resolution of a user's rights on plants."""
+from flask import g
+from flask_login import current_user
+from app.extensions import db
+from app.models import Plant, PlantPermission
+
+
+class PlantAccess:
+    """Effective rights of one user on one plant."""
+
+    def __init__(self, is_owner=False, permission=None):
+        self.is_owner = is_owner
+        self.can_view = is_owner or permission is not None
+        self.can_edit = is_owner or bool(permission and permission.can_edit)
+        self.can_water = is_owner or bool(permission and permission.can_water)
+        self.can_add_notes = is_owner or bool(permission and permission.can_add_notes)
+
+
+def _access_cache():
+    if 'plant_access' not in g:
+        g.plant_access = {}
+    return g.plant_access
+
+
+def remember_access(user, plant, permission):
+    """Store the rights for a plant whose permission row is already loaded."""
+    access = PlantAccess(is_owner=plant.owner_id == user.id, permission=permission)
+    _access_cache()[(user.id, plant.id)] = access
+    return access
+
+
+def resolve_access(plant, user=None):
+    """Return the PlantAccess of user (default: current_user) on plant.
+
+    The result is memoized on flask.g, so repeated checks within a request
+    cost at most one PlantPermission lookup per plant.
+    """
+    user = user or current_user
+    cache = _access_cache()
+    key = (user.id, plant.id)
+    if key not in cache:
+        permission = None
+        if plant.owner_id != user.id:
+            permission = PlantPermission.query.filter_by(plant_id=plant.id, user_id=user.id).first()
+        remember_access(user, plant, permission)
+    return cache[key]
+
+
+def resolve_access_bulk(plants, user=None):
+    """Resolve rights for many plants with a single PlantPermission query."""
+    user = user or current_user
+    cache = _access_cache()
+    missing = [plant for plant in plants
+               if (user.id, plant.id) not in cache and plant.owner_id != user.id]
+
+    permissions = {}
+    if missing:
+        rows = PlantPermission.query.filter(
+            PlantPermission.user_id == user.id,
+            PlantPermission.plant_id.in_([plant.id for plant in missing])
+        ).all()
+        permissions = {row.plant_id: row for row in rows}
+
+    for plant in plants:
+        if (user.id, plant.id) not in cache:
+            remember_access(user, plant, permissions.get(plant.id))
+    return {plant.id: cache[(user.id, plant.id)] for plant in plants}
+
+
+def load_plants_with_access(plant_ids, user=None):
+    """Load plants by id with the user's rights in one query.
+
+    Returns {plant_id: (plant, access)}; ids that do not exist are absent.
+    """
+    user = user or current_user
+    rows = db.session.execute(
+        db.select(Plant, PlantPermission).outerjoin(
+            PlantPermission,
+            db.and_(PlantPermission.plant_id == Plant.id, PlantPermission.user_id == user.id)
+        ).where(Plant.id.in_(set(plant_ids)))
+    ).all()
+    return {plant.id: (plant, remember_access(user, plant, permission)) for plant, permission in rows}
+
+
+def invalidate_access(plant_id, user_id=None):
+    """Drop memoized rights for a plant, optionally only for one user."""
+    cache = _access_cache()
+    for key in list(cache):
+        if key[1] == plant_id and (user_id is None or key[0] == user_id):
+            del cache[key]
@@ -0,0 +1,125 @@
+"""Resolve plant names typed in Signal commands to the user's plants.
+
+Each owner's plant names are loaded once into an in-process cache, sorted by
+lowercase name, so a lookup is a binary search that accepts any unique
+prefix ("blue" for "Blue Dream") without touching the database. Entries are
+dropped whenever one of the owner's plants is created, renamed, archived,
+moved or deleted, and expire after PLANT_NAME_CACHE_TTL seconds so changes
+made by other processes are picked up too.
+"""
+import threading
+import time
+from bisect import bisect_left
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from app.extensions import db
+from app.models import Plant
+
+WATCHED_ATTRIBUTES = ('name', 'is_archived', 'owner_id')
+
+
+class PlantNameResolver:
+    """Per-owner cache of (lowercase name, is_archived, plant id, name) tuples"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def names(self, owner_id):
+        with self._lock:
+            entry = self._entries.get(owner_id)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        rows = db.session.query(Plant.id, Plant.name, Plant.is_archived).filter(
+            Plant.owner_id == owner_id
+        ).all()
+        names = sorted((name.lower(), bool(is_archived), plant_id, name) for plant_id, name, is_archived in rows)
+        with self._lock:
+            self._entries[owner_id] = (time.monotonic(), names)
+        return names
+
+    def invalidate(self, owner_id=None):
+        with self._lock:
+            if owner_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(owner_id, None)
+
+    def lookup(self, owner_id, text):
+        """Return (plant_id, None) for text, or (None, error message).
+
+        An exact (case-insensitive) name wins over prefixes, and active
+        plants win over archived ones. Several plants with the same exact
+        name resolve to the newest.
+        """
+        key = text.strip().lower()
+        if not key:
+            return None, "❌ No plant name given"
+
+        names = self.names(owner_id)
+        matches = []
+        index = bisect_left(names, (key,))
+        while index < len(names) and names[index][0].startswith(key):
+            matches.append(names[index])
+            index += 1
+
+        exact = [entry for entry in matches if entry[0] == key]
+        candidates = exact or matches
+        candidates = [entry for entry in candidates if not entry[1]] or candidates
+        if not candidates:
+            return None, f"❌ Plant '{text.strip()}' not found"
+        if not exact and len({entry[0] for entry in candidates}) > 1:
+            options = ', '.join(entry[3] for entry in candidates[:5])
+            return None, f"❌ '{text.strip()}' matches several plants: {options}"
+        return max(entry[2] for entry in candidates), None
+
+    def resolve(self, owner_id, text):
+        """Return (plant, None) for text, or (None, error message)"""
+        plant_id, error = self.lookup(owner_id, text)
+        plant = db.session.get(Plant, plant_id) if plant_id is not None else None
+        if plant_id is not None and (plant is None or plant.owner_id != owner_id):
+            # Changed by another process since the names were cached; reload once
+            self.invalidate(owner_id)
+            plant_id, error = self.lookup(owner_id, text)
+            plant = db.session.get(Plant, plant_id) if plant_id is not None else None
+        if plant is None:
+            return None, error or f"❌ Plant '{text.strip()}' not found"
+        return plant, None
+
+
+def init_plant_names(app):
+    app.extensions['plant_names'] = PlantNameResolver(app.config.get('PLANT_NAME_CACHE_TTL', 300))
+
+
+def plant_name_resolver():
+    """The resolver of the current app"""
+    return current_app.extensions['plant_names']
+
+
+def _invalidate(owner_ids):
+    if not has_app_context() or 'plant_names' not in current_app.extensions:
+        return
+    for owner_id in owner_ids:
+        if owner_id is not None:
+            plant_name_resolver().invalidate(owner_id)
+
+
+@event.listens_for(Plant, 'after_insert')
+@event.listens_for(Plant, 'after_delete')
+def _plant_added_or_removed(mapper, connection, target):
+    _invalidate([target.owner_id])
+
+
+@event.listens_for(Plant, 'after_update')
+def _plant_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in WATCHED_ATTRIBUTES):
+        # A moved plant also leaves its previous owner's names
+        previous = state.attrs.owner_id.history.deleted or ()
+        _invalidate([target.owner_id, *previous])
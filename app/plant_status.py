@@ -0,0 +1,163 @@
+"""Batched, cached rendering of the Signal status text for plants.
+
+Everything a status needs (current stage, latest reading, latest note) is
+loaded for all requested plants in one joined query. The rendered text is
+cached per plant until the first day counter in it ("Age: 12 days") would
+change, or until a write to the plant or its timeline invalidates it.
+"""
+import threading
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload
+from app.models import Plant, Note, Watering, GrowthData, GrowthStage
+
+
+class PlantStatusCache:
+    """Rendered status text per plant id, each valid until a given time"""
+
+    def __init__(self, ttl=600):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, plant_id, now):
+        with self._lock:
+            entry = self._entries.get(plant_id)
+        if entry and now < entry[0]:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, plant_id, text, valid_until):
+        with self._lock:
+            self._entries[plant_id] = (valid_until, text)
+
+    def invalidate(self, plant_id=None):
+        with self._lock:
+            if plant_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(plant_id, None)
+
+
+def init_plant_status(app):
+    app.extensions['plant_status'] = PlantStatusCache(app.config.get('PLANT_STATUS_CACHE_TTL', 600))
+
+
+def plant_status_cache():
+    """The status cache of the current app"""
+    return current_app.extensions['plant_status']
+
+
+def _days_since(since, now):
+    """Whole days since `since` and the moment that count next changes"""
+    days = (now - since).days
+    return days, since + timedelta(days=days + 1)
+
+
+def render_status(plant, now):
+    """Render a plant's status; returns (text, valid_until).
+
+    Expects current_stage, latest_growth_data and last_note to be loaded.
+    """
+    growth_summary = plant.get_growth_summary()
+    changes = []
+
+    age_days, next_change = _days_since(plant.start_date, now)
+    changes.append(next_change)
+    status = [
+        f"🌱 {plant.name} ({plant.strain})",
+        f"Age: {age_days} days"
+    ]
+
+    # Growth stage info
+    stage = plant.current_stage
+    if stage:
+        days_in_stage, next_change = _days_since(stage.start_date, now)
+        changes.append(next_change)
+        status.extend([
+            f"\n📈 Growth Stage: {stage.stage_name}",
+            f"Days in stage: {days_in_stage}"
+        ])
+
+        target = plant.target_harvest_date
+        if target:
+            days_to_harvest = (target - now).days
+            if days_to_harvest > 0:
+                status.append(f"Estimated harvest in: {days_to_harvest} days")
+            changes.append(max(target - timedelta(days=days_to_harvest), now + timedelta(seconds=1)))
+
+    # Growth metrics
+    if growth_summary['height']:
+        status.append(f"\n📏 Height: {growth_summary['height']} cm")
+    if growth_summary['growth_rate']:
+        status.append(f"Growth rate: {growth_summary['growth_rate']:.1f} cm/day")
+    if growth_summary['health_score']:
+        status.append(f"Health score: {growth_summary['health_score']}%")
+
+    # Care info
+    if plant.last_watered_at:
+        days_since_water, next_change = _days_since(plant.last_watered_at, now)
+        changes.append(next_change)
+        status.append(f"\n💧 Last watered: {days_since_water} days ago")
+
+    if plant.last_note:
+        status.append(f"\n📝 Latest note: {plant.last_note.content[:50]}...")
+
+    # Add recommendations if conditions need attention
+    recommendations = plant.get_stage_recommendations()
+    if recommendations:
+        status.append("\n⚠️ Recommendations:")
+        status.extend(f"• {rec}" for rec in recommendations)
+
+    return "\n".join(status), min(changes)
+
+
+def plant_statuses(plant_ids, now=None):
+    """Status text for each plant id, in order.
+
+    Cached texts are reused; the rest are rendered from a single query that
+    joins each plant's stage, latest reading and latest note.
+    """
+    now = now or datetime.utcnow()
+    cache = plant_status_cache()
+    texts = {plant_id: cache.get(plant_id, now) for plant_id in plant_ids}
+
+    missing = [plant_id for plant_id, text in texts.items() if text is None]
+    if missing:
+        plants = Plant.query.options(
+            joinedload(Plant.current_stage),
+            joinedload(Plant.latest_growth_data),
+            joinedload(Plant.last_note)
+        ).filter(Plant.id.in_(missing)).populate_existing().all()
+        ttl = timedelta(seconds=cache.ttl)
+        for plant in plants:
+            text, valid_until = render_status(plant, now)
+            cache.put(plant.id, text, min(valid_until, now + ttl))
+            texts[plant.id] = text
+
+    return [texts[plant_id] for plant_id in plant_ids if texts.get(plant_id) is not None]
+
+
+def _invalidate(plant_id):
+    if plant_id is not None and has_app_context() and 'plant_status' in current_app.extensions:
+        plant_status_cache().invalidate(plant_id)
+
+
+def _plant_changed(mapper, connection, target):
+    _invalidate(target.id)
+
+
+def _timeline_changed(mapper, connection, target):
+    _invalidate(target.plant_id)
+
+
+for _event in ('after_update', 'after_delete'):
+    event.listen(Plant, _event, _plant_changed)
+for _model in (Note, Watering, GrowthData, GrowthStage):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _timeline_changed)
@@ -3,12 +3,14 @@ from flask_login import login_required, current_user
 from app import db
 from app.plants import bp
 from app.models import Plant, PlantPermission
+from app.permissions import resolve_access, invalidate_access
+from app.ingest import record_waterings, record_growth_data
 
 @bp.route('/api/plants/permissions/<int:plant_id>', methods=['POST'])
 @login_required
 def update_permissions(plant_id):
     plant = Plant.query.get_or_404(plant_id)
-    if plant.owner_id != current_user.id:
+    if not resolve_access(plant).is_owner:
         return jsonify({'error': 'Access denied'}), 403
     
     user_id = request.form.get('user_id', type=int)
@@ -29,13 +31,14 @@ def update_permissions(plant_id):
     permission.can_add_notes = 'can_add_notes' in request.form
     
     db.session.commit()
+    invalidate_access(plant_id, user_id)
     return jsonify({'success': True})
 
 @bp.route('/api/plants/permissions/<int:plant_id>/<int:user_id>', methods=['DELETE'])
 @login_required
 def remove_permissions(plant_id, user_id):
     plant = Plant.query.get_or_404(plant_id)
-    if plant.owner_id != current_user.id:
+    if not resolve_access(plant).is_owner:
         return jsonify({'error': 'Access denied'}), 403
     
     permission = PlantPermission.query.filter_by(
@@ -46,5 +49,38 @@ def remove_permissions(plant_id, user_id):
     if permission:
         db.session.delete(permission)
         db.session.commit()
+        invalidate_access(plant_id, user_id)
     
     return jsonify({'success': True})
+
+@bp.route('/api/plants/water', methods=['POST'])
+@login_required
+def bulk_water():
+    data = request.get_json(silent=True) or {}
+    items = data.get('waterings')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'A list of waterings is required'}), 400
+    if not all(isinstance(item, dict) for item in items):
+        return jsonify({'error': 'Each watering must be an object'}), 400
+    
+    results = record_waterings(current_user, items)
+    return jsonify({
+        'recorded': sum(1 for result in results if result['success']),
+        'results': results
+    })
+
+@bp.route('/api/plants/growth-data', methods=['POST'])
+@login_required
+def bulk_growth_data():
+    data = request.get_json(silent=True) or {}
+    items = data.get('readings')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'A list of readings is required'}), 400
+    if not all(isinstance(item, dict) for item in items):
+        return jsonify({'error': 'Each reading must be an object'}), 400
+    
+    results = record_growth_data(current_user, items)
+    return jsonify({
+        'recorded': sum(1 for result in results if result['success']),
+        'results': results
+    })
@@ -0,0 +1,167 @@
+"""Chat presence shared by every Socket.IO worker.
+
+Presence is a per-user connection count, so a user with several tabs open
+goes online with the first connection and offline with the last one
+instead of flapping. Only ids and usernames are stored, never ORM objects.
+
+MemoryPresenceStore serves a single process. With PRESENCE_STORE_URL set
+to a redis:// URL (Redis or any server speaking its protocol), every
+worker shares the counts through RedisPresenceStore; run those workers
+with SOCKETIO_MESSAGE_QUEUE pointing at the same server so broadcasts
+reach clients connected to other workers too. Each worker also records its
+own share of the counts and refreshes a heartbeat every
+PRESENCE_HEARTBEAT_SECONDS; the share of a worker that died without
+disconnecting its clients is subtracted once its heartbeat expires.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from flask import current_app
+
+try:
+    import redis
+except ImportError:  # only needed for a shared store
+    redis = None
+
+
+class MemoryPresenceStore:
+    """Connection counts for a single process"""
+
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def connect(self, user_id, username):
+        """Count a connection; True if it is the user's first"""
+        with self._lock:
+            count, _ = self._users.get(user_id, (0, None))
+            self._users[user_id] = (count + 1, username)
+            return count == 0
+
+    def disconnect(self, user_id):
+        """Drop a connection; True if it was the user's last"""
+        with self._lock:
+            count, username = self._users.get(user_id, (0, None))
+            if count <= 1:
+                self._users.pop(user_id, None)
+                return count == 1
+            self._users[user_id] = (count - 1, username)
+            return False
+
+    def online(self):
+        with self._lock:
+            return [{'id': user_id, 'username': username}
+                    for user_id, (count, username) in sorted(self._users.items())]
+
+
+class RedisPresenceStore:
+    """Connection counts kept in Redis hashes shared by all workers"""
+
+    # Subtract connections from a user's total, forgetting the user at zero
+    RELEASE = """
+    local count = redis.call('HINCRBY', KEYS[1], ARGV[1], -tonumber(ARGV[2]))
+    if count <= 0 then
+        redis.call('HDEL', KEYS[1], ARGV[1])
+        redis.call('HDEL', KEYS[2], ARGV[1])
+    end
+    return count
+    """
+
+    def __init__(self, app, url, heartbeat=20, prefix='grow_tracker:presence'):
+        if redis is None:
+            raise RuntimeError('PRESENCE_STORE_URL needs the redis package installed')
+        self.app = app
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.heartbeat = heartbeat
+        self.prefix = prefix
+        self.counts_key = f'{prefix}:counts'
+        self.names_key = f'{prefix}:names'
+        self.workers_key = f'{prefix}:workers'
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._release = self.client.register_script(self.RELEASE)
+        self._thread = None
+        # Start from counts without the workers that died since the last run
+        self.beat()
+        self._ensure_heartbeat()
+
+    def _worker_key(self, worker_id):
+        return f'{self.prefix}:worker:{worker_id}'
+
+    def _alive_key(self, worker_id):
+        return f'{self.prefix}:alive:{worker_id}'
+
+    def connect(self, user_id, username):
+        pipeline = self.client.pipeline()
+        pipeline.hincrby(self.counts_key, user_id, 1)
+        pipeline.hset(self.names_key, user_id, username)
+        pipeline.hincrby(self._worker_key(self.worker_id), user_id, 1)
+        count = pipeline.execute()[0]
+        self._ensure_heartbeat()
+        return count == 1
+
+    def disconnect(self, user_id):
+        worker_key = self._worker_key(self.worker_id)
+        if self.client.hincrby(worker_key, user_id, -1) <= 0:
+            self.client.hdel(worker_key, user_id)
+        return self._release(keys=[self.counts_key, self.names_key], args=[user_id, 1]) == 0
+
+    def online(self):
+        names = self.client.hgetall(self.names_key)
+        return [{'id': int(user_id), 'username': username}
+                for user_id, username in sorted(names.items(), key=lambda item: int(item[0]))]
+
+    def beat(self):
+        """Refresh this worker's heartbeat and reap workers whose heartbeat expired.
+
+        Returns the number of connections taken off the counts.
+        """
+        pipeline = self.client.pipeline()
+        pipeline.sadd(self.workers_key, self.worker_id)
+        pipeline.set(self._alive_key(self.worker_id), 1, ex=3 * self.heartbeat)
+        pipeline.execute()
+
+        released = 0
+        for worker_id in self.client.smembers(self.workers_key):
+            if worker_id == self.worker_id or self.client.exists(self._alive_key(worker_id)):
+                continue
+            # Only the worker that removes it from the set reaps it
+            if not self.client.srem(self.workers_key, worker_id):
+                continue
+            worker_key = self._worker_key(worker_id)
+            for user_id, count in self.client.hgetall(worker_key).items():
+                if int(count) > 0:
+                    self._release(keys=[self.counts_key, self.names_key], args=[user_id, count])
+                    released += int(count)
+            self.client.delete(worker_key)
+        if released:
+            self.app.logger.warning('Presence: dropped %d connections of stopped workers', released)
+        return released
+
+    def _ensure_heartbeat(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='presence-heartbeat', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.heartbeat)
+            try:
+                self.beat()
+            except redis.RedisError as e:
+                self.app.logger.error('Presence heartbeat failed: %s', e)
+
+
+def init_presence(app):
+    url = app.config.get('PRESENCE_STORE_URL')
+    if url:
+        app.extensions['presence'] = RedisPresenceStore(
+            app, url, heartbeat=app.config.get('PRESENCE_HEARTBEAT_SECONDS', 20))
+    else:
+        app.extensions['presence'] = MemoryPresenceStore()
+
+
+def presence_store():
+    """The presence store of the current app"""
+    return current_app.extensions['presence']
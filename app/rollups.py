@@ -0,0 +1,260 @@
+"""Hourly and daily rollups of growth readings.
+
+Readings are folded into GrowthDataRollup buckets by a scheduler job that
+tracks the highest GrowthData id it has processed. Statistics combine the
+rolled-up buckets with the few readings newer than that watermark, so they
+stay exact without scanning a plant's full reading history.
+
+Each run rebuilds the hour buckets it touches from GrowthData, and the day
+buckets from their hours, rather than adding to them. The job can therefore
+re-read the trailing GROWTH_ROLLUP_RESCAN_MINUTES of readings every time.
+That catches readings that committed after a run with ids below its
+watermark, and readings deleted since.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import func, tuple_
+from app.extensions import db
+from app.models import GrowthData, GrowthDataRollup, RollupWatermark
+
+ROLLUP_METRICS = ('temperature', 'humidity', 'ph_level', 'height', 'health_score')
+ROLLUP_PERIODS = {
+    'hour': lambda ts: ts.replace(minute=0, second=0, microsecond=0),
+    'day': lambda ts: ts.replace(hour=0, minute=0, second=0, microsecond=0)
+}
+WATERMARK = 'growth_data'
+
+
+def _combine(totals, metric, count, total, low, high):
+    """Add partial [count, sum, min, max] aggregates to an accumulator."""
+    if not count:
+        return
+    current = totals.get(metric)
+    if current is None:
+        totals[metric] = [count, total, low, high]
+    else:
+        current[0] += count
+        current[1] += total
+        current[2] = min(current[2], low)
+        current[3] = max(current[3], high)
+
+
+def _fold(totals, metric, value):
+    """Fold one value into a [count, sum, min, max] accumulator."""
+    if value is not None:
+        _combine(totals, metric, 1, value, value, value)
+
+
+def _merge(bucket, totals):
+    """Add accumulated totals to a rollup row."""
+    bucket.readings = (bucket.readings or 0) + totals['readings']
+    for metric in ROLLUP_METRICS:
+        if metric not in totals:
+            continue
+        count, total, low, high = totals[metric]
+        if not getattr(bucket, f'{metric}_count'):
+            setattr(bucket, f'{metric}_count', count)
+            setattr(bucket, f'{metric}_sum', total)
+            setattr(bucket, f'{metric}_min', low)
+            setattr(bucket, f'{metric}_max', high)
+        else:
+            setattr(bucket, f'{metric}_count', getattr(bucket, f'{metric}_count') + count)
+            setattr(bucket, f'{metric}_sum', getattr(bucket, f'{metric}_sum') + total)
+            setattr(bucket, f'{metric}_min', min(getattr(bucket, f'{metric}_min'), low))
+            setattr(bucket, f'{metric}_max', max(getattr(bucket, f'{metric}_max'), high))
+
+
+def _replace(bucket, totals):
+    """Overwrite a rollup row with freshly computed totals."""
+    bucket.readings = 0
+    for metric in ROLLUP_METRICS:
+        setattr(bucket, f'{metric}_count', 0)
+        for part in ('sum', 'min', 'max'):
+            setattr(bucket, f'{metric}_{part}', None)
+    _merge(bucket, totals)
+
+
+def _load_buckets(keys, chunk_size=500):
+    """Fetch the existing rollup rows for (plant_id, period, bucket_start) keys."""
+    keys = list(keys)
+    found = {}
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        for bucket in GrowthDataRollup.query.filter(tuple_(
+            GrowthDataRollup.plant_id, GrowthDataRollup.period, GrowthDataRollup.bucket_start
+        ).in_(chunk)):
+            found[(bucket.plant_id, bucket.period, bucket.bucket_start)] = bucket
+    return found
+
+
+def _in_spans(plant_column, time_column, spans, length):
+    """Condition matching rows of the (plant_id, start) spans of the given length"""
+    return db.or_(*[
+        db.and_(plant_column == plant_id, time_column >= start, time_column < start + length)
+        for plant_id, start in spans
+    ])
+
+
+def _readings_stmt(high, *conditions):
+    return db.select(
+        GrowthData.plant_id, GrowthData.timestamp, *[getattr(GrowthData, m) for m in ROLLUP_METRICS]
+    ).where(GrowthData.id <= high, GrowthData.plant_id.isnot(None), *conditions)
+
+
+def _write_buckets(period, keys, totals):
+    """Replace the (plant_id, bucket_start) buckets of a period; empty ones are deleted."""
+    buckets = _load_buckets((plant_id, period, start) for plant_id, start in keys)
+    for plant_id, start in keys:
+        bucket = buckets.get((plant_id, period, start))
+        if (plant_id, start) not in totals:
+            if bucket is not None:
+                db.session.delete(bucket)
+            continue
+        if bucket is None:
+            bucket = GrowthDataRollup(plant_id=plant_id, period=period, bucket_start=start)
+            db.session.add(bucket)
+        _replace(bucket, totals[(plant_id, start)])
+
+
+def roll_up_growth_data(batch_size=1000, rescan=timedelta(hours=1), now=None, chunk_size=200):
+    """Fold readings added since the last run into the rollup buckets.
+
+    Returns the number of readings above the watermark that were folded.
+    Late readings with old timestamps are folded into their own (older)
+    buckets, so the rollups stay exact.
+    """
+    watermark = db.session.get(RollupWatermark, WATERMARK)
+    if watermark is None:
+        watermark = RollupWatermark(name=WATERMARK, last_id=0)
+        db.session.add(watermark)
+
+    hour_of, day_of = ROLLUP_PERIODS['hour'], ROLLUP_PERIODS['day']
+    window_start = hour_of((now or datetime.utcnow()) - rescan)
+    high = db.session.query(func.max(GrowthData.id)).scalar() or 0
+
+    # Hours in the window are rebuilt from their readings, including hours
+    # whose readings have all gone; older hours only when new readings hit them
+    hour_totals, older_hours = {}, set()
+    hours = {(plant_id, start) for plant_id, start in db.session.query(
+        GrowthDataRollup.plant_id, GrowthDataRollup.bucket_start
+    ).filter(GrowthDataRollup.period == 'hour', GrowthDataRollup.bucket_start >= window_start)}
+    # Two bounded reads: readings above the watermark by primary key, and
+    # the window by timestamp; new readings inside the window are folded there
+    folded = 0
+    new_rows = db.select(GrowthData.plant_id, GrowthData.timestamp).where(
+        GrowthData.id > watermark.last_id,
+        GrowthData.id <= high,
+        GrowthData.plant_id.isnot(None)
+    ).execution_options(yield_per=batch_size)
+    for row in db.session.execute(new_rows):
+        folded += 1
+        key = (row.plant_id, hour_of(row.timestamp))
+        hours.add(key)
+        if key[1] < window_start:
+            older_hours.add(key)
+
+    # Bounded by timestamp only, so it seeks ix_growth_data_timestamp; the
+    # few readings added since high was read are left to the next run
+    window_rows = db.select(
+        GrowthData.id, GrowthData.plant_id, GrowthData.timestamp, *[getattr(GrowthData, m) for m in ROLLUP_METRICS]
+    ).where(
+        GrowthData.timestamp >= window_start,
+        GrowthData.plant_id.isnot(None)
+    ).execution_options(yield_per=batch_size)
+    for row in db.session.execute(window_rows):
+        if row.id > high:
+            continue
+        key = (row.plant_id, hour_of(row.timestamp))
+        hours.add(key)
+        totals = hour_totals.setdefault(key, {'readings': 0})
+        totals['readings'] += 1
+        for metric in ROLLUP_METRICS:
+            _fold(totals, metric, getattr(row, metric))
+
+    older_hours = sorted(older_hours)
+    for start in range(0, len(older_hours), chunk_size):
+        chunk = older_hours[start:start + chunk_size]
+        for row in db.session.execute(_readings_stmt(
+            high, _in_spans(GrowthData.plant_id, GrowthData.timestamp, chunk, timedelta(hours=1))
+        ).execution_options(yield_per=batch_size)):
+            totals = hour_totals.setdefault((row.plant_id, hour_of(row.timestamp)), {'readings': 0})
+            totals['readings'] += 1
+            for metric in ROLLUP_METRICS:
+                _fold(totals, metric, getattr(row, metric))
+
+    _write_buckets('hour', hours, hour_totals)
+    db.session.flush()
+
+    # Days are the sum of their hours
+    days = sorted({(plant_id, day_of(start)) for plant_id, start in hours})
+    day_totals = {}
+    for start in range(0, len(days), chunk_size):
+        chunk = days[start:start + chunk_size]
+        for bucket in GrowthDataRollup.query.filter(
+            GrowthDataRollup.period == 'hour',
+            _in_spans(GrowthDataRollup.plant_id, GrowthDataRollup.bucket_start, chunk, timedelta(days=1))
+        ):
+            totals = day_totals.setdefault((bucket.plant_id, day_of(bucket.bucket_start)), {'readings': 0})
+            totals['readings'] += bucket.readings
+            for metric in ROLLUP_METRICS:
+                _combine(totals, metric, *[getattr(bucket, f'{metric}_{part}')
+                                           for part in ('count', 'sum', 'min', 'max')])
+    _write_buckets('day', days, day_totals)
+
+    watermark.last_id = max(watermark.last_id, high)
+    db.session.commit()
+    return folded
+
+
+def growth_stats(plant_id):
+    """Reading count and count/sum/min/max/avg per metric for a plant.
+
+    Daily rollups cover everything up to the watermark; readings above it
+    are aggregated directly from GrowthData. This is approximate in two
+    ways until the next rollup run. A reading that committed after the last
+    run with an id below its watermark is missing. A reading deleted since
+    then is still counted. Both are settled by the next run's rescan only
+    if the reading is within GROWTH_ROLLUP_RESCAN_MINUTES of now. Older
+    deletes stay counted until their hour is rolled up again.
+    """
+    watermark = db.session.get(RollupWatermark, WATERMARK)
+    last_id = watermark.last_id if watermark else 0
+
+    rolled_columns = [func.sum(GrowthDataRollup.readings)]
+    for metric in ROLLUP_METRICS:
+        rolled_columns += [
+            func.sum(getattr(GrowthDataRollup, f'{metric}_count')),
+            func.sum(getattr(GrowthDataRollup, f'{metric}_sum')),
+            func.min(getattr(GrowthDataRollup, f'{metric}_min')),
+            func.max(getattr(GrowthDataRollup, f'{metric}_max'))
+        ]
+    rolled = db.session.query(*rolled_columns).filter(
+        GrowthDataRollup.plant_id == plant_id,
+        GrowthDataRollup.period == 'day'
+    ).one()
+
+    recent_columns = [func.count(GrowthData.id)]
+    for metric in ROLLUP_METRICS:
+        column = getattr(GrowthData, metric)
+        recent_columns += [func.count(column), func.sum(column), func.min(column), func.max(column)]
+    recent = db.session.query(*recent_columns).filter(
+        GrowthData.plant_id == plant_id,
+        GrowthData.id > last_id
+    ).one()
+
+    stats = {'readings': (rolled[0] or 0) + (recent[0] or 0)}
+    for index, metric in enumerate(ROLLUP_METRICS):
+        offset = 1 + index * 4
+        parts = [(rolled[offset + i], recent[offset + i]) for i in range(4)]
+        count = (parts[0][0] or 0) + (parts[0][1] or 0)
+        if not count:
+            stats[metric] = None
+            continue
+        total = (parts[1][0] or 0) + (parts[1][1] or 0)
+        stats[metric] = {
+            'count': count,
+            'sum': total,
+            'min': min(v for v in parts[2] if v is not None),
+            'max': max(v for v in parts[3] if v is not None),
+            'avg': total / count
+        }
+    return stats
@@ -1,64 +1,274 @@
+"""Scheduled jobs and the runtime that runs them on a single leader.
+
+Every process that builds a scheduler competes for the 'scheduler' lease
+(see app.leases); jobs fire everywhere but only run in the process holding
+the lease, and every run is recorded in JobRun. Triggers only check
+whether a job is due, at most every SCHEDULER_TICK_SECONDS; the job runs
+once its interval has passed since its last successful run in JobRun, so
+a new leader or a restarted process keeps the cadence instead of starting
+its own. The jobs run in a separate
+process started with `flask scheduler`, or web workers can embed a
+scheduler (SCHEDULER_EMBEDDED) that starts with their first request.
+"""
+import atexit
+import functools
+import threading
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime, timedelta
-from app.models import Plant, User, Watering, GrowthStage
+from app.models import JobRun
 from app.extensions import db
-from app.signal_service import SignalService
+from app.leases import LeaderLease
+from app.stage_transitions import init_stage_transitions
+from app.outbox import deliver_pending
+from app.notifications import queue_alert, send_digests
+from app.followers import fan_out_events
+from app.watering import WateringCheckMetrics, iter_due_plants
+from app.rollups import roll_up_growth_data
+from app.leaderboard import refresh_leaderboards
 
 scheduler = None
+_init_lock = threading.Lock()
+last_watering_check = None
 
-def check_growth_stages():
-    """Check and update plant growth stages."""
+def sync_stage_transitions():
+    """Reload the growth stage transitions due soon from the database."""
     with scheduler.app.app_context():
-        plants = Plant.query.filter_by(is_archived=False).all()
-        for plant in plants:
-            if plant.current_stage_id:
-                stage = GrowthStage.query.get(plant.current_stage_id)
-                if stage and stage.end_date and stage.end_date <= datetime.utcnow():
-                    # Time to advance to next stage
-                    next_stage = GrowthStage.get_default_stages().get(stage.stage_name)
-                    if next_stage:
-                        plant.advance_growth_stage(next_stage)
-                        db.session.commit()
+        return scheduler.transitions.sync()
 
 def check_watering_schedule():
-    """Check if plants need watering."""
+    """Queue watering alerts for plants predicted to need water before the next check.
+
+    Each prediction is marked as announced in Plant.watering_alerted_at in
+    the same commit as its alert, so it is announced once whichever process
+    runs the check, and plants that are long overdue are still picked up.
+    The alerts go out in the owners' next digest.
+    """
+    global last_watering_check
+    interval = timedelta(minutes=scheduler.app.config.get('WATERING_CHECK_INTERVAL_MINUTES', 60))
+    now = datetime.utcnow()
     with scheduler.app.app_context():
-        plants = Plant.query.filter_by(is_archived=False).all()
-        for plant in plants:
-            last_watering = plant.waterings.order_by(Watering.timestamp.desc()).first()
-            if last_watering and datetime.utcnow() - last_watering.timestamp > timedelta(days=2):
-                owner = User.query.get(plant.owner_id)
-                if owner:
-                    signal_service = SignalService(
-                        scheduler.app.config.get('SIGNAL_BOT_NUMBER'),
-                        scheduler.app.config.get('SIGNAL_API_URL')
-                    )
-                    signal_service.send_message(
-                        owner.phone_number,
-                        f"🌱 Your plant {plant.name} needs watering! Last watered {last_watering.timestamp.strftime('%Y-%m-%d %H:%M')}"
-                    )
+        metrics = WateringCheckMetrics()
+        for plant, owner, due in iter_due_plants(now + interval, metrics=metrics):
+            alert = queue_alert(
+                owner, plant, 'watering', due.isoformat(),
+                f"{plant.name} needs watering (last watered {plant.last_watered_at.strftime('%Y-%m-%d %H:%M')})"
+            )
+            if alert is not None:
+                metrics.notifications_queued += 1
+            plant.watering_alerted_at = now
+        db.session.commit()
 
-def init_scheduler(app):
-    """Initialize the scheduler with the given Flask app."""
-    global scheduler
-    if scheduler is None:
-        scheduler = BackgroundScheduler()
-        scheduler.app = app
-        
-        # Add jobs
-        scheduler.add_job(
-            func=check_growth_stages,
-            trigger=IntervalTrigger(hours=1),
-            id='check_growth_stages',
-            name='Check plant growth stages',
-            replace_existing=True)
+        last_watering_check = metrics.finish()
+        scheduler.app.logger.info(
+            'Watering check: %d plants due, %d alerts queued in %.3fs',
+            metrics.plants_due, metrics.notifications_queued, metrics.wall_time
+        )
+        return metrics.plants_due
+
+def roll_up_growth_readings():
+    """Fold new growth readings into the hourly and daily rollups."""
+    with scheduler.app.app_context():
+        rescan = timedelta(minutes=scheduler.app.config.get('GROWTH_ROLLUP_RESCAN_MINUTES', 60))
+        folded = roll_up_growth_data(rescan=rescan)
+        if folded:
+            scheduler.app.logger.info('Growth rollup: folded %d readings', folded)
+        return folded
+
+def deliver_outbound_messages():
+    """Send queued Signal messages that are due."""
+    with scheduler.app.app_context():
+        stats = deliver_pending()
+        return stats['sent'] + stats['failed']
+
+def fan_out_plant_events():
+    """Fold new public plant events into their followers' pending updates."""
+    with scheduler.app.app_context():
+        config = scheduler.app.config
+        stats = fan_out_events(batch_size=config.get('FOLLOWER_FANOUT_BATCH', 500))
+        return stats['events']
+
+def send_notification_digests():
+    """Send each recipient whose digest window is open their pending alerts."""
+    with scheduler.app.app_context():
+        stats = send_digests()
+        if stats['digests']:
+            scheduler.app.logger.info(
+                'Notification digests: %d queued with %d alerts, %d suppressed',
+                stats['digests'], stats['alerts'], stats['suppressed']
+            )
+        return stats['alerts'] + stats['suppressed']
+
+def refresh_leaderboard_rankings():
+    """Recompute the community leaderboards."""
+    with scheduler.app.app_context():
+        written = refresh_leaderboards()
+        db.session.commit()
+        return written
+
+def scheduled_jobs(app):
+    """(id, name, function, interval) of every scheduled job"""
+    config = app.config
+    return [
+        ('sync_stage_transitions', 'Sync growth stage transitions',
+         sync_stage_transitions,
+         timedelta(minutes=config.get('STAGE_TRANSITION_SYNC_MINUTES', 10))),
+        ('check_watering', 'Check watering schedule',
+         check_watering_schedule,
+         timedelta(minutes=config.get('WATERING_CHECK_INTERVAL_MINUTES', 60))),
+        ('fan_out_plant_events', 'Fan out plant updates to followers',
+         fan_out_plant_events,
+         timedelta(seconds=config.get('FOLLOWER_FANOUT_SECONDS', 30))),
+        ('send_notification_digests', 'Send notification digests',
+         send_notification_digests,
+         timedelta(minutes=config.get('NOTIFICATION_DIGEST_CHECK_MINUTES', 15))),
+        ('roll_up_growth_data', 'Roll up growth readings',
+         roll_up_growth_readings,
+         timedelta(minutes=config.get('GROWTH_ROLLUP_INTERVAL_MINUTES', 5))),
+        ('deliver_outbound_messages', 'Deliver queued Signal messages',
+         deliver_outbound_messages,
+         timedelta(seconds=config.get('SIGNAL_DELIVERY_INTERVAL_SECONDS', 10))),
+        ('refresh_leaderboards', 'Refresh community leaderboards',
+         refresh_leaderboard_rankings,
+         timedelta(minutes=config.get('LEADERBOARD_REFRESH_MINUTES', 15))),
+    ]
+
+def job_tick(app, interval):
+    """How often the trigger of a job with this interval checks whether it is due"""
+    return min(interval, timedelta(seconds=app.config.get('SCHEDULER_TICK_SECONDS', 30)))
+
+def last_successful_run(job_id):
+    """Start time of the job's latest successful run, by any process"""
+    return db.session.query(db.func.max(JobRun.started_at)).filter(
+        JobRun.job_id == job_id,
+        JobRun.status == 'succeeded'
+    ).scalar()
+
+def run_job(job_id, func, interval=None):
+    """Run a job if this process is the leader and it is due, recording the run in JobRun.
+
+    With an interval the job is due once that long has passed since its last
+    successful run, less half a tick so trigger jitter never skips a run.
+    """
+    app = scheduler.app
+    lease = scheduler.lease
+    if not lease.is_leader:
+        return None
+    
+    with app.app_context():
+        now = datetime.utcnow()
+        if interval is not None:
+            last = last_successful_run(job_id)
+            if last is not None and now < last + interval - job_tick(app, interval) / 2:
+                return None
+        run = JobRun(job_id=job_id, holder=lease.holder, started_at=now)
+        db.session.add(run)
+        db.session.commit()
+        run_id = run.id
+    
+    status, rows, error = 'succeeded', None, None
+    try:
+        rows = func()
+    except Exception as e:
+        status, error = 'failed', f'{type(e).__name__}: {e}'
+        app.logger.exception('Scheduled job %s failed', job_id)
+    
+    with app.app_context():
+        db.session.execute(db.update(JobRun).where(JobRun.id == run_id).values(
+            status=status,
+            finished_at=datetime.utcnow(),
+            rows_processed=rows if isinstance(rows, int) else None,
+            error=error
+        ))
+        db.session.commit()
+    return rows
+
+def renew_lease():
+    """Take or keep the scheduler lease, and prune old job history as leader."""
+    app = scheduler.app
+    with app.app_context():
+        try:
+            was_leader = scheduler.lease.is_leader
+            if not scheduler.lease.acquire():
+                if was_leader:
+                    app.logger.warning('Scheduler lease lost by %s', scheduler.lease.holder)
+                return False
+            if not was_leader:
+                app.logger.info('Scheduler lease acquired by %s', scheduler.lease.holder)
+                # A new leader starts from the transitions stored in the database
+                scheduler.transitions.sync()
             
+            keep = timedelta(days=app.config.get('SCHEDULER_HISTORY_DAYS', 14))
+            db.session.execute(db.delete(JobRun).where(JobRun.started_at < datetime.utcnow() - keep))
+            db.session.commit()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error('Scheduler lease renewal failed: %s', e)
+            return False
+
+def release_lease():
+    """Hand leadership over on shutdown instead of waiting for the lease to expire."""
+    if scheduler is None or not scheduler.lease.is_leader:
+        return
+    with scheduler.app.app_context():
+        try:
+            scheduler.lease.release()
+        except Exception as e:
+            scheduler.app.logger.error('Scheduler lease release failed: %s', e)
+
+def build_scheduler(app, scheduler_class=BackgroundScheduler):
+    """Create a scheduler whose jobs only run while it holds the lease."""
+    global scheduler
+    scheduler = scheduler_class()
+    scheduler.app = app
+    scheduler.lease = LeaderLease('scheduler', ttl=app.config.get('SCHEDULER_LEASE_TTL', 60))
+    # Look ahead twice the sync interval so no transition falls between syncs
+    scheduler.transitions = init_stage_transitions(
+        app,
+        horizon=timedelta(minutes=2 * app.config.get('STAGE_TRANSITION_SYNC_MINUTES', 10)),
+        is_active=lambda: scheduler.lease.is_leader
+    )
+    
+    scheduler.add_job(
+        func=renew_lease,
+        trigger=IntervalTrigger(seconds=app.config.get('SCHEDULER_LEASE_RENEW_SECONDS', 20)),
+        next_run_time=datetime.now(),
+        id='renew_scheduler_lease',
+        name='Renew scheduler leader lease',
+        replace_existing=True)
+    
+    for job_id, name, func, interval in scheduled_jobs(app):
         scheduler.add_job(
-            func=check_watering_schedule,
-            trigger=IntervalTrigger(hours=12),
-            id='check_watering',
-            name='Check watering schedule',
+            func=functools.partial(run_job, job_id, func, interval),
+            trigger=IntervalTrigger(seconds=job_tick(app, interval).total_seconds()),
+            id=job_id,
+            name=name,
             replace_existing=True)
-        
+    return scheduler
+
+def init_scheduler(app):
+    """Start a scheduler in the background of this process, once."""
+    if scheduler is not None:
+        return
+    with _init_lock:
+        if scheduler is None:
+            build_scheduler(app).start()
+            scheduler.transitions.start()
+            atexit.register(release_lease)
+
+def run_scheduler(app):
+    """Run the jobs in the foreground; the entry point of a dedicated scheduler process."""
+    if scheduler is not None and scheduler.running:
+        # An embedded scheduler from create_app would only compete with this one
+        scheduler.shutdown(wait=False)
+        release_lease()
+    build_scheduler(app, BlockingScheduler)
+    scheduler.transitions.start()
+    try:
         scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        release_lease()
@@ -1,9 +1,18 @@
 from flask import current_app
-from app.models import User, Plant, Watering, Note, PlantFollower, GrowthStage, GrowthData, Strain, StrainRating, GrowingTip, Achievement, UserAchievement
+from app.models import User, Plant, Note, PlantFollower, GrowthStage, GrowthData, Strain, StrainRating, GrowingTip, Achievement, UserAchievement, UserProgress
 from datetime import datetime
 import requests
 import re
 from app.extensions import db
+from app.ingest import record_waterings, record_growth_data
+from app.rollups import growth_stats
+from app.outbox import enqueue_message
+from app.plant_names import plant_name_resolver
+from app.plant_status import plant_statuses
+from app.achievements import REQUIREMENTS
+from app.leaderboard import BOARDS, grow_counts, leaderboard, format_value
+from app.notifications import KINDS
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from sqlalchemy import func
 
 class SignalCommandHandler:
@@ -19,15 +28,23 @@ class SignalCommandHandler:
         'unfollow': r'^unfollow\s+(\d+)$',     # unfollow [plant_id]
         'following': r'^following$',           # following
         'stage': r'^stage\s+(.+?)\s+(.+)$',    # stage [plant_name] [stage_name]
-        'data': r'^data\s+(.+?)\s+(.+)$',      # data [plant_name] [key=value,key=value,...]
+        # data [plant_name] [key=value,key=value,...]; the name runs up to the trailing readings
+        'data': r'^data\s+(.+?)\s+(\w+\s*=\s*[^,\s]+(?:\s*,\s*\w+\s*=\s*[^,\s]+)*)$',
         'recommend': r'^recommend\s+(.+)$',    # recommend [plant_name]
         'strain': r'^strain\s+(.+)$',           # strain [name] - Get strain info
         'rate': r'^rate\s+(.+?)\s+(\d)(?:\s+(.+))?$',  # rate [strain] [1-5] [review]
         'tip': r'^tip\s+(.+?)\s+(.+?)\s+(.+)$',  # tip [strain] [stage] [content]
         'tips': r'^tips\s+(.+?)(?:\s+(.+))?$',   # tips [strain] [stage]
         'achievements': r'^achievements$',        # List achievements
+        'leaderboard': r'^leaderboard(?:\s+(\S+))?$',  # leaderboard [board]
+        'notifications': r'^notifications(?:\s+(on|off)(?:\s+(\S+))?)?$',  # notifications [on|off] [kind]
+        'quiet': r'^quiet\s+(off|(\d{1,2})-(\d{1,2})(?:\s+(\S+))?)$',  # quiet [start-end [timezone]|off]
         'stats': r'^stats(?:\s+(.+))?$'         # stats [plant_name] - Get detailed stats
     }
+    # Every pattern starts with its command keyword, so messages are routed on
+    # their first word and only that command's pattern is tried
+    DISPATCH = {command: re.compile(pattern, re.IGNORECASE) for command, pattern in COMMANDS.items()}
+    UNKNOWN_COMMAND = "⚠️ Unknown command. Send 'help' for available commands."
 
     def __init__(self):
         self.user = None
@@ -46,7 +63,9 @@ class SignalCommandHandler:
 
     def handle_message(self, message_text):
         """Process incoming Signal messages and return appropriate response"""
-        message_text = message_text.lower().strip()
+        # Only the command keyword is case-insensitive; plant names, notes
+        # and reviews keep the case they were typed in
+        message_text = message_text.strip()
         
         # Check if user is verified
         if not self.user.signal_verified:
@@ -59,74 +78,87 @@ class SignalCommandHandler:
                 return "❌ Invalid verification code. Please try again."
             return "⚠️ Your Signal account is not verified. Please enter the verification code from your profile page."
 
-        for command, pattern in self.COMMANDS.items():
-            match = re.match(pattern, message_text)
-            if match:
-                handler = getattr(self, f'handle_{command}')
-                return handler(*match.groups())
-        
-        return "⚠️ Unknown command. Send 'help' for available commands."
+        command, match = self.dispatch(message_text)
+        if not match:
+            return self.UNKNOWN_COMMAND
+        return getattr(self, f'handle_{command}')(*match.groups())
+
+    @classmethod
+    def dispatch(cls, message_text):
+        """Return (command, match) for a message, or (None, None) if it is not a command"""
+        words = message_text.split(None, 1)
+        keyword = words[0].lower() if words else None
+        pattern = cls.DISPATCH.get(keyword)
+        if pattern is None:
+            return None, None
+        match = pattern.match(message_text)
+        return (keyword, match) if match else (None, None)
 
     def handle_status(self, plant_name=None):
         if plant_name:
-            plant = Plant.query.filter_by(owner_id=self.user.id, name=plant_name.strip()).first()
+            plant, error = plant_name_resolver().resolve(self.user.id, plant_name)
             if not plant:
-                return f"❌ Plant '{plant_name}' not found"
+                return error
             return self._get_plant_status(plant)
         
         # Return status of all plants
-        plants = Plant.query.filter_by(owner_id=self.user.id, is_archived=False).all()
-        if not plants:
+        plant_ids = [plant_id for plant_id, in db.session.query(Plant.id).filter(
+            Plant.owner_id == self.user.id,
+            Plant.is_archived == False
+        ).order_by(Plant.id)]
+        if not plant_ids:
             return "You have no active plants."
         
-        return "\n\n".join([self._get_plant_status(p) for p in plants])
+        return "\n\n".join(plant_statuses(plant_ids))
 
     def _get_plant_status(self, plant):
         """Get detailed plant status including growth data"""
-        growth_summary = plant.get_growth_summary()
-        last_watering = plant.waterings.order_by(Watering.timestamp.desc()).first()
-        last_note = plant.notes.order_by(Note.timestamp.desc()).first()
+        return plant_statuses([plant.id])[0]
+
+    def _find_plants(self, plant_names):
+        """Resolve a comma separated list of the user's plant names or prefixes"""
+        resolver = plant_name_resolver()
+        found, missing = {}, []
+        for name in plant_names.split(','):
+            if not name.strip():
+                continue
+            plant_id, error = resolver.lookup(self.user.id, name)
+            if plant_id is None:
+                missing.append(error)
+            else:
+                found.setdefault(plant_id, name.strip())
+        plants = {plant.id: plant for plant in Plant.query.filter(Plant.id.in_(found))} if found else {}
+        missing += [f"❌ Plant '{name}' not found" for plant_id, name in found.items() if plant_id not in plants]
+        return [plants[plant_id] for plant_id in found if plant_id in plants], missing
+
+    def handle_water(self, plant_names):
+        """Record a watering for one or more comma separated plants"""
+        plants, response = self._find_plants(plant_names)
+        if plants:
+            record_waterings(self.user, [{'plant_id': plant.id} for plant in plants])
+            response.insert(0, f"💧 Recorded watering for {', '.join(plant.name for plant in plants)}")
         
-        status = [
-            f"🌱 {plant.name} ({plant.strain})",
-            f"Age: {growth_summary['age_days']} days"
-        ]
+        return "\n".join(response)
+
+    def handle_note(self, plant_name, note_text):
+        """Add a note to a plant"""
+        plant, error = plant_name_resolver().resolve(self.user.id, plant_name)
+        if not plant:
+            return error
         
-        # Growth stage info
-        if growth_summary['current_stage']:
-            status.extend([
-                f"\n📈 Growth Stage: {growth_summary['current_stage']}",
-                f"Days in stage: {growth_summary['days_in_stage']}"
-            ])
-            
-            if growth_summary['target_harvest']:
-                days_to_harvest = (growth_summary['target_harvest'] - datetime.utcnow()).days
-                if days_to_harvest > 0:
-                    status.append(f"Estimated harvest in: {days_to_harvest} days")
-        
-        # Growth metrics
-        if growth_summary['height']:
-            status.append(f"\n📏 Height: {growth_summary['height']} cm")
-        if growth_summary['growth_rate']:
-            status.append(f"Growth rate: {growth_summary['growth_rate']:.1f} cm/day")
-        if growth_summary['health_score']:
-            status.append(f"Health score: {growth_summary['health_score']}%")
-        
-        # Care info
-        if last_watering:
-            days_since_water = (datetime.utcnow() - last_watering.timestamp).days
-            status.append(f"\n💧 Last watered: {days_since_water} days ago")
-        
-        if last_note:
-            status.append(f"\n📝 Latest note: {last_note.content[:50]}...")
-        
-        # Add recommendations if conditions need attention
-        recommendations = plant.get_stage_recommendations()
-        if recommendations:
-            status.append("\n⚠️ Recommendations:")
-            status.extend(f"• {rec}" for rec in recommendations)
+        note = Note(content=note_text.strip(), plant_id=plant.id, user_id=self.user.id)
+        db.session.add(note)
+        plant.record_note(note)
+        db.session.commit()
         
-        return "\n".join(status)
+        return f"📝 Added note to {plant.name}"
+
+    def handle_list(self):
+        """List the user's active plants"""
+        plants = Plant.query.filter_by(owner_id=self.user.id, is_archived=False).order_by(Plant.name).all()
+        if not plants:
+            return "You have no active plants."
+        return "Your Plants:\n" + "\n".join(f"🌱 {plant.name} ({plant.strain})" for plant in plants)
 
     def handle_public(self):
         """List all public plants"""
@@ -215,9 +247,9 @@ class SignalCommandHandler:
 
     def handle_stage(self, plant_name, stage_name):
         """Handle growth stage changes"""
-        plant = Plant.query.filter_by(owner_id=self.user.id, name=plant_name.strip()).first()
+        plant, error = plant_name_resolver().resolve(self.user.id, plant_name)
         if not plant:
-            return f"❌ Plant '{plant_name}' not found"
+            return error
         
         stage_name = stage_name.lower().strip()
         valid_stages = GrowthStage.get_default_stages().keys()
@@ -226,57 +258,71 @@ class SignalCommandHandler:
             return f"❌ Invalid stage. Valid stages are: {', '.join(valid_stages)}"
         
         plant.advance_growth_stage(stage_name)
+        db.session.commit()
         
         return (
             f"✅ Updated {plant.name} to {stage_name} stage\n"
             f"Send 'recommend {plant.name}' for care instructions"
         )
 
-    def handle_data(self, plant_name, data_str):
-        """Handle growth data updates"""
-        plant = Plant.query.filter_by(owner_id=self.user.id, name=plant_name.strip()).first()
-        if not plant:
-            return f"❌ Plant '{plant_name}' not found"
+    def handle_data(self, plant_names, data_str):
+        """Handle growth data updates for one or more comma separated plants"""
+        plants, response = self._find_plants(plant_names)
+        if not plants:
+            return "\n".join(response)
         
         try:
             # Parse data string (format: temp=25,humidity=60,ph=6.5,height=30)
-            data_dict = dict(item.split('=') for item in data_str.split(','))
-            
-            growth_data = GrowthData(plant_id=plant.id)
+            data_dict = {
+                key.strip().lower(): value
+                for key, value in (item.split('=') for item in data_str.split(','))
+            }
             
+            reading = {}
             if 'temp' in data_dict:
-                growth_data.temperature = float(data_dict['temp'])
+                reading['temperature'] = float(data_dict['temp'])
             if 'humidity' in data_dict:
-                growth_data.humidity = float(data_dict['humidity'])
+                reading['humidity'] = float(data_dict['humidity'])
             if 'ph' in data_dict:
-                growth_data.ph_level = float(data_dict['ph'])
+                reading['ph_level'] = float(data_dict['ph'])
             if 'height' in data_dict:
-                growth_data.height = float(data_dict['height'])
-            
-            # Calculate health score and growth rate
-            growth_data.calculate_health_score()
-            growth_data.calculate_growth_rate()
-            
-            db.session.add(growth_data)
-            db.session.commit()
-            
-            return (
-                f"✅ Updated growth data for {plant.name}\n"
-                f"Health Score: {growth_data.health_score}%\n"
-                f"Growth Rate: {growth_data.growth_rate:.1f} cm/day if available"
-            )
+                reading['height'] = float(data_dict['height'])
+            if not reading:
+                raise KeyError('no readings')
             
         except (ValueError, KeyError) as e:
             return (
                 "❌ Invalid data format. Use: temp=25,humidity=60,ph=6.5,height=30\n"
-                "All values are optional but must be numbers"
+                "Give at least one of them; values must be numbers"
             )
+        
+        results = record_growth_data(
+            self.user,
+            [dict(reading, plant_id=plant.id) for plant in plants]
+        )
+        
+        for plant, result in zip(plants, results):
+            if not result['success']:
+                response.append(f"❌ {plant.name}: {result['error']}")
+                continue
+            response.append(
+                f"✅ Updated growth data for {plant.name}\n"
+                f"Health Score: {result['health_score']}%"
+            )
+            if result['growth_rate'] is not None:
+                response.append(f"Growth Rate: {result['growth_rate']:.1f} cm/day")
+        
+        return "\n".join(response)
+
+    def handle_ph(self, plant_name, value):
+        """Record a pH reading for a plant"""
+        return self.handle_data(plant_name, f'ph={value}')
 
     def handle_recommend(self, plant_name):
         """Get recommendations for a plant"""
-        plant = Plant.query.filter_by(owner_id=self.user.id, name=plant_name.strip()).first()
+        plant, error = plant_name_resolver().resolve(self.user.id, plant_name)
         if not plant:
-            return f"❌ Plant '{plant_name}' not found"
+            return error
         
         stage = plant.current_growth_stage()
         if not stage:
@@ -303,20 +349,30 @@ class SignalCommandHandler:
             "📋 Available Commands:",
             "\nBasic Commands:",
             "• status [plant_name] - Get plant status",
-            "• water [plant_name] - Record watering",
+            "• water [plant_name, ...] - Record watering",
             "• note [plant_name]: [text] - Add a note",
             "• list - List your plants",
+            "• ph [plant_name] [value] - Record a pH reading",
             
             "\nGrowth Tracking:",
             "• stage [plant_name] [stage] - Update growth stage",
-            "• data [plant_name] temp=25,humidity=60,ph=6.5,height=30 - Record measurements",
+            "• data [plant_name,...] temp=25,humidity=60,ph=6.5,height=30 - Record measurements",
             "• recommend [plant_name] - Get care recommendations",
             
             "\nPublic Plants:",
             "• public - List all public plants",
             "• follow [plant_id] - Follow a public plant",
             "• unfollow [plant_id] - Unfollow a plant",
-            "• following - List plants you follow"
+            "• following - List plants you follow",
+            
+            "\nCommunity:",
+            "• achievements - List your achievements",
+            "• leaderboard [harvests|success|strains|achievements] - Top growers",
+            
+            "\nNotifications:",
+            "• notifications - Show your digest settings",
+            "• notifications [on|off] [watering|stage|readings|following] - Switch alerts on or off",
+            "• quiet [22-7] [timezone] - No digests between these hours; 'quiet off' clears them"
         ]
         
         # Add user's plants
@@ -338,12 +394,16 @@ class SignalCommandHandler:
         
         info = [
             f"🧬 {strain.name} ({strain.type})",
-            f"Difficulty: {'⭐' * strain.difficulty}",
+            f"Difficulty: {'⭐' * (strain.difficulty or 0)}",
             f"Flowering Time: {strain.flowering_time} days",
             f"\n📊 Community Stats:",
             f"Rating: {strain.rating:.1f}/5 ({strain.total_ratings} ratings)",
             f"Success Rate: {strain.success_rate:.1f}%",
-            f"Total Grows: {strain.total_grows}",
+            f"Total Grows: {strain.total_grows}"
+        ]
+        if strain.average_growth_time is not None:
+            info.append(f"Average Grow Time: {strain.average_growth_time:.0f} days")
+        info += [
             f"\n🌡️ Growing Conditions:",
             f"Temperature: {strain.ideal_temp_low}-{strain.ideal_temp_high}°C",
             f"Humidity: {strain.ideal_humidity_low}-{strain.ideal_humidity_high}%",
@@ -402,12 +462,7 @@ class SignalCommandHandler:
             )
             db.session.add(strain_rating)
         
-        db.session.commit()
-        
-        # Update strain statistics
-        strain.rating = db.session.query(func.avg(StrainRating.rating)).\
-            filter_by(strain_id=strain.id).scalar()
-        strain.total_ratings = StrainRating.query.filter_by(strain_id=strain.id).count()
+        # Strain rating counters are adjusted by app.strain_stats on flush
         db.session.commit()
         
         return f"✅ Rated {strain.name} {rating}/5" + (f"\nReview: {review}" if review else "")
@@ -419,6 +474,7 @@ class SignalCommandHandler:
             return f"❌ Strain '{strain_name}' not found"
         
         # Verify stage is valid
+        stage = stage.lower()
         valid_stages = GrowthStage.get_default_stages().keys()
         if stage not in valid_stages:
             return f"❌ Invalid stage. Valid stages: {', '.join(valid_stages)}"
@@ -454,6 +510,7 @@ class SignalCommandHandler:
         
         query = strain.growing_tips
         if stage:
+            stage = stage.lower()
             query = query.filter_by(growth_stage=stage)
         
         tips = query.order_by(GrowingTip.upvotes.desc()).limit(5).all()
@@ -473,47 +530,130 @@ class SignalCommandHandler:
 
     def handle_achievements(self):
         """List user's achievements"""
-        achievements = UserAchievement.query.filter_by(user_id=self.user.id).all()
-        
-        if not achievements:
-            return "You haven't earned any achievements yet. Keep growing! 🌱"
-        
-        response = ["🏆 Your Achievements:"]
-        for ua in achievements:
-            response.append(
-                f"\n{ua.achievement.icon} {ua.achievement.name}"
-                f"\n{ua.achievement.description}"
-                f"\nEarned: {ua.earned_at.strftime('%Y-%m-%d')}"
-            )
-        
-        # Add progress towards next achievements
-        next_achievements = Achievement.query.filter(
-            ~Achievement.id.in_(
-                db.session.query(UserAchievement.achievement_id).\
-                filter_by(user_id=self.user.id)
+        progress = db.session.get(UserProgress, self.user.id)
+        rows = db.session.query(Achievement, UserAchievement.earned_at).outerjoin(
+            UserAchievement, db.and_(
+                UserAchievement.achievement_id == Achievement.id,
+                UserAchievement.user_id == self.user.id
             )
-        ).all()
+        ).order_by(UserAchievement.earned_at, Achievement.requirement_value).all()
+        earned = [(achievement, earned_at) for achievement, earned_at in rows if earned_at]
         
+        if not earned:
+            response = ["You haven't earned any achievements yet. Keep growing! 🌱"]
+        else:
+            response = ["🏆 Your Achievements:"]
+            for achievement, earned_at in earned:
+                response.append(
+                    f"\n{achievement.icon} {achievement.name}"
+                    f"\n{achievement.description}"
+                    f"\nEarned: {earned_at.strftime('%Y-%m-%d')}"
+                )
+        
+        # Closest unearned achievements first, judged by the progress counters
+        def current(achievement):
+            if progress is None or achievement.requirement not in REQUIREMENTS:
+                return 0
+            return getattr(progress, achievement.requirement)
+        
+        next_achievements = sorted(
+            (achievement for achievement, earned_at in rows if not earned_at),
+            key=lambda a: current(a) / a.requirement_value if a.requirement_value else 0,
+            reverse=True
+        )
         if next_achievements:
             response.append("\n\n🎯 Next Achievements:")
             for achievement in next_achievements[:3]:
-                response.append(f"\n{achievement.icon} {achievement.name}")
+                line = f"\n{achievement.icon} {achievement.name}"
+                if achievement.requirement in REQUIREMENTS:
+                    line += f" ({current(achievement)}/{achievement.requirement_value})"
+                response.append(line)
         
         return "\n".join(response)
 
+    def handle_leaderboard(self, board=None):
+        """Show a precomputed community leaderboard"""
+        board = (board or 'harvests').lower()
+        if board == 'success':
+            board = 'success_rate'
+        if board not in BOARDS:
+            return f"❌ Unknown leaderboard. Choose from: {', '.join(BOARDS)}"
+        
+        entries = leaderboard(board)
+        if not entries:
+            return f"No {BOARDS[board].lower()} rankings yet. Check back soon! 🌱"
+        
+        medals = {1: '🥇', 2: '🥈', 3: '🥉'}
+        response = [f"🏅 Top Growers: {BOARDS[board]}"]
+        for entry in entries:
+            marker = " ← you" if entry.user_id == self.user.id else ""
+            response.append(
+                f"{medals.get(entry.rank, f'{entry.rank}.')} {entry.username} - "
+                f"{format_value(board, entry.value)}{marker}"
+            )
+        return "\n".join(response)
+
+    def handle_notifications(self, state=None, kind=None):
+        """Show or change which alerts go into the user's digests"""
+        preferences = dict(self.user.notification_preferences or {})
+        if state:
+            enabled = state.lower() == 'on'
+            if kind is None:
+                self.user.notifications_enabled = enabled
+            elif kind.lower() in KINDS:
+                preferences[kind.lower()] = enabled
+                self.user.notification_preferences = preferences
+                if enabled:
+                    self.user.notifications_enabled = True
+            else:
+                return f"❌ Unknown alert type. Choose from: {', '.join(KINDS)}"
+            db.session.commit()
+        
+        if not self.user.notifications_enabled:
+            return "🔕 Notifications are off. Send 'notifications on' to get daily digests again."
+        response = ["🔔 Your daily digest includes:"]
+        for name in KINDS:
+            mark = '✅' if preferences.get(name, True) is not False else '❌'
+            response.append(f"{mark} {name}")
+        quiet = preferences.get('quiet_hours')
+        if quiet:
+            response.append(f"\nQuiet hours: {quiet[0]}:00-{quiet[1]}:00 {preferences.get('timezone', 'UTC')}")
+        return "\n".join(response)
+
+    def handle_quiet(self, setting, start=None, end=None, timezone_name=None):
+        """Set or clear the hours in which no digest is sent"""
+        preferences = dict(self.user.notification_preferences or {})
+        if setting.lower() == 'off':
+            preferences.pop('quiet_hours', None)
+            self.user.notification_preferences = preferences
+            db.session.commit()
+            return "✅ Quiet hours cleared"
+        
+        start, end = int(start), int(end)
+        if start > 23 or end > 23:
+            return "❌ Hours must be between 0 and 23, e.g. 'quiet 22-7'"
+        if timezone_name:
+            try:
+                ZoneInfo(timezone_name)
+            except (ZoneInfoNotFoundError, ValueError):
+                return f"❌ Unknown timezone '{timezone_name}'. Use a name like Europe/Berlin"
+            preferences['timezone'] = timezone_name
+        preferences['quiet_hours'] = [start, end]
+        self.user.notification_preferences = preferences
+        db.session.commit()
+        return f"✅ No digests between {start}:00 and {end}:00 {preferences.get('timezone', 'UTC')}"
+
     def handle_stats(self, plant_name=None):
         """Get detailed growing statistics"""
         if plant_name:
             return self._get_plant_stats(plant_name)
         
-        # Overall stats
-        completed_grows = Plant.query.filter_by(
-            owner_id=self.user.id,
-            is_archived=True
-        ).all()
-        
-        successful_grows = sum(1 for p in completed_grows if p.archive_reason == 'harvested')
-        total_grows = len(completed_grows)
+        # Overall stats, counted by the database
+        grows = grow_counts()
+        counts = db.session.query(grows.c.grows, grows.c.harvests).filter(
+            grows.c.user_id == self.user.id
+        ).first()
+        total_grows, successful_grows = counts or (0, 0)
         success_rate = (successful_grows / total_grows * 100) if total_grows > 0 else 0
         
         unique_strains = db.session.query(func.count(func.distinct(Plant.strain))).\
@@ -535,58 +675,65 @@ class SignalCommandHandler:
 
     def _get_plant_stats(self, plant_name):
         """Get detailed statistics for a specific plant"""
-        plant = Plant.query.filter_by(owner_id=self.user.id, name=plant_name.strip()).first()
+        plant, error = plant_name_resolver().resolve(self.user.id, plant_name)
         if not plant:
-            return f"❌ Plant '{plant_name}' not found"
+            return error
         
-        growth_data = GrowthData.query.filter_by(plant_id=plant.id).\
-            order_by(GrowthData.timestamp.desc()).all()
-        
-        if not growth_data:
+        summary = growth_stats(plant.id)
+        if not summary['readings']:
             return f"No growth data available for {plant.name}"
         
-        # Calculate statistics
-        heights = [d.height for d in growth_data if d.height]
-        temps = [d.temperature for d in growth_data if d.temperature]
-        humidities = [d.humidity for d in growth_data if d.humidity]
-        
         stats = [
             f"📊 Statistics for {plant.name}",
             f"Strain: {plant.strain}",
             f"Age: {(datetime.utcnow() - plant.start_date).days} days"
         ]
         
+        heights = summary['height']
         if heights:
-            growth_rate = (heights[0] - heights[-1]) / len(heights)
+            first = GrowthData.query.filter(
+                GrowthData.plant_id == plant.id,
+                GrowthData.height.isnot(None)
+            ).order_by(GrowthData.timestamp).first()
+            last = GrowthData.query.filter(
+                GrowthData.plant_id == plant.id,
+                GrowthData.height.isnot(None)
+            ).order_by(GrowthData.timestamp.desc()).first()
+            days = (last.timestamp - first.timestamp).days
+            growth_rate = (last.height - first.height) / days if days > 0 else 0
             stats.extend([
                 f"\n📏 Growth:",
-                f"Initial Height: {heights[-1]:.1f}cm",
-                f"Current Height: {heights[0]:.1f}cm",
+                f"Initial Height: {first.height:.1f}cm",
+                f"Current Height: {last.height:.1f}cm",
                 f"Average Growth Rate: {growth_rate:.2f}cm/day"
             ])
         
+        temps = summary['temperature']
         if temps:
             stats.extend([
                 f"\n🌡️ Temperature:",
-                f"Average: {sum(temps)/len(temps):.1f}°C",
-                f"Range: {min(temps):.1f}-{max(temps):.1f}°C"
+                f"Average: {temps['avg']:.1f}°C",
+                f"Range: {temps['min']:.1f}-{temps['max']:.1f}°C"
             ])
         
+        humidities = summary['humidity']
         if humidities:
             stats.extend([
                 f"\n💧 Humidity:",
-                f"Average: {sum(humidities)/len(humidities):.1f}%",
-                f"Range: {min(humidities):.1f}-{max(humidities):.1f}%"
+                f"Average: {humidities['avg']:.1f}%",
+                f"Range: {humidities['min']:.1f}-{humidities['max']:.1f}%"
             ])
         
         # Add health scores
-        health_scores = [d.health_score for d in growth_data if d.health_score]
-        if health_scores:
+        health = summary['health_score']
+        if health:
+            latest = plant.latest_growth_data
+            current = latest.health_score if latest and latest.health_score is not None else health['avg']
             stats.extend([
                 f"\n❤️ Health:",
-                f"Current: {health_scores[0]}%",
-                f"Average: {sum(health_scores)/len(health_scores):.1f}%",
-                f"Lowest: {min(health_scores)}%"
+                f"Current: {current}%",
+                f"Average: {health['avg']:.1f}%",
+                f"Lowest: {health['min']}%"
             ])
         
         return "\n".join(stats)
@@ -595,17 +742,18 @@ class SignalService:
     def __init__(self, signal_number=None, api_url=None):
         self.signal_number = signal_number
         self.api_url = api_url
-        self.command_handler = SignalCommandHandler()
 
     def process_incoming_message(self, sender_number, message_text):
         """Process incoming messages."""
         try:
-            response = self.command_handler.handle_command(sender_number, message_text)
+            # A handler holds the sender's user, so each message gets its own;
+            # command workers run concurrently
+            response = SignalCommandHandler().handle_command(sender_number, message_text)
             return {"success": True, "message": response}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
     def send_message(self, recipient_number, message):
-        """Send a message (currently just prints to console)."""
-        print(f"Message to {recipient_number}: {message}")
+        """Queue a message for the outbound delivery worker; the caller commits."""
+        enqueue_message(recipient_number, message)
         return True
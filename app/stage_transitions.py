@@ -0,0 +1,169 @@
+"""Automatic growth stage transitions driven by a due-time heap.
+
+Plant.next_stage_at records when a plant's current stage runs out; it is
+set by Plant.advance_growth_stage from the stage's duration_days. The
+scheduler process keeps the transitions due in the near future in an
+in-memory min-heap, loaded with one range query on the indexed
+next_stage_at column, and a worker thread sleeps until exactly the
+earliest one is due. Each transition runs in its own short transaction,
+and the owner hears about it in their next notification digest.
+
+Heap entries are never removed when a plant changes; a popped entry whose
+time no longer matches the plant's next_stage_at is simply skipped.
+Changes committed in this process are pushed onto the heap straight away,
+and sync() picks up those made by other processes.
+"""
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models import Plant, GrowthStage
+from app.notifications import queue_alert
+
+_PENDING = 'stage_transitions'
+
+
+class StageTransitionQueue:
+    """Min-heap of (due time, plant id) with a worker that runs transitions when due"""
+
+    def __init__(self, app, horizon=timedelta(minutes=20), is_active=None, idle_wait=30):
+        self.app = app
+        self.horizon = horizon
+        self.is_active = is_active or (lambda: True)
+        self.idle_wait = idle_wait
+        self._heap = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self.transitions = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, plant_id, due_at):
+        """Add a transition; wakes the worker if it is now the earliest"""
+        if due_at is None or due_at > datetime.utcnow() + self.horizon:
+            return  # a later sync() loads it
+        with self._cond:
+            heapq.heappush(self._heap, (due_at, plant_id))
+            self._cond.notify()
+
+    def sync(self, now=None):
+        """Reload the transitions due within the horizon with one indexed query"""
+        now = now or datetime.utcnow()
+        due = db.session.query(Plant.next_stage_at, Plant.id).filter(
+            Plant.next_stage_at <= now + self.horizon,
+            Plant.is_archived == False
+        ).order_by(Plant.next_stage_at).all()
+        with self._cond:
+            self._heap = [tuple(row) for row in due]
+            heapq.heapify(self._heap)
+            self._cond.notify()
+        return len(due)
+
+    def next_due(self):
+        with self._cond:
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        now = now or datetime.utcnow()
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap))
+        return due
+
+    def run_due(self, now=None):
+        """Run every transition that is due; returns how many plants moved on"""
+        moved = 0
+        for due_at, plant_id in self.pop_due(now):
+            moved += self.transition(plant_id, due_at)
+        return moved
+
+    def transition(self, plant_id, due_at):
+        """Advance one plant if the entry is still current.
+
+        The new stage, the plant's next_stage_at and the owner's alert are
+        committed together, so a failure leaves the plant where it was.
+        """
+        with self.app.app_context():
+            try:
+                plant = db.session.get(Plant, plant_id)
+                if plant is None or plant.is_archived or plant.next_stage_at != due_at:
+                    self.skipped += 1
+                    return 0
+                current = plant.current_stage
+                next_stage = GrowthStage.next_stage_name(current.stage_name) if current else None
+                if next_stage is None:
+                    plant.next_stage_at = None
+                    db.session.commit()
+                    self.skipped += 1
+                    return 0
+                stage = plant.advance_growth_stage(next_stage, notes='Advanced automatically')
+                queue_alert(plant.owner, plant, 'stage', stage.id,
+                            f'{plant.name} moved on to the {next_stage} stage')
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self.failed += 1
+                self.app.logger.error('Stage transition of plant %s failed: %s', plant_id, e)
+                return 0
+        self.transitions += 1
+        return 1
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='stage-transitions', daemon=True)
+            self._thread.start()
+
+    def _delay(self):
+        if not self._heap:
+            return None
+        return (self._heap[0][0] - datetime.utcnow()).total_seconds()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                delay = self._delay()
+                while delay is None or delay > 0:
+                    self._cond.wait(delay)
+                    delay = self._delay()
+            if self.is_active():
+                self.run_due()
+            else:
+                # Another process is leader; it runs the transitions
+                time.sleep(self.idle_wait)
+
+
+def init_stage_transitions(app, **kwargs):
+    queue = StageTransitionQueue(app, **kwargs)
+    app.extensions['stage_transitions'] = queue
+    return queue
+
+
+@event.listens_for(Plant, 'after_insert')
+@event.listens_for(Plant, 'after_update')
+def _next_stage_changed(mapper, connection, target):
+    if inspect(target).attrs.next_stage_at.history.has_changes() and target.next_stage_at:
+        inspect(target).session.info.setdefault(_PENDING, []).append((target.id, target.next_stage_at))
+
+
+@event.listens_for(Session, 'after_commit')
+def _schedule_committed(session):
+    pending = session.info.pop(_PENDING, None)
+    if not pending or not has_app_context():
+        return
+    queue = current_app.extensions.get('stage_transitions')
+    if queue is not None:
+        for plant_id, due_at in pending:
+            queue.schedule(plant_id, due_at)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING, None)
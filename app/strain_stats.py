@@ -0,0 +1,135 @@
+"""Incrementally maintained strain statistics.
+
+Strain keeps counters (ratings, rating sum, completed and harvested grows,
+days from start to harvest) that are adjusted by a single UPDATE whenever a
+plant is archived, unarchived, edited or deleted and whenever a rating is
+added, changed or removed. The averages shown to users are derived from
+those counters, so reading them never touches plants or ratings.
+rebuild_strain_stats recomputes every counter from scratch for repair.
+"""
+from sqlalchemy import event, inspect
+from app.extensions import db
+from app.models import Plant, Strain, StrainRating
+
+PLANT_ATTRIBUTES = ('strain', 'is_archived', 'archive_reason', 'start_date', 'archive_date')
+
+
+def grow_outcome(strain, is_archived, archive_reason, start_date, archive_date):
+    """(strain, grows, harvested, growth days) a plant contributes, or None"""
+    if not strain or not is_archived:
+        return None
+    harvested = archive_reason == 'harvested'
+    days = (archive_date - start_date).days if harvested and archive_date and start_date else 0
+    return strain, 1, int(harvested), days
+
+
+def _apply_grow(connection, outcome, sign):
+    if outcome is None:
+        return
+    strain, grows, harvested, days = outcome
+    table = Strain.__table__
+    connection.execute(table.update().where(table.c.name == strain).values(
+        total_grows=table.c.total_grows + sign * grows,
+        successful_grows=table.c.successful_grows + sign * harvested,
+        growth_days_total=table.c.growth_days_total + sign * days
+    ))
+
+
+def _apply_rating(connection, strain_id, ratings, total):
+    table = Strain.__table__
+    connection.execute(table.update().where(table.c.id == strain_id).values(
+        total_ratings=table.c.total_ratings + ratings,
+        rating_sum=table.c.rating_sum + total
+    ))
+
+
+def _previous(state, name):
+    history = state.attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, name)
+
+
+def _keep_previous(target, value, oldvalue, initiator):
+    """No-op set listener; registering it makes the ORM load the old value"""
+
+
+# Without active history, assigning to an expired attribute records no old
+# value, and the update listeners could not tell what to subtract
+for _name in PLANT_ATTRIBUTES:
+    event.listen(getattr(Plant, _name), 'set', _keep_previous, active_history=True)
+for _name in ('strain_id', 'rating'):
+    event.listen(getattr(StrainRating, _name), 'set', _keep_previous, active_history=True)
+
+
+@event.listens_for(Plant, 'after_insert')
+def _plant_inserted(mapper, connection, target):
+    _apply_grow(connection, grow_outcome(*[getattr(target, name) for name in PLANT_ATTRIBUTES]), 1)
+
+
+@event.listens_for(Plant, 'after_delete')
+def _plant_deleted(mapper, connection, target):
+    state = inspect(target)
+    _apply_grow(connection, grow_outcome(*[_previous(state, name) for name in PLANT_ATTRIBUTES]), -1)
+
+
+@event.listens_for(Plant, 'after_update')
+def _plant_updated(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in PLANT_ATTRIBUTES):
+        return
+    before = grow_outcome(*[_previous(state, name) for name in PLANT_ATTRIBUTES])
+    after = grow_outcome(*[getattr(target, name) for name in PLANT_ATTRIBUTES])
+    if before != after:
+        _apply_grow(connection, before, -1)
+        _apply_grow(connection, after, 1)
+
+
+@event.listens_for(StrainRating, 'after_insert')
+def _rating_inserted(mapper, connection, target):
+    _apply_rating(connection, target.strain_id, 1, target.rating)
+
+
+@event.listens_for(StrainRating, 'after_delete')
+def _rating_deleted(mapper, connection, target):
+    state = inspect(target)
+    _apply_rating(connection, _previous(state, 'strain_id'), -1, -_previous(state, 'rating'))
+
+
+@event.listens_for(StrainRating, 'after_update')
+def _rating_updated(mapper, connection, target):
+    state = inspect(target)
+    old_strain, old_rating = _previous(state, 'strain_id'), _previous(state, 'rating')
+    if (old_strain, old_rating) != (target.strain_id, target.rating):
+        _apply_rating(connection, old_strain, -1, -old_rating)
+        _apply_rating(connection, target.strain_id, 1, target.rating)
+
+
+def rebuild_strain_stats(batch_size=1000):
+    """Recompute every strain's counters from plants and ratings; the caller commits."""
+    counters = {strain.name: strain for strain in Strain.query}
+    for strain in counters.values():
+        strain.total_grows = strain.successful_grows = strain.growth_days_total = 0
+        strain.total_ratings = strain.rating_sum = 0
+
+    archived = db.select(*[getattr(Plant, name) for name in PLANT_ATTRIBUTES]).where(
+        Plant.is_archived == True,
+        Plant.strain.in_(counters.keys())
+    ).execution_options(yield_per=batch_size)
+    for row in db.session.execute(archived):
+        outcome = grow_outcome(*row)
+        if outcome:
+            strain = counters[outcome[0]]
+            strain.total_grows += outcome[1]
+            strain.successful_grows += outcome[2]
+            strain.growth_days_total += outcome[3]
+
+    by_id = {strain.id: strain for strain in counters.values()}
+    for strain_id, count, total in db.session.query(
+        StrainRating.strain_id, db.func.count(StrainRating.id), db.func.sum(StrainRating.rating)
+    ).group_by(StrainRating.strain_id):
+        if strain_id in by_id:
+            by_id[strain_id].total_ratings = count
+            by_id[strain_id].rating_sum = total or 0
+
+    return len(counters)
@@ -0,0 +1,263 @@
+"""Sensor telemetry ingestion with in-memory write batching."""
+import atexit
+import hmac
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from flask import Blueprint, current_app, request, jsonify
+from app.extensions import db
+from app.ingest import READING_FIELDS, score_readings, insert_readings
+from app.models import Plant
+
+bp = Blueprint('telemetry', __name__)
+telemetry_buffer = None
+
+# Accept the short names used by the Signal data command as well
+FIELD_ALIASES = {'temp': 'temperature', 'ph': 'ph_level'}
+
+
+class BufferFull(Exception):
+    """Raised when accepting readings would exceed the queue limit."""
+
+
+class TelemetryBuffer:
+    """Buffers sensor readings and writes them to GrowthData in batches.
+
+    A flush happens when batch_size readings are queued or the oldest
+    queued reading is flush_interval seconds old, whichever comes first.
+    A batch whose write fails is retried by the next flushes, up to
+    max_attempts writes in all, while it fits within max_queue.
+    """
+
+    def __init__(self, app, batch_size=500, flush_interval=5.0, max_queue=10000, max_attempts=3):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self._readings = []
+        # (attempts so far, rows) of failed batches, and how many rows they hold
+        self._retries = []
+        self._retrying = 0
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retried = 0
+        self.flushes = 0
+        self.last_flush_at = None
+        self.last_flush_seconds = None
+        self.last_batch_size = 0
+
+    def add(self, readings):
+        """Queue readings; raises BufferFull instead of growing past max_queue."""
+        with self._lock:
+            if len(self._readings) + self._retrying + len(readings) > self.max_queue:
+                self.rejected += len(readings)
+                raise BufferFull()
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._readings.extend(readings)
+            self.accepted += len(readings)
+            depth = len(self._readings) + self._retrying
+
+        self._ensure_flusher()
+        if depth >= self.batch_size:
+            self._wake.set()
+        return depth
+
+    @property
+    def depth(self):
+        return len(self._readings) + self._retrying
+
+    def _ensure_flusher(self):
+        if self.flush_interval and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name='telemetry-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            with self._lock:
+                due = self._oldest is not None and (
+                    len(self._readings) >= self.batch_size
+                    or time.monotonic() - self._oldest >= self.flush_interval
+                )
+            if due:
+                self.flush()
+
+    def flush(self):
+        """Write queued readings to the database, batch_size rows at a time."""
+        with self._flush_lock:
+            with self._lock:
+                readings, self._readings, self._oldest = self._readings, [], None
+                retries, self._retries, self._retrying = self._retries, [], 0
+            if not readings and not retries:
+                return 0
+
+            batches = retries + [
+                (0, readings[start:start + self.batch_size])
+                for start in range(0, len(readings), self.batch_size)
+            ]
+            started = time.perf_counter()
+            written = 0
+            with self.app.app_context():
+                for attempts, rows in batches:
+                    count = self._write_batch(rows)
+                    if count is None:
+                        self._retry(rows, attempts + 1)
+                    else:
+                        written += count
+
+            self.flushes += 1
+            self.last_flush_at = datetime.utcnow()
+            self.last_flush_seconds = time.perf_counter() - started
+            self.last_batch_size = len(readings)
+            return written
+
+    def _write_batch(self, rows):
+        """Write one batch; returns the rows written, or None when the write failed"""
+        plants = {
+            plant.id: plant
+            for plant in Plant.query.filter(Plant.id.in_({row['plant_id'] for row in rows}))
+        }
+        known = [row for row in rows if row['plant_id'] in plants]
+        self.dropped += len(rows) - len(known)
+        if not known:
+            return 0
+
+        try:
+            score_readings(known, plants)
+            insert_readings(known, plants)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self.app.logger.warning('Telemetry flush of %d readings failed: %s', len(known), e)
+            return None
+
+        self.flushed += len(known)
+        return len(known)
+
+    def _retry(self, rows, attempts):
+        """Keep a failed batch for the next flush, or drop it once out of attempts or room"""
+        with self._lock:
+            room = self.max_queue - len(self._readings) - self._retrying
+            if attempts < self.max_attempts and len(rows) <= room:
+                self._retries.append((attempts, rows))
+                self._retrying += len(rows)
+                self.retried += len(rows)
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+                return
+        self.failed += len(rows)
+        self.app.logger.error('Telemetry flush dropped %d readings after %d failed attempts',
+                              len(rows), attempts)
+
+    def metrics(self):
+        with self._lock:
+            depth = len(self._readings) + self._retrying
+            oldest_age = time.monotonic() - self._oldest if self._oldest else None
+        return {
+            'queue_depth': depth,
+            'max_queue': self.max_queue,
+            'queue_utilization': depth / self.max_queue if self.max_queue else None,
+            'oldest_reading_age': oldest_age,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'flushed': self.flushed,
+            'dropped': self.dropped,
+            'retried': self.retried,
+            'failed': self.failed,
+            'flushes': self.flushes,
+            'last_flush_at': self.last_flush_at.isoformat() if self.last_flush_at else None,
+            'last_flush_seconds': self.last_flush_seconds,
+            'last_batch_size': self.last_batch_size
+        }
+
+
+def init_telemetry(app):
+    global telemetry_buffer
+    telemetry_buffer = TelemetryBuffer(
+        app,
+        batch_size=app.config.get('TELEMETRY_BATCH_SIZE', 500),
+        flush_interval=app.config.get('TELEMETRY_FLUSH_INTERVAL', 5.0),
+        max_queue=app.config.get('TELEMETRY_MAX_QUEUE', 10000),
+        max_attempts=app.config.get('TELEMETRY_MAX_ATTEMPTS', 3)
+    )
+    # Do not lose buffered readings on a clean shutdown
+    atexit.register(telemetry_buffer.flush)
+
+
+def parse_reading(line):
+    """Turn one NDJSON line into a reading row; raises ValueError when invalid."""
+    data = json.loads(line)
+    if not isinstance(data, dict):
+        raise ValueError('Reading must be an object')
+
+    row = {'plant_id': int(data['plant_id'])}
+    for key, value in data.items():
+        field = FIELD_ALIASES.get(key, key)
+        if field in READING_FIELDS:
+            row[field] = None if value is None else float(value)
+    if all(row.get(field) is None for field in READING_FIELDS):
+        raise ValueError(f"Reading has none of {', '.join(READING_FIELDS)}")
+    for field in READING_FIELDS:
+        row.setdefault(field, None)
+
+    timestamp = data.get('timestamp')
+    if timestamp:
+        timestamp = datetime.fromisoformat(timestamp)
+        if timestamp.tzinfo:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    row['timestamp'] = timestamp or datetime.utcnow()
+    return row
+
+
+def verify_telemetry_key():
+    expected = current_app.config.get('TELEMETRY_API_KEY')
+    provided = request.headers.get('X-Telemetry-Key', '')
+    return bool(expected) and hmac.compare_digest(provided, expected)
+
+
+@bp.route('/api/telemetry', methods=['POST'])
+def ingest_telemetry():
+    """Accept a newline-delimited JSON batch of sensor readings"""
+    if not verify_telemetry_key():
+        return jsonify({'error': 'Invalid telemetry key'}), 401
+
+    readings, errors = [], []
+    for number, line in enumerate(request.get_data(as_text=True).splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            readings.append(parse_reading(line))
+        except (ValueError, KeyError, TypeError) as e:
+            errors.append({'line': number, 'error': str(e)})
+
+    try:
+        depth = telemetry_buffer.add(readings) if readings else telemetry_buffer.depth
+    except BufferFull:
+        response = jsonify({'error': 'Telemetry queue is full', 'queue_depth': telemetry_buffer.depth})
+        response.headers['Retry-After'] = str(int(telemetry_buffer.flush_interval) or 1)
+        return response, 503
+
+    return jsonify({
+        'accepted': len(readings),
+        'errors': errors,
+        'queue_depth': depth
+    }), 202
+
+
+@bp.route('/api/telemetry/metrics', methods=['GET'])
+def telemetry_metrics():
+    if not verify_telemetry_key():
+        return jsonify({'error': 'Invalid telemetry key'}), 401
+    return jsonify(telemetry_buffer.metrics())
@@ -0,0 +1,44 @@
+"""Keyset pagination over a plant's timeline tables."""
+from datetime import datetime
+from app.extensions import db
+from app.models import Watering, Note, Milestone, PlantImage
+
+TIMELINES = {
+    'waterings': Watering,
+    'notes': Note,
+    'milestones': Milestone,
+    'images': PlantImage
+}
+
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(row):
+    """Build an opaque cursor pointing just past row."""
+    return f"{row.timestamp.isoformat()}_{row.id}"
+
+
+def decode_cursor(cursor):
+    """Split a cursor into its (timestamp, id) keyset; raises ValueError if malformed."""
+    timestamp, row_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(timestamp), int(row_id)
+
+
+def timeline_page(model, plant_id, cursor=None, limit=20):
+    """Return (rows, next_cursor) for the newest rows of model older than cursor.
+
+    Rows are ordered by (timestamp, id) descending so the page boundary is
+    stable even when several rows share a timestamp.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = model.query.filter(model.plant_id == plant_id)
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(db.or_(
+            model.timestamp < timestamp,
+            db.and_(model.timestamp == timestamp, model.id < row_id)
+        ))
+
+    rows = query.order_by(model.timestamp.desc(), model.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
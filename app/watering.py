@@ -0,0 +1,149 @@
+"""Set-based watering checks used by the scheduler.
+
+Each plant also carries an adaptive estimate of how often it is watered:
+an exponentially weighted mean and variance of the intervals between its
+waterings (Plant.watering_interval_mean/var, in hours). A watering added
+after the latest one updates the estimate in O(1); edits, deletes and
+backdated waterings refit it from the plant's last WATERING_MODEL_WINDOW
+waterings, beyond which older intervals carry no measurable weight. The
+prediction is stored in Plant.next_watering_due; Plant.watering_alerted_at
+records when the watering check announced it and is cleared whenever the
+prediction moves. Finding the plants that are due, or overdue and not yet
+announced, is a single range query on the index over both columns.
+"""
+import math
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app.extensions import db
+from app.models import Plant, User, Watering
+
+# Weight of the newest interval in the moving mean and variance
+WATERING_EWMA_ALPHA = 0.3
+# Interval assumed until a plant has been watered twice
+WATERING_DEFAULT_INTERVAL = timedelta(days=2)
+# Standard deviations of slack added to the mean before a plant is due
+WATERING_DUE_STDDEVS = 1.0
+# Waterings closer together than this count as one (topping up, double taps)
+WATERING_MIN_INTERVAL = timedelta(hours=1)
+# Waterings replayed when the estimate has to be refitted
+WATERING_MODEL_WINDOW = 20
+
+
+class WateringCheckMetrics:
+    """Counters collected during a single watering check run."""
+
+    def __init__(self):
+        self.started_at = datetime.utcnow()
+        self.finished_at = None
+        self.wall_time = None
+        self.plants_due = 0
+        self.notifications_queued = 0
+        self._clock = time.perf_counter()
+
+    def finish(self):
+        self.finished_at = datetime.utcnow()
+        self.wall_time = time.perf_counter() - self._clock
+        return self
+
+    def to_dict(self):
+        return {
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'wall_time': self.wall_time,
+            'plants_due': self.plants_due,
+            'notifications_queued': self.notifications_queued
+        }
+
+
+def last_watered_subquery():
+    """Latest watering timestamp per plant."""
+    return db.session.query(
+        Watering.plant_id.label('plant_id'),
+        func.max(Watering.timestamp).label('last_watered')
+    ).group_by(Watering.plant_id).subquery()
+
+
+def ewma_update(mean, var, interval, alpha=WATERING_EWMA_ALPHA):
+    """Fold one interval (hours) into an exponentially weighted mean and variance"""
+    if mean is None:
+        return interval, 0.0
+    diff = interval - mean
+    increment = alpha * diff
+    return mean + increment, (1 - alpha) * ((var or 0.0) + diff * increment)
+
+
+def predict_next_watering(plant):
+    """When the plant is expected to need water again, or None if never watered"""
+    if plant.last_watered_at is None:
+        return None
+    if plant.watering_interval_mean is None:
+        return plant.last_watered_at + WATERING_DEFAULT_INTERVAL
+    hours = plant.watering_interval_mean + WATERING_DUE_STDDEVS * math.sqrt(plant.watering_interval_var or 0.0)
+    return plant.last_watered_at + timedelta(hours=hours)
+
+
+def update_watering_due(plant):
+    """Store the plant's prediction, re-arming the watering alert if it moved"""
+    due = predict_next_watering(plant)
+    if due != plant.next_watering_due:
+        plant.next_watering_due = due
+        plant.watering_alerted_at = None
+
+
+def observe_watering(plant, timestamp):
+    """Update the plant's cache and interval estimate for a new watering"""
+    last = plant.last_watered_at
+    if last is not None and timestamp < last:
+        # Backdated: the intervals on either side of it change
+        return refit_watering_model(plant)
+
+    if last is not None and timestamp - last >= WATERING_MIN_INTERVAL:
+        plant.watering_interval_mean, plant.watering_interval_var = ewma_update(
+            plant.watering_interval_mean,
+            plant.watering_interval_var,
+            (timestamp - last).total_seconds() / 3600
+        )
+    plant.last_watered_at = timestamp
+    update_watering_due(plant)
+
+
+def refit_watering_model(plant, window=WATERING_MODEL_WINDOW):
+    """Recompute the cache and estimate from the plant's latest waterings"""
+    timestamps = [row[0] for row in db.session.query(Watering.timestamp).filter(
+        Watering.plant_id == plant.id
+    ).order_by(Watering.timestamp.desc()).limit(window)]
+    timestamps.reverse()
+
+    mean, var, previous = None, None, None
+    for timestamp in timestamps:
+        if previous is not None and timestamp - previous >= WATERING_MIN_INTERVAL:
+            mean, var = ewma_update(mean, var, (timestamp - previous).total_seconds() / 3600)
+        previous = timestamp
+
+    plant.watering_interval_mean = mean
+    plant.watering_interval_var = var
+    plant.last_watered_at = timestamps[-1] if timestamps else None
+    update_watering_due(plant)
+
+
+def iter_due_plants(end, batch_size=500, metrics=None):
+    """Yield (plant, owner, due) for active plants due before end and not yet announced.
+
+    Overdue plants stay in the result until the caller sets
+    watering_alerted_at, however long ago they fell due. One range query on
+    the (watering_alerted_at, next_watering_due) index, joined to the owners
+    and streamed in batches.
+    """
+    query = db.select(Plant, User).join(
+        User, User.id == Plant.owner_id
+    ).filter(
+        Plant.watering_alerted_at.is_(None),
+        Plant.next_watering_due < end,
+        Plant.is_archived == False
+    ).order_by(Plant.next_watering_due).execution_options(yield_per=batch_size)
+
+    for plant, owner in db.session.execute(query):
+        if metrics is not None:
+            metrics.plants_due += 1
+        yield plant, owner, plant.next_watering_due
@@ -1,16 +1,30 @@
-from flask import Blueprint, request, jsonify
+import hashlib
+import hmac
+from flask import Blueprint, current_app, request, jsonify
 from app.extensions import db
 from app.signal_service import SignalService
+from app.inbound import InboundDispatcher, message_key, store_message
 
 bp = Blueprint('webhook', __name__)
 signal_service = None
+inbound_dispatcher = None
 
 def init_signal_service(app):
-    global signal_service
+    global signal_service, inbound_dispatcher
     signal_service = SignalService(
         app.config.get('SIGNAL_BOT_NUMBER'),
         app.config.get('SIGNAL_API_URL')
     )
+    # Worker threads start with the first queued message
+    inbound_dispatcher = InboundDispatcher(
+        app,
+        signal_service,
+        workers=app.config.get('SIGNAL_WEBHOOK_WORKERS', 4),
+        queue_size=app.config.get('SIGNAL_WEBHOOK_QUEUE_SIZE', 1000),
+        sweep_interval=app.config.get('SIGNAL_WEBHOOK_SWEEP_SECONDS', 30),
+        claim_timeout=app.config.get('SIGNAL_WEBHOOK_CLAIM_TIMEOUT', 300),
+        retention_days=app.config.get('SIGNAL_WEBHOOK_RETENTION_DAYS', 7)
+    )
 
 def verify_signal_signature(signature, payload):
     """Verify webhook signature from Signal"""
@@ -28,9 +42,9 @@ def verify_signal_signature(signature, payload):
 @bp.route('/webhook/signal', methods=['POST'])
 def signal_webhook():
     """Handle incoming Signal messages"""
-    # Verify webhook signature if provided
-    signature = request.headers.get('X-Signal-Signature')
-    if signature and not verify_signal_signature(signature, request.get_data()):
+    # Once a secret is configured, unsigned requests are rejected too
+    signature = request.headers.get('X-Signal-Signature', '')
+    if not verify_signal_signature(signature, request.get_data()):
         return jsonify({'error': 'Invalid signature'}), 401
 
     if not signal_service:
@@ -45,6 +59,14 @@ def signal_webhook():
     
     if not sender or not message:
         return jsonify({"error": "Missing sender or message"}), 400
-        
-    response = signal_service.process_incoming_message(sender, message)
-    return jsonify(response)
+    
+    if not current_app.config.get('SIGNAL_WEBHOOK_ASYNC'):
+        response = signal_service.process_incoming_message(sender, message)
+        return jsonify(response)
+    
+    # Acknowledge right away; the reply is sent by a command worker
+    message_id = message_key(data, request.get_data())
+    if store_message(message_id, sender, message):
+        inbound_dispatcher.submit(sender)
+        return jsonify({'queued': True, 'message_id': message_id}), 202
+    return jsonify({'queued': False, 'duplicate': True, 'message_id': message_id}), 202
@@ -0,0 +1,89 @@
+"""Replay a corpus of Signal messages through the command dispatcher.
+
+Reports messages per second for routing alone (the old linear regex scan
+against the keyword dispatcher) and for full handling against a throwaway
+SQLite database seeded with the plants the corpus refers to.
+
+    python benchmarks/signal_dispatch.py [corpus] [--repeat N]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.extensions import db
+from app.models import User, Plant
+from app.signal_service import SignalCommandHandler
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'signal_corpus.txt')
+
+
+def linear_dispatch(message_text):
+    """The previous routing: try every uncompiled pattern in order"""
+    for command, pattern in SignalCommandHandler.COMMANDS.items():
+        match = re.match(pattern, message_text)
+        if match:
+            return command, match
+    return None, None
+
+
+def rate(label, count, seconds):
+    print(f'{label:<28} {count:>8} messages  {count / seconds:>12,.0f} msg/s')
+
+
+def bench_routing(messages, repeat):
+    messages = [m.lower().strip() for m in messages] * repeat
+    for label, dispatch in (('linear regex scan', linear_dispatch),
+                            ('keyword dispatch', SignalCommandHandler.dispatch)):
+        started = time.perf_counter()
+        for message in messages:
+            dispatch(message)
+        rate(label, len(messages), time.perf_counter() - started)
+
+
+def bench_handling(messages, repeat):
+    db_fd, db_path = tempfile.mkstemp()
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'})
+    try:
+        with app.app_context():
+            db.create_all()
+            user = User(username='bench', phone_number='+15550000000', signal_verified=True)
+            db.session.add(user)
+            db.session.flush()
+            for name in ('blue dream', 'northern lights'):
+                db.session.add(Plant(name=name, strain=name, owner_id=user.id))
+            db.session.commit()
+
+            handler = SignalCommandHandler()
+            handler.set_user(user)
+            replay = messages * repeat
+            started = time.perf_counter()
+            for message in replay:
+                handler.handle_message(message)
+            rate('full handling', len(replay), time.perf_counter() - started)
+    finally:
+        os.close(db_fd)
+        os.unlink(db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('corpus', nargs='?', default=DEFAULT_CORPUS)
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='times to replay the corpus for the routing benchmark')
+    args = parser.parse_args()
+
+    with open(args.corpus) as f:
+        messages = [line.rstrip('\n') for line in f if line.strip()]
+
+    bench_routing(messages, args.repeat)
+    bench_handling(messages, max(1, args.repeat // 100))
+
+
+if __name__ == '__main__':
+    main()
@@ -15,11 +15,110 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
     
+    # Number of timeline rows rendered per page on the plant profile
+    TIMELINE_PAGE_SIZE = 20
+    
+    # Number of public group grows shown per dashboard page
+    DASHBOARD_PUBLIC_PAGE_SIZE = 12
+    
+    # Minutes between folds of new growth readings into the hourly/daily rollups
+    GROWTH_ROLLUP_INTERVAL_MINUTES = 5
+    GROWTH_ROLLUP_RESCAN_MINUTES = 60  # recent readings re-read every run to catch late commits and deletes
+    
+    # Community leaderboards are recomputed into a ranking table on a schedule
+    LEADERBOARD_REFRESH_MINUTES = 15
+    LEADERBOARD_SIZE = 10  # ranked users kept per board
+    LEADERBOARD_MIN_GROWS = 3  # completed grows needed to rank by success rate
+    
+    # Chat: newest messages kept in memory for connecting clients, and the
+    # page size of older history loaded on demand
+    CHAT_HISTORY_SIZE = 100
+    CHAT_PAGE_SIZE = 50
+    
+    # Running several Socket.IO workers: point both at a Redis-compatible
+    # server so broadcasts and chat presence are shared between processes
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    PRESENCE_STORE_URL = os.environ.get('PRESENCE_STORE_URL')
+    PRESENCE_HEARTBEAT_SECONDS = 20  # a worker silent for three heartbeats loses its connections
+    CHAT_HISTORY_SYNC_SECONDS = 5  # how stale a worker's chat buffer may get
+    
+    # Seconds between batched writes of users' last_seen/is_online
+    ONLINE_STATUS_FLUSH_INTERVAL = 30
+    
+    # Scheduled jobs: every process running a scheduler competes for a lease
+    # in the database and only the holder runs jobs. Run them in a dedicated
+    # `flask scheduler` process, or set SCHEDULER_EMBEDDED=1 to let web
+    # workers run one, started with the first request they serve.
+    SCHEDULER_EMBEDDED = os.environ.get('SCHEDULER_EMBEDDED', '0') == '1'
+    SCHEDULER_LEASE_TTL = 60  # seconds before a silent leader is replaced
+    SCHEDULER_LEASE_RENEW_SECONDS = 20
+    SCHEDULER_HISTORY_DAYS = 14  # job run history kept for monitoring
+    SCHEDULER_TICK_SECONDS = 30  # longest wait before a due job is noticed
+    
+    # Minutes between watering checks; each notifies the plants predicted to
+    # need water before the next one
+    WATERING_CHECK_INTERVAL_MINUTES = 60
+    
+    # Alerts reach each user as one Signal digest at most every
+    # NOTIFICATION_DIGEST_HOURS, outside their quiet hours; an alert already
+    # sent is not repeated within NOTIFICATION_REPEAT_HOURS
+    NOTIFICATION_DIGEST_HOURS = 24
+    NOTIFICATION_DIGEST_CHECK_MINUTES = 15
+    NOTIFICATION_REPEAT_HOURS = 72
+    NOTIFICATION_LOG_DAYS = 30  # sent alerts kept; must cover the repeat window
+    
+    # Updates of public plants are folded into one pending row per follower
+    # every FOLLOWER_FANOUT_SECONDS, walking followers in batches
+    FOLLOWER_FANOUT_SECONDS = 30
+    FOLLOWER_FANOUT_BATCH = 500
+    PLANT_EVENT_RETENTION_DAYS = 7  # fanned-out events kept
+    
+    # Minutes between reloads of upcoming growth stage transitions; each
+    # transition itself runs exactly when it is due
+    STAGE_TRANSITION_SYNC_MINUTES = 10
+    
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     
     # Signal API configuration
     SIGNAL_API_URL = 'http://localhost:8080'
+    SIGNAL_BOT_NUMBER = os.environ.get('SIGNAL_BOT_NUMBER')
+    
+    SIGNAL_WEBHOOK_SECRET = os.environ.get('SIGNAL_WEBHOOK_SECRET')
+    
+    # Inbound webhook: acknowledge with 202 and run commands on a worker pool
+    SIGNAL_WEBHOOK_ASYNC = True
+    SIGNAL_WEBHOOK_WORKERS = 4  # senders are pinned to a worker to keep their order
+    SIGNAL_WEBHOOK_QUEUE_SIZE = 1000  # senders waiting per worker
+    SIGNAL_WEBHOOK_SWEEP_SECONDS = 30  # how often pending messages are resubmitted
+    SIGNAL_WEBHOOK_CLAIM_TIMEOUT = 300  # seconds before a command claimed by a dead worker is retried
+    SIGNAL_WEBHOOK_RETENTION_DAYS = 7  # handled messages kept
+    
+    # Seconds a user's cached plant names are trusted for Signal commands
+    PLANT_NAME_CACHE_TTL = 300
+    
+    # Upper bound in seconds on how long a rendered plant status is reused
+    PLANT_STATUS_CACHE_TTL = 600
+    
+    # Outbound Signal delivery queue
+    SIGNAL_DELIVERY_INTERVAL_SECONDS = 10  # how often the worker sends due messages
+    SIGNAL_DELIVERY_BATCH = 100  # messages picked up per worker run
+    SIGNAL_COALESCE_LIMIT = 10  # messages merged into one send per recipient
+    SIGNAL_RECIPIENT_INTERVAL = 2  # minimum seconds between sends to a recipient
+    SIGNAL_MAX_ATTEMPTS = 5
+    SIGNAL_RETRY_BACKOFF = 30  # seconds before the first retry, doubled each time
+    SIGNAL_RETRY_BACKOFF_MAX = 3600
+    SIGNAL_SEND_TIMEOUT = 10
+    SIGNAL_POOL_SIZE = 10
+    SIGNAL_DELIVERY_CLAIM_TIMEOUT = 120  # seconds before messages claimed by a dead worker are sent again
+    SIGNAL_OUTBOX_RETENTION_DAYS = 7  # sent and failed messages kept
+    
+    # Sensor telemetry ingestion
+    TELEMETRY_API_KEY = os.environ.get('TELEMETRY_API_KEY')
+    TELEMETRY_BATCH_SIZE = 500  # readings per bulk insert
+    TELEMETRY_FLUSH_INTERVAL = 5.0  # seconds a reading may wait in memory
+    TELEMETRY_MAX_QUEUE = 10000  # readings buffered before requests are refused
+    TELEMETRY_MAX_ATTEMPTS = 3  # writes of a batch before its readings are dropped
     
     @staticmethod
     def init_app(app):
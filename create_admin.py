@@ -8,7 +8,7 @@ from app.models import User
 
 def create_admin():
     """Create the default admin user if it doesn't exist."""
-    app = create_app()
+    app = create_app({'SCHEDULER_EMBEDDED': False})
     
     with app.app_context():
         # Check if admin exists
@@ -2,7 +2,7 @@ from app import create_app
 from app.extensions import db
 from app.models import User
 
-app = create_app()
+app = create_app({'SCHEDULER_EMBEDDED': False})
 
 with app.app_context():
     # Check if test user already exists
@@ -3,7 +3,8 @@ from app import create_app
 from app.extensions import db
 from flask_migrate import Migrate
 
-app = create_app()
+# Maintenance commands never run the scheduled jobs themselves
+app = create_app({'SCHEDULER_EMBEDDED': False})
 migrate = Migrate(app, db)
 cli = FlaskGroup(app)
 
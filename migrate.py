@@ -3,7 +3,7 @@ from flask_migrate import Migrate
 from app.extensions import db
 from app import create_app
 
-flask_app = create_app()
+flask_app = create_app({'SCHEDULER_EMBEDDED': False})
 migrate = Migrate(flask_app, db)
 
 if __name__ == '__main__':
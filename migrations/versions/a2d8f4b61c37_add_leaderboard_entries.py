@@ -0,0 +1,33 @@
+"""Add precomputed leaderboard rankings
+
+Revision ID: a2d8f4b61c37
+Revises: f3a7c5e29d84
+Create Date: 2026-10-18 17:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2d8f4b61c37'
+down_revision = 'f3a7c5e29d84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('leaderboard_entry',
+        sa.Column('board', sa.String(length=20), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=64), nullable=True),
+        sa.Column('value', sa.Float(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('board', 'rank')
+    )
+
+
+def downgrade():
+    op.drop_table('leaderboard_entry')
@@ -0,0 +1,32 @@
+"""Add inbound_message.claimed_at for recovering stale command claims
+
+Revision ID: a7c3e9f1d284
+Revises: f6b4d2e85a19
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f1d284'
+down_revision = 'f6b4d2e85a19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'inbound_message' not in sa.inspect(bind).get_table_names():
+        return
+    with op.batch_alter_table('inbound_message', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if 'inbound_message' not in sa.inspect(bind).get_table_names():
+        return
+    with op.batch_alter_table('inbound_message', schema=None) as batch_op:
+        batch_op.drop_column('claimed_at')
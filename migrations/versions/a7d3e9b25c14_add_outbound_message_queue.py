@@ -0,0 +1,41 @@
+"""Add outbound Signal message queue
+
+Revision ID: a7d3e9b25c14
+Revises: f2c8a4e61b07
+Create Date: 2026-10-18 13:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e9b25c14'
+down_revision = 'f2c8a4e61b07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('outbound_message',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipient', sa.String(length=20), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=10), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbound_message_status_next_attempt_at', 'outbound_message',
+                    ['status', 'next_attempt_at'], unique=False)
+    op.create_index('ix_outbound_message_recipient_sent_at', 'outbound_message',
+                    ['recipient', 'sent_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_outbound_message_recipient_sent_at', table_name='outbound_message')
+    op.drop_index('ix_outbound_message_status_next_attempt_at', table_name='outbound_message')
+    op.drop_table('outbound_message')
@@ -0,0 +1,28 @@
+"""Add Signal verification fields to user
+
+Revision ID: b4e1f7c93a28
+Revises: a7d3e9b25c14
+Create Date: 2026-10-18 13:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e1f7c93a28'
+down_revision = 'a7d3e9b25c14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('signal_verified', sa.Boolean(), nullable=True, server_default=sa.false()))
+        batch_op.add_column(sa.Column('signal_verification_code', sa.String(length=6), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('signal_verification_code')
+        batch_op.drop_column('signal_verified')
@@ -0,0 +1,44 @@
+"""Add scheduler leader lease and job run history
+
+Revision ID: b6e2a9d47f13
+Revises: a2d8f4b61c37
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e2a9d47f13'
+down_revision = 'a2d8f4b61c37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scheduler_lease',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('holder', sa.String(length=128), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('job_run',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.String(length=64), nullable=False),
+        sa.Column('holder', sa.String(length=128), nullable=True),
+        sa.Column('status', sa.String(length=10), nullable=False, server_default='running'),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('rows_processed', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_job_run_job_id_started_at', 'job_run', ['job_id', 'started_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_job_run_job_id_started_at', table_name='job_run')
+    op.drop_table('job_run')
+    op.drop_table('scheduler_lease')
@@ -0,0 +1,48 @@
+"""Add plant.watering_alerted_at so overdue plants are announced once
+
+Revision ID: b9e4d7a2c615
+Revises: a7c3e9f1d284
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e4d7a2c615'
+down_revision = 'a7c3e9f1d284'
+branch_labels = None
+depends_on = None
+
+
+def restore_lower_name_index():
+    # SQLite batch mode rebuilds plant and drops the expression index from d5a8c2f47b19
+    op.create_index('ix_plant_owner_id_lower_name', 'plant',
+                    ['owner_id', sa.text('lower(name)')], unique=False, if_not_exists=True)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'plant' not in sa.inspect(bind).get_table_names():
+        return
+
+    # Existing predictions start unannounced, so plants already overdue
+    # are alerted by the next watering check
+    with op.batch_alter_table('plant', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('watering_alerted_at', sa.DateTime(), nullable=True))
+        batch_op.drop_index('ix_plant_next_watering_due')
+        batch_op.create_index('ix_plant_watering_alerted_at_next_watering_due',
+                              ['watering_alerted_at', 'next_watering_due'], unique=False)
+    restore_lower_name_index()
+
+
+def downgrade():
+    bind = op.get_bind()
+    if 'plant' not in sa.inspect(bind).get_table_names():
+        return
+    with op.batch_alter_table('plant', schema=None) as batch_op:
+        batch_op.drop_index('ix_plant_watering_alerted_at_next_watering_due')
+        batch_op.create_index('ix_plant_next_watering_due', ['next_watering_due'], unique=False)
+        batch_op.drop_column('watering_alerted_at')
+    restore_lower_name_index()
@@ -0,0 +1,35 @@
+"""Add growth_data indexes for the rollup rescan and watermark tail
+
+Revision ID: c2f8a6d4e917
+Revises: b9e4d7a2c615
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f8a6d4e917'
+down_revision = 'b9e4d7a2c615'
+branch_labels = None
+depends_on = None
+
+ROLLUP_INDEXES = [
+    ('ix_growth_data_timestamp', ['timestamp']),
+    ('ix_growth_data_plant_id_id', ['plant_id', 'id']),
+]
+
+
+def upgrade():
+    if 'growth_data' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+    for name, columns in ROLLUP_INDEXES:
+        op.create_index(name, 'growth_data', columns, unique=False)
+
+
+def downgrade():
+    if 'growth_data' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+    for name, columns in reversed(ROLLUP_INDEXES):
+        op.drop_index(name, table_name='growth_data')
@@ -0,0 +1,64 @@
+"""Add cached timeline pointers to Plant
+
+Revision ID: c3d91e5a7f20
+Revises: bea408b98712
+Create Date: 2026-10-18 10:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d91e5a7f20'
+down_revision = 'bea408b98712'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('plant', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_watered_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('last_note_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('last_note_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('latest_growth_data_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_plant_last_note', 'note', ['last_note_id'], ['id'])
+        batch_op.create_foreign_key('fk_plant_latest_growth_data', 'growth_data', ['latest_growth_data_id'], ['id'])
+
+    # Backfill the cached pointers from the existing timeline rows
+    op.execute("""
+        UPDATE plant SET
+            last_watered_at = (
+                SELECT MAX(watering.timestamp) FROM watering
+                WHERE watering.plant_id = plant.id
+            ),
+            last_note_id = (
+                SELECT note.id FROM note
+                WHERE note.plant_id = plant.id
+                ORDER BY note.timestamp DESC, note.id DESC LIMIT 1
+            ),
+            last_note_at = (
+                SELECT MAX(note.timestamp) FROM note
+                WHERE note.plant_id = plant.id
+            )
+    """)
+
+    inspector = sa.inspect(op.get_bind())
+    if 'growth_data' in inspector.get_table_names():
+        op.execute("""
+            UPDATE plant SET latest_growth_data_id = (
+                SELECT growth_data.id FROM growth_data
+                WHERE growth_data.plant_id = plant.id
+                ORDER BY growth_data.timestamp DESC, growth_data.id DESC LIMIT 1
+            )
+        """)
+
+
+def downgrade():
+    with op.batch_alter_table('plant', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_plant_latest_growth_data', type_='foreignkey')
+        batch_op.drop_constraint('fk_plant_last_note', type_='foreignkey')
+        batch_op.drop_column('latest_growth_data_id')
+        batch_op.drop_column('last_note_at')
+        batch_op.drop_column('last_note_id')
+        batch_op.drop_column('last_watered_at')
@@ -0,0 +1,77 @@
+"""Add plant.next_stage_at for scheduled growth stage transitions
+
+Revision ID: c4f9b2e86a51
+Revises: b6e2a9d47f13
+Create Date: 2026-10-18 18:40:00.000000
+
+"""
+from datetime import timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f9b2e86a51'
+down_revision = 'b6e2a9d47f13'
+branch_labels = None
+depends_on = None
+
+# Stage durations when this revision was written; stages without a
+# successor are not scheduled
+STAGE_DURATIONS = {'germination': 7, 'seedling': 14, 'vegetative': 28}
+
+
+def restore_lower_name_index():
+    # SQLite batch mode rebuilds plant and drops the expression index from d5a8c2f47b19
+    op.create_index('ix_plant_owner_id_lower_name', 'plant',
+                    ['owner_id', sa.text('lower(name)')], unique=False, if_not_exists=True)
+
+
+def upgrade():
+    bind = op.get_bind()
+    tables = sa.inspect(bind).get_table_names()
+    if 'plant' not in tables:
+        return
+
+    with op.batch_alter_table('plant', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('next_stage_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_plant_next_stage_at', ['next_stage_at'], unique=False)
+    restore_lower_name_index()
+
+    if 'growth_stage' not in tables:
+        return
+    plant = sa.table('plant',
+        sa.column('id', sa.Integer),
+        sa.column('current_stage_id', sa.Integer),
+        sa.column('is_archived', sa.Boolean),
+        sa.column('next_stage_at', sa.DateTime)
+    )
+    stage = sa.table('growth_stage',
+        sa.column('id', sa.Integer),
+        sa.column('stage_name', sa.String),
+        sa.column('start_date', sa.DateTime)
+    )
+    rows = bind.execute(
+        sa.select(plant.c.id, stage.c.stage_name, stage.c.start_date).join(
+            stage, stage.c.id == plant.c.current_stage_id
+        ).where(
+            sa.or_(plant.c.is_archived == sa.false(), plant.c.is_archived.is_(None)),
+            stage.c.stage_name.in_(STAGE_DURATIONS.keys())
+        )
+    ).fetchall()
+    for plant_id, stage_name, start_date in rows:
+        if start_date is None:
+            continue
+        bind.execute(plant.update().where(plant.c.id == plant_id).values(
+            next_stage_at=start_date + timedelta(days=STAGE_DURATIONS[stage_name])
+        ))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if 'plant' not in sa.inspect(bind).get_table_names():
+        return
+    with op.batch_alter_table('plant', schema=None) as batch_op:
+        batch_op.drop_index('ix_plant_next_stage_at')
+        batch_op.drop_column('next_stage_at')
+    restore_lower_name_index()
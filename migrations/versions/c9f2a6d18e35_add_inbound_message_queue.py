@@ -0,0 +1,38 @@
+"""Add inbound Signal message queue
+
+Revision ID: c9f2a6d18e35
+Revises: b4e1f7c93a28
+Create Date: 2026-10-18 14:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9f2a6d18e35'
+down_revision = 'b4e1f7c93a28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('inbound_message',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('message_id', sa.String(length=128), nullable=False),
+        sa.Column('sender', sa.String(length=20), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=10), nullable=False, server_default='pending'),
+        sa.Column('received_at', sa.DateTime(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('message_id')
+    )
+    op.create_index('ix_inbound_message_sender_status', 'inbound_message',
+                    ['sender', 'status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_inbound_message_sender_status', table_name='inbound_message')
+    op.drop_table('inbound_message')
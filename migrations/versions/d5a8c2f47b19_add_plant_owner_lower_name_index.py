@@ -0,0 +1,25 @@
+"""Add case-insensitive plant name index per owner
+
+Revision ID: d5a8c2f47b19
+Revises: c9f2a6d18e35
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8c2f47b19'
+down_revision = 'c9f2a6d18e35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_plant_owner_id_lower_name', 'plant',
+                    ['owner_id', sa.text('lower(name)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_plant_owner_id_lower_name', table_name='plant', if_exists=True)
@@ -0,0 +1,39 @@
+"""Add composite timeline indexes
+
+Revision ID: d8a2f6b41c93
+Revises: c3d91e5a7f20
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a2f6b41c93'
+down_revision = 'c3d91e5a7f20'
+branch_labels = None
+depends_on = None
+
+TIMELINE_INDEXES = [
+    ('ix_watering_plant_id_timestamp', 'watering', ['plant_id', 'timestamp']),
+    ('ix_note_plant_id_timestamp', 'note', ['plant_id', 'timestamp']),
+    ('ix_milestone_plant_id_timestamp', 'milestone', ['plant_id', 'timestamp']),
+    ('ix_plant_image_plant_id_timestamp', 'plant_image', ['plant_id', 'timestamp']),
+    ('ix_growth_data_plant_id_timestamp', 'growth_data', ['plant_id', 'timestamp']),
+    ('ix_chat_message_timestamp', 'chat_message', ['timestamp']),
+]
+
+
+def upgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    for name, table, columns in TIMELINE_INDEXES:
+        if table in tables:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    for name, table, columns in reversed(TIMELINE_INDEXES):
+        if table in tables:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,65 @@
+"""Add the adaptive watering interval estimate to plant
+
+Revision ID: d8e1f5a37c92
+Revises: c4f9b2e86a51
+Create Date: 2026-10-18 20:10:00.000000
+
+"""
+from datetime import timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8e1f5a37c92'
+down_revision = 'c4f9b2e86a51'
+branch_labels = None
+depends_on = None
+
+# The fixed threshold the watering check used before this revision; plants
+# keep it until `flask refit-watering-models` or their next watering
+DEFAULT_INTERVAL = timedelta(days=2)
+
+
+def restore_lower_name_index():
+    # SQLite batch mode rebuilds plant and drops the expression index from d5a8c2f47b19
+    op.create_index('ix_plant_owner_id_lower_name', 'plant',
+                    ['owner_id', sa.text('lower(name)')], unique=False, if_not_exists=True)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'plant' not in sa.inspect(bind).get_table_names():
+        return
+
+    with op.batch_alter_table('plant', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('watering_interval_mean', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('watering_interval_var', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('next_watering_due', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_plant_next_watering_due', ['next_watering_due'], unique=False)
+    restore_lower_name_index()
+
+    plant = sa.table('plant',
+        sa.column('id', sa.Integer),
+        sa.column('last_watered_at', sa.DateTime),
+        sa.column('next_watering_due', sa.DateTime)
+    )
+    rows = bind.execute(
+        sa.select(plant.c.id, plant.c.last_watered_at).where(plant.c.last_watered_at.isnot(None))
+    ).fetchall()
+    for plant_id, last_watered_at in rows:
+        bind.execute(plant.update().where(plant.c.id == plant_id).values(
+            next_watering_due=last_watered_at + DEFAULT_INTERVAL
+        ))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if 'plant' not in sa.inspect(bind).get_table_names():
+        return
+    with op.batch_alter_table('plant', schema=None) as batch_op:
+        batch_op.drop_index('ix_plant_next_watering_due')
+        batch_op.drop_column('next_watering_due')
+        batch_op.drop_column('watering_interval_var')
+        batch_op.drop_column('watering_interval_mean')
+    restore_lower_name_index()
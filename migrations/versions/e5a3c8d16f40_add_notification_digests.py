@@ -0,0 +1,51 @@
+"""Add notification alerts and per-user digest preferences
+
+Revision ID: e5a3c8d16f40
+Revises: d8e1f5a37c92
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a3c8d16f40'
+down_revision = 'd8e1f5a37c92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'user' in sa.inspect(bind).get_table_names():
+        with op.batch_alter_table('user', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('notification_preferences', sa.JSON(), nullable=True))
+
+    op.create_table('notification_alert',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('plant_id', sa.Integer(), nullable=True),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('alert_key', sa.String(length=64), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=10), nullable=False, server_default='pending'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.ForeignKeyConstraint(['plant_id'], ['plant.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notification_alert_status_user_id', 'notification_alert', ['status', 'user_id'], unique=False)
+    op.create_index('ix_notification_alert_user_id_sent_at', 'notification_alert', ['user_id', 'sent_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_notification_alert_user_id_sent_at', table_name='notification_alert')
+    op.drop_index('ix_notification_alert_status_user_id', table_name='notification_alert')
+    op.drop_table('notification_alert')
+
+    bind = op.get_bind()
+    if 'user' in sa.inspect(bind).get_table_names():
+        with op.batch_alter_table('user', schema=None) as batch_op:
+            batch_op.drop_column('notification_preferences')
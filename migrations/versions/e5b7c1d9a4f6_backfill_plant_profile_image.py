@@ -0,0 +1,32 @@
+"""Backfill plant profile_image_id from flagged images
+
+Revision ID: e5b7c1d9a4f6
+Revises: d8a2f6b41c93
+Create Date: 2026-10-18 11:40:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b7c1d9a4f6'
+down_revision = 'd8a2f6b41c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Images used to be marked with is_profile only; point the FK at the
+    # newest flagged image so the dashboard can join it directly
+    op.execute("""
+        UPDATE plant SET profile_image_id = (
+            SELECT plant_image.id FROM plant_image
+            WHERE plant_image.plant_id = plant.id AND plant_image.is_profile
+            ORDER BY plant_image.timestamp DESC, plant_image.id DESC LIMIT 1
+        )
+        WHERE profile_image_id IS NULL
+    """)
+
+
+def downgrade():
+    pass
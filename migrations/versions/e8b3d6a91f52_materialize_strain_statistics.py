@@ -0,0 +1,85 @@
+"""Materialize strain statistics counters
+
+Revision ID: e8b3d6a91f52
+Revises: d5a8c2f47b19
+Create Date: 2026-10-18 15:45:00.000000
+
+"""
+from collections import defaultdict
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3d6a91f52'
+down_revision = 'd5a8c2f47b19'
+branch_labels = None
+depends_on = None
+
+DETAIL_COLUMNS = [
+    ('type', sa.String(length=20)),
+    ('ideal_temp_low', sa.Float()),
+    ('ideal_temp_high', sa.Float()),
+    ('ideal_humidity_low', sa.Float()),
+    ('ideal_humidity_high', sa.Float()),
+    ('height_low', sa.Float()),
+    ('height_high', sa.Float()),
+]
+COUNTER_COLUMNS = ['total_ratings', 'rating_sum', 'total_grows', 'successful_grows', 'growth_days_total']
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if 'strain' not in inspector.get_table_names():
+        return
+    existing = {column['name'] for column in inspector.get_columns('strain')}
+
+    with op.batch_alter_table('strain', schema=None) as batch_op:
+        for name, type_ in DETAIL_COLUMNS:
+            if name not in existing:
+                batch_op.add_column(sa.Column(name, type_, nullable=True))
+        for name in COUNTER_COLUMNS:
+            if name not in existing:
+                batch_op.add_column(sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+
+    # Seed the counters; afterwards they are maintained on every write
+    plant = sa.table('plant',
+        sa.column('strain', sa.String),
+        sa.column('is_archived', sa.Boolean),
+        sa.column('archive_reason', sa.String),
+        sa.column('start_date', sa.DateTime),
+        sa.column('archive_date', sa.DateTime)
+    )
+    grows = defaultdict(lambda: [0, 0, 0])
+    for strain, reason, start_date, archive_date in bind.execute(
+        sa.select(plant.c.strain, plant.c.archive_reason, plant.c.start_date, plant.c.archive_date).where(
+            plant.c.is_archived == sa.true(), plant.c.strain.isnot(None)
+        )
+    ):
+        counters = grows[strain]
+        counters[0] += 1
+        if reason == 'harvested':
+            counters[1] += 1
+            if start_date and archive_date:
+                counters[2] += (archive_date - start_date).days
+    for strain, (total, harvested, days) in grows.items():
+        bind.execute(sa.text(
+            "UPDATE strain SET total_grows = :total, successful_grows = :harvested, "
+            "growth_days_total = :days WHERE name = :strain"
+        ), {'total': total, 'harvested': harvested, 'days': days, 'strain': strain})
+
+    bind.execute(sa.text("""
+        UPDATE strain SET
+            total_ratings = (SELECT COUNT(*) FROM strain_rating WHERE strain_rating.strain_id = strain.id),
+            rating_sum = COALESCE((SELECT SUM(rating) FROM strain_rating WHERE strain_rating.strain_id = strain.id), 0)
+    """))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if 'strain' not in sa.inspect(bind).get_table_names():
+        return
+    with op.batch_alter_table('strain', schema=None) as batch_op:
+        for name in reversed(COUNTER_COLUMNS):
+            batch_op.drop_column(name)
@@ -0,0 +1,52 @@
+"""Add hourly/daily growth data rollups
+
+Revision ID: f2c8a4e61b07
+Revises: e5b7c1d9a4f6
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8a4e61b07'
+down_revision = 'e5b7c1d9a4f6'
+branch_labels = None
+depends_on = None
+
+ROLLUP_METRICS = ('temperature', 'humidity', 'ph_level', 'height', 'health_score')
+
+
+def upgrade():
+    metric_columns = []
+    for metric in ROLLUP_METRICS:
+        metric_columns += [
+            sa.Column(f'{metric}_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column(f'{metric}_sum', sa.Float(), nullable=True),
+            sa.Column(f'{metric}_min', sa.Float(), nullable=True),
+            sa.Column(f'{metric}_max', sa.Float(), nullable=True),
+        ]
+
+    # Existing readings are folded in by the first rollup job run
+    op.create_table('growth_data_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('plant_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=4), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('readings', sa.Integer(), nullable=False, server_default='0'),
+        *metric_columns,
+        sa.ForeignKeyConstraint(['plant_id'], ['plant.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('plant_id', 'period', 'bucket_start', name='uq_growth_data_rollup_bucket')
+    )
+    op.create_table('rollup_watermark',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('last_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('rollup_watermark')
+    op.drop_table('growth_data_rollup')
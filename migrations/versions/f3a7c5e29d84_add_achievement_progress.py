@@ -0,0 +1,41 @@
+"""Add per-user achievement progress counters
+
+Revision ID: f3a7c5e29d84
+Revises: e8b3d6a91f52
+Create Date: 2026-10-18 16:30:00.000000
+
+Run `flask backfill-achievements` once afterwards to compute the counters
+from existing history.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a7c5e29d84'
+down_revision = 'e8b3d6a91f52'
+branch_labels = None
+depends_on = None
+
+COUNTERS = ['waterings', 'harvests', 'unique_strains', 'notes', 'growth_readings']
+
+
+def upgrade():
+    op.create_table('user_progress',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        *[sa.Column(name, sa.Integer(), nullable=False, server_default='0') for name in COUNTERS],
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('user_strain_harvest',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('strain', sa.String(length=64), nullable=False),
+        sa.Column('harvests', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'strain')
+    )
+
+
+def downgrade():
+    op.drop_table('user_strain_harvest')
+    op.drop_table('user_progress')
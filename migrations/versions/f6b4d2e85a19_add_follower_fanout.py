@@ -0,0 +1,57 @@
+"""Add plant events and coalesced follower updates
+
+Revision ID: f6b4d2e85a19
+Revises: e5a3c8d16f40
+Create Date: 2026-10-18 21:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b4d2e85a19'
+down_revision = 'e5a3c8d16f40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'plant_follower' in sa.inspect(bind).get_table_names():
+        op.create_index('ix_plant_follower_plant_id_id', 'plant_follower', ['plant_id', 'id'], unique=False)
+
+    op.create_table('plant_event',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('plant_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.String(length=10), nullable=False, server_default='pending'),
+        sa.Column('follower_cursor', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['plant_id'], ['plant.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_plant_event_status_id', 'plant_event', ['status', 'id'], unique=False)
+
+    op.create_table('follower_update',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('plant_id', sa.Integer(), nullable=False),
+        sa.Column('events', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_event_id', sa.Integer(), nullable=True),
+        sa.Column('summary', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.ForeignKeyConstraint(['plant_id'], ['plant.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'plant_id')
+    )
+
+
+def downgrade():
+    op.drop_table('follower_update')
+    op.drop_index('ix_plant_event_status_id', table_name='plant_event')
+    op.drop_table('plant_event')
+
+    bind = op.get_bind()
+    if 'plant_follower' in sa.inspect(bind).get_table_names():
+        op.drop_index('ix_plant_follower_plant_id_id', table_name='plant_follower')
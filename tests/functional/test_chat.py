@@ -0,0 +1,128 @@
+"""Tests for the chat history buffer and backwards pagination."""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.extensions import db, socketio
+from app.models import User, ChatMessage
+from app.chat import ChatHistory, chat_history
+
+
+@contextmanager
+def captured_selects():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def received(socket, name):
+    return [event['args'][0] for event in socket.get_received() if event['name'] == name]
+
+
+def test_history_is_served_from_the_buffer_and_paged_by_id(app, client):
+    app.config['CHAT_HISTORY_SIZE'] = 3
+    app.config['CHAT_PAGE_SIZE'] = 2
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        db.session.add_all([ChatMessage(content=f'hello {i}', user_id=user.id) for i in range(5)])
+        db.session.commit()
+        # Startup warmed an empty buffer before the messages existed
+        history = app.extensions['chat_history'] = ChatHistory(3)
+        history.warm()
+        assert [m['content'] for m in history.recent()] == ['hello 2', 'hello 3', 'hello 4']
+
+    client.post('/login', data={'username': 'test_user', 'password': 'test_password'})
+    with app.app_context(), captured_selects() as statements:
+        socket = socketio.test_client(app, flask_test_client=client)
+        connected = received(socket, 'chat_history')[0]
+    assert not [s for s in statements if 'chat_message' in s]
+    assert [m['username'] for m in connected['messages']] == ['test_user'] * 3
+
+    socket.emit('new_message', {'content': 'newest'})
+    with app.app_context():
+        assert [m['content'] for m in chat_history().recent()] == ['hello 3', 'hello 4', 'newest']
+
+    oldest = connected['messages'][0]['id']
+    with app.app_context(), captured_selects() as statements:
+        socket.emit('load_older', {'before_id': oldest})
+    page = received(socket, 'older_messages')[0]
+    assert [m['content'] for m in page['messages']] == ['hello 0', 'hello 1']
+    assert page['has_more'] is True
+    assert len([s for s in statements if 'chat_message' in s]) == 1
+
+    socket.emit('load_older', {'before_id': page['messages'][0]['id']})
+    assert received(socket, 'older_messages')[0] == {'messages': [], 'has_more': False}
+    socket.disconnect()
+    app.extensions['online_status'].flush()
+
+
+def test_presence_is_refcounted_across_tabs(app, client):
+    # Each login and socket event gets its own app context so flask_login's
+    # cached user in g does not leak from one request to the next
+    def login(test_client, username, password):
+        with app.app_context():
+            test_client.post('/login', data={'username': username, 'password': password})
+
+    def connect(test_client):
+        with app.app_context():
+            return socketio.test_client(app, flask_test_client=test_client)
+
+    def disconnect(socket):
+        with app.app_context():
+            socket.disconnect()
+
+    observer_client = app.test_client()
+    login(client, 'test_user', 'test_password')
+    login(observer_client, 'admin', 'admin_password')
+    observer = connect(observer_client)
+    first = connect(client)
+    second = connect(client)
+
+    assert [event['user']['username'] for event in received(observer, 'user_connected')] == ['test_user']
+    online = received(second, 'chat_history')[0]['online_users']
+    assert sorted(user['username'] for user in online) == ['admin', 'test_user']
+
+    disconnect(first)
+    assert received(observer, 'user_disconnected') == []
+    app.extensions['online_status'].flush()
+    with app.app_context():
+        assert User.query.filter_by(username='test_user').first().is_online
+
+    disconnect(second)
+    assert len(received(observer, 'user_disconnected')) == 1
+    app.extensions['online_status'].flush()
+    with app.app_context():
+        assert not User.query.filter_by(username='test_user').first().is_online
+    disconnect(observer)
+    app.extensions['online_status'].flush()
+
+
+def test_buffer_catches_up_with_other_workers(app):
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        history = ChatHistory(3, sync_interval=0)
+        history.warm()
+        # Posted through another process: never appended to this buffer
+        db.session.add_all([ChatMessage(content=f'elsewhere {i}', user_id=user.id) for i in range(4)])
+        db.session.commit()
+        assert [m['content'] for m in history.recent()] == ['elsewhere 1', 'elsewhere 2', 'elsewhere 3']
+
+
+def test_messages_committed_out_of_order_keep_their_position():
+    history = ChatHistory(3)
+    history.warmed = True
+    for message_id in (2, 4, 5):
+        history.append({'id': message_id})
+    # Committed before 4 but emitted after it
+    history.append({'id': 3})
+    history.append({'id': 3})
+    history.append({'id': 1})
+    assert [m['id'] for m in history.recent()] == [3, 4, 5]
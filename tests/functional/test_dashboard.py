@@ -0,0 +1,78 @@
+"""Functional tests for the dashboard loader."""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import User, Plant, PlantImage, PlantPermission
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def add_plants(owner, count, **kwargs):
+    for i in range(count):
+        plant = Plant(name=f'{owner.username} {i}', strain='Test Strain', owner_id=owner.id, **kwargs)
+        db.session.add(plant)
+        db.session.flush()
+        image = PlantImage(filename=f'{plant.id}.jpg', is_profile=True, plant_id=plant.id)
+        db.session.add(image)
+        plant.profile_image = image
+    db.session.commit()
+
+
+def dashboard_queries(app, client):
+    with app.app_context(), count_queries() as statements:
+        response = client.get('/')
+    assert response.status_code == 200
+    return len(statements)
+
+
+def test_dashboard_query_count_is_constant(app, client):
+    """Adding plants with profile images does not add dashboard queries."""
+    client.post('/login', data={'username': 'test_user', 'password': 'test_password'})
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        admin = User.query.filter_by(username='admin').first()
+        add_plants(user, 1)
+        add_plants(admin, 1, is_group_grow=True)
+    baseline = dashboard_queries(app, client)
+
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        admin = User.query.filter_by(username='admin').first()
+        add_plants(user, 5)
+        add_plants(admin, 8, is_group_grow=True)
+        shared = Plant(name='Shared', strain='Test Strain', owner_id=admin.id)
+        db.session.add(shared)
+        db.session.flush()
+        db.session.add(PlantPermission(plant_id=shared.id, user_id=user.id))
+        db.session.commit()
+
+    assert dashboard_queries(app, client) == baseline <= 4
+
+
+def test_dashboard_public_pagination(app, client):
+    """Public group grows are split into pages."""
+    app.config['DASHBOARD_PUBLIC_PAGE_SIZE'] = 3
+    client.post('/login', data={'username': 'test_user', 'password': 'test_password'})
+    with app.app_context():
+        admin = User.query.filter_by(username='admin').first()
+        add_plants(admin, 7, is_group_grow=True)
+
+    first = client.get('/').data
+    last = client.get('/?page=3').data
+    assert first.count(b'<h5 class="card-title">admin ') == 3
+    assert last.count(b'<h5 class="card-title">admin ') == 1
+    assert b'Public group grows pages' in first
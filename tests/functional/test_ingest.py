@@ -0,0 +1,99 @@
+"""Functional tests for batch watering and growth data ingestion."""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import User, Plant, PlantPermission, Watering, GrowthData
+from app.signal_service import SignalCommandHandler
+
+
+@contextmanager
+def captured_inserts():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('INSERT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def create_plants(app):
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        admin = User.query.filter_by(username='admin').first()
+        own = [Plant(name=f'Row {i}', owner_id=user.id) for i in range(3)]
+        shared = Plant(name='Shared', owner_id=admin.id)
+        private = Plant(name='Private', owner_id=admin.id)
+        db.session.add_all(own + [shared, private])
+        db.session.flush()
+        db.session.add(PlantPermission(plant_id=shared.id, user_id=user.id,
+                                       can_water=True, can_edit=False))
+        db.session.commit()
+        return [p.id for p in own], shared.id, private.id
+
+
+def test_bulk_water(app, client):
+    """One request waters many plants with a single insert and per-item results."""
+    own, shared, private = create_plants(app)
+    client.post('/login', data={'username': 'test_user', 'password': 'test_password'})
+
+    items = [{'plant_id': plant_id, 'amount': 1.5} for plant_id in own + [shared, private, 9999]]
+    items.append({'plant_id': own[0], 'amount': 'lots'})
+    with app.app_context(), captured_inserts() as inserts:
+        response = client.post('/api/plants/water', json={'waterings': items})
+
+    data = response.get_json()
+    assert data['recorded'] == 4
+    assert [r['success'] for r in data['results']] == [True] * 4 + [False] * 3
+    assert [r['error'] for r in data['results'][4:]] == ['Access denied', 'Plant not found', 'Invalid amount']
+    assert len([s for s in inserts if 'INTO watering' in s]) == 1
+
+    with app.app_context():
+        assert Watering.query.count() == 4
+        assert all(Plant.query.get(plant_id).last_watered_at for plant_id in own + [shared])
+
+    assert client.post('/api/plants/water', json={}).status_code == 400
+
+
+def test_bulk_growth_data(app, client):
+    """Readings are scored and the plants' latest reading pointers move."""
+    own, shared, private = create_plants(app)
+    client.post('/login', data={'username': 'test_user', 'password': 'test_password'})
+
+    response = client.post('/api/plants/growth-data', json={'readings': [
+        {'plant_id': own[0], 'temperature': 24, 'height': 30},
+        {'plant_id': own[1], 'humidity': 'damp'},
+        {'plant_id': shared, 'temperature': 24},
+    ]})
+    results = response.get_json()['results']
+    assert results[0]['success'] and results[0]['health_score'] == 100
+    assert results[1]['error'] == 'Invalid reading'
+    assert results[2]['error'] == 'Access denied'
+
+    with app.app_context():
+        plant = Plant.query.get(own[0])
+        assert plant.latest_growth_data.height == 30
+        assert GrowthData.query.count() == 1
+
+
+def test_signal_batch_commands(app):
+    """The Signal water and data commands accept comma separated plants."""
+    create_plants(app)
+    with app.app_context():
+        handler = SignalCommandHandler()
+        handler.set_user(User.query.filter_by(username='test_user').first())
+
+        response = handler.handle_water('Row 0, Row 1, Ghost')
+        assert 'Recorded watering for Row 0, Row 1' in response
+        assert "Plant 'Ghost' not found" in response
+        assert Watering.query.count() == 2
+
+        response = handler.handle_data('Row 0,Row 2', 'temp=25,height=12')
+        assert response.count('Updated growth data') == 2
+        assert GrowthData.query.count() == 2
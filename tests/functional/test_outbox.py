@@ -0,0 +1,124 @@
+"""Outbound Signal queue delivery against a local stub of the REST bridge."""
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from app.extensions import db
+from app.models import OutboundMessage
+from app.outbox import enqueue_message, deliver_pending, claim_messages
+
+
+class StubBridge(BaseHTTPRequestHandler):
+    """Records posted messages and answers with the next queued status code."""
+    received = []
+    statuses = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        StubBridge.received.append((self.path, json.loads(body)))
+        status = StubBridge.statuses.pop(0) if StubBridge.statuses else 201
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def bridge(app):
+    server = HTTPServer(('127.0.0.1', 0), StubBridge)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    StubBridge.received, StubBridge.statuses = [], []
+    app.config.update(
+        SIGNAL_API_URL=f'http://127.0.0.1:{server.server_port}',
+        SIGNAL_BOT_NUMBER='+10000000000',
+        SIGNAL_RECIPIENT_INTERVAL=60,
+        SIGNAL_COALESCE_LIMIT=2,
+        SIGNAL_RETRY_BACKOFF=30
+    )
+    yield StubBridge
+    server.shutdown()
+    server.server_close()
+
+
+def test_coalesces_and_rate_limits_per_recipient(app, bridge):
+    now = datetime(2026, 5, 1, 12, 0)
+    with app.app_context():
+        for text in ('one', 'two', 'three'):
+            enqueue_message('+111', text, send_after=now)
+        enqueue_message('+222', 'hello', send_after=now)
+        db.session.commit()
+
+        stats = deliver_pending(now=now)
+        assert (stats['sent'], stats['requests'], stats['deferred']) == (3, 2, 1)
+        assert bridge.received[0] == ('/v2/send', {
+            'message': 'one\n\ntwo', 'number': '+10000000000', 'recipients': ['+111']
+        })
+
+        # The third message waits for the recipient's rate limit window
+        assert deliver_pending(now=now + timedelta(seconds=30))['requests'] == 0
+        stats = deliver_pending(now=now + timedelta(seconds=61))
+        assert stats['sent'] == 1
+        assert bridge.received[-1][1]['message'] == 'three'
+        assert OutboundMessage.query.filter_by(status='sent').count() == 4
+
+
+def test_retries_with_backoff_then_gives_up(app, bridge):
+    now = datetime(2026, 5, 1, 12, 0)
+    app.config['SIGNAL_MAX_ATTEMPTS'] = 2
+    bridge.statuses = [503, 500]
+    with app.app_context():
+        message = enqueue_message('+111', 'flaky', send_after=now)
+        db.session.commit()
+
+        assert deliver_pending(now=now)['retried'] == 1
+        assert message.next_attempt_at == now + timedelta(seconds=30)
+        assert deliver_pending(now=now + timedelta(seconds=10))['requests'] == 0
+
+        assert deliver_pending(now=now + timedelta(seconds=31))['failed'] == 1
+        assert (message.status, message.attempts) == ('failed', 2)
+        assert 'HTTP 500' in message.last_error
+
+
+def test_client_errors_are_not_retried(app, bridge):
+    bridge.statuses = [400]
+    with app.app_context():
+        message = enqueue_message('+111', 'bad number')
+        db.session.commit()
+        assert deliver_pending()['failed'] == 1
+        assert message.status == 'failed'
+
+
+def test_claimed_messages_are_sent_once_and_old_ones_pruned(app, bridge):
+    now = datetime(2026, 5, 1, 12, 0)
+    with app.app_context():
+        first = enqueue_message('+111', 'taken', send_after=now)
+        second = enqueue_message('+222', 'free', send_after=now)
+        db.session.commit()
+
+        # Another worker claimed the first message and died before sending it
+        assert claim_messages([first], now)
+        assert not claim_messages([first, second], now)
+        stats = deliver_pending(now=now)
+        assert (stats['sent'], stats['requests']) == (1, 1)
+        assert [body['recipients'] for _, body in bridge.received] == [['+222']]
+
+        later = now + timedelta(seconds=app.config['SIGNAL_DELIVERY_CLAIM_TIMEOUT'])
+        assert deliver_pending(now=later)['sent'] == 1
+        assert OutboundMessage.query.filter_by(status='sent').count() == 2
+
+        failed = enqueue_message('+333', 'undeliverable')
+        failed.status, failed.created_at = 'failed', now
+        db.session.commit()
+        retention = timedelta(days=app.config['SIGNAL_OUTBOX_RETENTION_DAYS'])
+        deliver_pending(now=now + retention)
+        assert OutboundMessage.query.count() == 3
+        deliver_pending(now=now + retention + timedelta(seconds=1))
+        assert [m.body for m in OutboundMessage.query] == ['taken']
+        deliver_pending(now=later + retention + timedelta(seconds=1))
+        assert OutboundMessage.query.count() == 0
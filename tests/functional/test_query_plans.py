@@ -0,0 +1,160 @@
+"""Query plan regression tests for the timeline tables.
+
+Every SELECT issued while exercising the routes, templates and Signal
+handlers is run through EXPLAIN QUERY PLAN; none of them may fall back to
+a full scan of a timeline table or sort timeline rows in a temp b-tree.
+"""
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import (User, Plant, Watering, Note, Milestone, PlantImage,
+                        GrowthData, ChatMessage)
+from app.signal_service import SignalCommandHandler
+from app.rollups import roll_up_growth_data, growth_stats
+
+TIMELINE_TABLES = ('watering', 'note', 'milestone', 'plant_image', 'growth_data', 'chat_message')
+TIMELINE_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+"?(%s)"?\b' % '|'.join(TIMELINE_TABLES))
+
+
+@contextmanager
+def captured_selects():
+    """Collect (statement, parameters) for every SELECT sent to the database."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def plan_problems(statement, parameters):
+    """Return the query plan lines that indicate a scan or sort of a timeline table."""
+    rows = db.session.connection().exec_driver_sql(
+        'EXPLAIN QUERY PLAN ' + statement, parameters
+    ).fetchall()
+    details = [row[-1] for row in rows]
+    # Sorting is only a problem when the rows being ordered are timeline rows
+    primary_table = re.search(r'\bFROM\s+"?(\w+)', statement).group(1)
+    problems = []
+    for detail in details:
+        scanned = re.match(r'SCAN (\w+)', detail)
+        if scanned and scanned.group(1) in TIMELINE_TABLES and ' USING ' not in detail:
+            problems.append(detail)
+        elif 'TEMP B-TREE FOR ORDER BY' in detail and primary_table in TIMELINE_TABLES:
+            problems.append(detail)
+    return problems
+
+
+def assert_indexed(statements):
+    checked = 0
+    for statement, parameters in statements:
+        if not TIMELINE_PATTERN.search(statement):
+            continue
+        checked += 1
+        problems = plan_problems(statement, parameters)
+        assert not problems, f'{problems} in:\n{statement}'
+    return checked
+
+
+def seed_timeline(owner):
+    plant = Plant(name='indexed', strain='Test Strain', owner_id=owner.id)
+    db.session.add(plant)
+    db.session.flush()
+    now = datetime.utcnow()
+    for days in range(5):
+        timestamp = now - timedelta(days=days)
+        watering = Watering(plant_id=plant.id, amount=1.0, timestamp=timestamp, user_id=owner.id)
+        note = Note(content=f'note {days}', plant_id=plant.id, timestamp=timestamp, user_id=owner.id)
+        growth = GrowthData(plant_id=plant.id, timestamp=timestamp, temperature=24,
+                            humidity=50, ph_level=6.2, height=10 + days, health_score=90)
+        db.session.add_all([watering, note, growth])
+        db.session.add(Milestone(title=f'milestone {days}', plant_id=plant.id, timestamp=timestamp))
+        db.session.add(PlantImage(filename=f'{days}.jpg', plant_id=plant.id, timestamp=timestamp))
+        db.session.add(ChatMessage(content=f'hello {days}', user_id=owner.id, timestamp=timestamp))
+        plant.record_watering(watering)
+        plant.record_note(note)
+        plant.record_growth_data(growth)
+    db.session.commit()
+    return plant
+
+
+def test_web_queries_use_indexes(app, client):
+    """Dashboard, profile and timeline write routes never scan timeline tables."""
+    with app.app_context():
+        owner = User.query.filter_by(username='test_user').first()
+        plant_id = seed_timeline(owner).id
+        watering_ids = [w.id for w in Watering.query.filter_by(plant_id=plant_id).all()]
+
+    client.post('/login', data={'username': 'test_user', 'password': 'test_password'})
+
+    with app.app_context(), captured_selects() as statements:
+        assert client.get('/').status_code == 200
+        assert client.get(f'/plant/{plant_id}').status_code == 200
+        for kind in ('waterings', 'notes', 'milestones', 'images'):
+            page = client.get(f'/plant/{plant_id}/timeline/{kind}?limit=2').get_json()
+            client.get(f'/plant/{plant_id}/timeline/{kind}?cursor={page["next_cursor"]}')
+        client.post(f'/plant/{plant_id}/water', data={'amount': '1.5'})
+        client.post(f'/plant/{plant_id}/note', data={'content': 'checked'})
+        client.post(f'/plant/{plant_id}/milestone', data={'title': 'Topped'})
+        client.post(f'/watering/{watering_ids[0]}/edit',
+                    data={'amount': '2', 'nutrients': '', 'date': '2024-01-01', 'time': '08:00'})
+        client.post(f'/watering/{watering_ids[1]}/delete')
+
+    with app.app_context():
+        assert assert_indexed(statements) > 0
+
+
+def test_signal_queries_use_indexes(app):
+    """Signal status, stats and data commands never scan timeline tables."""
+    with app.app_context():
+        owner = User.query.filter_by(username='test_user').first()
+        seed_timeline(owner)
+
+        handler = SignalCommandHandler()
+        handler.set_user(owner)
+        with captured_selects() as statements:
+            handler.handle_status()
+            handler.handle_status('indexed')
+            handler.handle_stats('indexed')
+            handler.handle_water('indexed')
+            handler.handle_note('indexed', 'looks thirsty')
+            handler.handle_data('indexed', 'temp=25,height=30')
+            ChatMessage.query.order_by(ChatMessage.timestamp.desc()).limit(100).all()
+
+        assert assert_indexed(statements) > 0
+
+
+def test_rollup_queries_seek_bounded_ranges(app):
+    """The rollup job and growth stats never walk growth_data from one end."""
+    with app.app_context():
+        owner = User.query.filter_by(username='test_user').first()
+        plant = seed_timeline(owner)
+        roll_up_growth_data()
+        db.session.add(GrowthData(plant_id=plant.id, temperature=26, height=16))
+        db.session.commit()
+
+        with captured_selects() as statements:
+            roll_up_growth_data()
+            growth_stats(plant.id)
+
+        checked = 0
+        for statement, parameters in statements:
+            if not re.search(r'\bFROM\s+"?growth_data"?\b', statement):
+                continue
+            checked += 1
+            assert not plan_problems(statement, parameters), statement
+            details = [row[-1] for row in db.session.connection().exec_driver_sql(
+                'EXPLAIN QUERY PLAN ' + statement, parameters
+            )]
+            half_open = [d for d in details if re.search(r'PRIMARY KEY \(rowid[<>]\?\)', d)]
+            assert not half_open, f'{half_open} in:\n{statement}'
+        assert checked >= 3
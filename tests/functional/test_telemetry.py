@@ -0,0 +1,148 @@
+"""Functional tests for buffered sensor telemetry ingestion."""
+import json
+
+from sqlalchemy import event
+
+from app import telemetry
+from app.extensions import db
+from app.models import User, Plant, GrowthData
+
+HEADERS = {'X-Telemetry-Key': 'sensor-key', 'Content-Type': 'application/x-ndjson'}
+
+
+def setup_buffer(app, **limits):
+    app.config['TELEMETRY_API_KEY'] = 'sensor-key'
+    buffer = telemetry.telemetry_buffer
+    # Flush by hand rather than from the background thread
+    buffer.flush_interval = 0
+    for name, value in limits.items():
+        setattr(buffer, name, value)
+    return buffer
+
+
+def create_plant(app):
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        plant = Plant(name='Sensor', owner_id=user.id)
+        db.session.add(plant)
+        db.session.commit()
+        return plant.id
+
+
+def ndjson(*readings):
+    return '\n'.join(json.dumps(reading) for reading in readings)
+
+
+def test_batch_is_buffered_then_flushed(app, client):
+    """Readings are queued on ingest and written with their scores on flush."""
+    buffer = setup_buffer(app)
+    plant_id = create_plant(app)
+    body = ndjson(
+        {'plant_id': plant_id, 'timestamp': '2026-01-01T00:00:00', 'height': 10, 'temp': 24},
+        {'plant_id': plant_id, 'timestamp': '2026-01-02T00:00:00Z', 'height': 12, 'humidity': 99},
+        {'plant_id': 9999, 'height': 1}
+    ) + '\nnot json\n{"height": 3}\n' + ndjson(
+        {'plant_id': plant_id, 'timestamp': '2026-01-03T00:00:00'},
+        {'plant_id': plant_id, 'height': None, 'light': 800}
+    )
+
+    response = client.post('/api/telemetry', data=body, headers=HEADERS)
+    assert response.status_code == 202
+    data = response.get_json()
+    assert data['accepted'] == 3
+    assert [error['line'] for error in data['errors']] == [4, 5, 6, 7]
+    assert data['errors'][2]['error'] == 'Reading has none of temperature, humidity, ph_level, height'
+    assert data['queue_depth'] == 3
+
+    with app.app_context():
+        assert GrowthData.query.count() == 0
+
+    assert buffer.flush() == 2
+    metrics = client.get('/api/telemetry/metrics', headers=HEADERS).get_json()
+    assert metrics['queue_depth'] == 0
+    assert (metrics['accepted'], metrics['flushed'], metrics['dropped']) == (3, 2, 1)
+
+    with app.app_context():
+        rows = GrowthData.query.order_by(GrowthData.timestamp).all()
+        assert [row.height for row in rows] == [10, 12]
+        assert rows[1].growth_rate == 2
+        assert all(row.health_score is not None for row in rows)
+        assert Plant.query.get(plant_id).latest_growth_data_id == rows[1].id
+
+
+def test_full_queue_applies_backpressure(app, client):
+    """Requests are refused with 503 instead of growing the buffer without bound."""
+    buffer = setup_buffer(app, max_queue=2)
+    plant_id = create_plant(app)
+    body = ndjson(*[{'plant_id': plant_id, 'height': h} for h in range(3)])
+
+    response = client.post('/api/telemetry', data=body, headers=HEADERS)
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+    assert buffer.metrics()['rejected'] == 3
+    assert buffer.depth == 0
+
+
+def test_requires_key(app, client):
+    setup_buffer(app)
+    response = client.post('/api/telemetry', data='{}', headers={'X-Telemetry-Key': 'wrong'})
+    assert response.status_code == 401
+
+
+def test_failed_writes_are_retried_then_dropped(app, client, monkeypatch):
+    """A failed batch stays queued for a few flushes instead of vanishing."""
+    buffer = setup_buffer(app, max_attempts=2)
+    plant_id = create_plant(app)
+    client.post('/api/telemetry', data=ndjson({'plant_id': plant_id, 'height': 5}), headers=HEADERS)
+
+    insert_readings = telemetry.insert_readings
+    failures = [RuntimeError('database is locked')]
+
+    def flaky_insert(rows, plants):
+        if failures:
+            raise failures.pop()
+        return insert_readings(rows, plants)
+
+    monkeypatch.setattr(telemetry, 'insert_readings', flaky_insert)
+    assert buffer.flush() == 0
+    assert buffer.depth == 1 and buffer.metrics()['retried'] == 1
+    assert buffer.flush() == 1
+    with app.app_context():
+        assert GrowthData.query.count() == 1
+
+    # Out of attempts: the batch is dropped and counted
+    client.post('/api/telemetry', data=ndjson({'plant_id': plant_id, 'height': 6}), headers=HEADERS)
+    failures.extend([RuntimeError('disk full')] * 2)
+    buffer.flush()
+    buffer.flush()
+    assert buffer.depth == 0
+    assert (buffer.metrics()['failed'], buffer.flushed) == (1, 1)
+
+
+def test_batch_queries_do_not_grow_with_plants(app, client):
+    """Latest-reading pointers of all plants in a batch are read together."""
+    buffer = setup_buffer(app)
+    plant_ids = [create_plant(app) for _ in range(5)]
+
+    def selects_for(plant_ids):
+        client.post('/api/telemetry', data=ndjson(*[
+            {'plant_id': plant_id, 'height': 10} for plant_id in plant_ids
+        ]), headers=HEADERS)
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append(statement)
+
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            buffer.flush()
+        finally:
+            with app.app_context():
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return len(statements)
+
+    # Later rounds find existing latest readings to compare against
+    selects_for(plant_ids)
+    assert selects_for(plant_ids[:2]) == selects_for(plant_ids)
@@ -0,0 +1,62 @@
+"""Functional tests for the paginated plant timeline."""
+import re
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import User, Plant, Watering
+
+
+def login(client, username='test_user', password='test_password'):
+    return client.post('/login', data={'username': username, 'password': password})
+
+
+def test_timeline_pagination(app, client):
+    """The profile renders one page and the JSON endpoint walks the rest."""
+    app.config['TIMELINE_PAGE_SIZE'] = 10
+    with app.app_context():
+        owner = User.query.filter_by(username='test_user').first()
+        plant = Plant(name='Long history', strain='Test Strain', owner_id=owner.id)
+        db.session.add(plant)
+        db.session.flush()
+        start = datetime(2024, 1, 1)
+        # Pairs of waterings share a timestamp to exercise the id tiebreak
+        for i in range(25):
+            db.session.add(Watering(plant_id=plant.id, amount=float(i),
+                                    timestamp=start + timedelta(days=i // 2)))
+        db.session.commit()
+        plant_id = plant.id
+
+    login(client)
+    response = client.get(f'/plant/{plant_id}')
+    assert response.status_code == 200
+    assert len(re.findall(rb'edit-watering"\s+data-watering-id="\d+"', response.data)) == 10
+    assert b'data-kind="waterings"' in response.data
+
+    seen = []
+    cursor = None
+    while True:
+        url = f'/plant/{plant_id}/timeline/waterings'
+        if cursor:
+            url += f'?cursor={cursor}'
+        data = client.get(url).get_json()
+        seen.extend(item['id'] for item in data['items'])
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen)) == 25
+    assert client.get(f'/plant/{plant_id}/timeline/bogus').status_code == 404
+    assert client.get(f'/plant/{plant_id}/timeline/notes?cursor=nope').status_code == 400
+
+
+def test_timeline_requires_permission(app, client):
+    """Users without a permission row cannot read another user's timeline."""
+    with app.app_context():
+        owner = User.query.filter_by(username='admin').first()
+        plant = Plant(name='Private', strain='Test Strain', owner_id=owner.id)
+        db.session.add(plant)
+        db.session.commit()
+        plant_id = plant.id
+
+    login(client)
+    assert client.get(f'/plant/{plant_id}/timeline/notes').status_code == 403
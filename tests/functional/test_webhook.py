@@ -0,0 +1,135 @@
+"""Functional tests for the asynchronous Signal webhook."""
+import hashlib
+import hmac
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app import webhook_routes
+from app.extensions import db
+from app.models import User, Plant, InboundMessage, OutboundMessage
+
+
+def register_sender(app, phone='+15550000002'):
+    with app.app_context():
+        user = User(username=f'signal{phone}', phone_number=phone, signal_verified=True)
+        db.session.add(user)
+        db.session.commit()
+    return phone
+
+
+def test_webhook_acknowledges_and_deduplicates(app, client):
+    sender = register_sender(app)
+    # Keep the workers stopped so the queued state can be inspected
+    webhook_routes.inbound_dispatcher.start = lambda: None
+    payload = {'sender': sender, 'message': 'list', 'message_id': 'abc-1'}
+
+    first = client.post('/webhook/signal', json=payload)
+    retry = client.post('/webhook/signal', json=payload)
+    assert first.status_code == retry.status_code == 202
+    assert first.get_json()['queued'] and retry.get_json()['duplicate']
+
+    with app.app_context():
+        assert InboundMessage.query.count() == 1
+        assert OutboundMessage.query.count() == 0
+
+    assert webhook_routes.inbound_dispatcher.process_sender(sender) == 1
+    with app.app_context():
+        assert InboundMessage.query.one().status == 'done'
+        reply = OutboundMessage.query.one()
+        assert (reply.recipient, reply.body) == (sender, 'You have no active plants.')
+
+
+def test_worker_pool_keeps_per_sender_order(app, client):
+    senders = [register_sender(app, f'+1555000001{i}') for i in range(3)]
+    for n in range(4):
+        for sender in senders:
+            client.post('/webhook/signal', json={'sender': sender, 'message': f'note missing: {n}',
+                                                 'timestamp': f'{n}'})
+
+    deadline = time.time() + 10
+    with app.app_context():
+        while InboundMessage.query.filter(InboundMessage.status != 'done').count() and time.time() < deadline:
+            db.session.expire_all()
+            time.sleep(0.05)
+
+        assert InboundMessage.query.filter_by(status='done').count() == 12
+        for sender in senders:
+            handled = [m.id for m in InboundMessage.query.filter_by(sender=sender).order_by(InboundMessage.processed_at, InboundMessage.id)]
+            assert handled == sorted(handled)
+            assert OutboundMessage.query.filter_by(recipient=sender).count() == 4
+
+
+def test_signature_required_once_secret_is_set(app, client):
+    app.config['SIGNAL_WEBHOOK_SECRET'] = 'shh'
+    body = json.dumps({'sender': '+1', 'message': 'help'}).encode()
+    assert client.post('/webhook/signal', data=body, content_type='application/json').status_code == 401
+
+    signature = hmac.new(b'shh', body, hashlib.sha256).hexdigest()
+    webhook_routes.inbound_dispatcher.start = lambda: None
+    response = client.post('/webhook/signal', data=body, content_type='application/json',
+                           headers={'X-Signal-Signature': signature})
+    assert response.status_code == 202
+
+
+def test_claims_are_exclusive_per_sender_and_recovered(app, client):
+    sender = register_sender(app)
+    webhook_routes.inbound_dispatcher.start = lambda: None
+    for n in range(2):
+        client.post('/webhook/signal', json={'sender': sender, 'message': 'list', 'message_id': f'c-{n}'})
+    dispatcher = webhook_routes.inbound_dispatcher
+
+    with app.app_context():
+        first, second = InboundMessage.query.order_by(InboundMessage.id).all()
+        # Another process holds the sender's first message
+        assert dispatcher.claim(first.id, sender)
+        assert not dispatcher.claim(first.id, sender)
+        assert not dispatcher.claim(second.id, sender)
+    assert dispatcher.process_sender(sender) == 0
+
+    # That process died; the sweep hands its claim back
+    later = datetime.utcnow() + timedelta(seconds=dispatcher.claim_timeout + 1)
+    dispatcher.start = lambda: None
+    dispatcher.sweep(now=later)
+    assert dispatcher.process_sender(sender) == 2
+    with app.app_context():
+        assert [m.status for m in InboundMessage.query.order_by(InboundMessage.id)] == ['done', 'done']
+
+    dispatcher.sweep(now=datetime.utcnow() + timedelta(days=dispatcher.retention_days + 1))
+    with app.app_context():
+        assert InboundMessage.query.count() == 0
+
+
+def test_each_message_gets_its_own_command_handler(app):
+    alice = register_sender(app, '+15550000021')
+    bob = register_sender(app, '+15550000022')
+    with app.app_context():
+        for phone, name in ((alice, 'Alice plant'), (bob, 'Bob plant')):
+            owner = User.query.filter_by(phone_number=phone).first()
+            db.session.add(Plant(name=name, strain='Test', owner_id=owner.id))
+        db.session.commit()
+
+        service = webhook_routes.signal_service
+        replies = {}
+        barrier = threading.Barrier(2)
+
+        def run(phone):
+            with app.app_context():
+                barrier.wait()
+                replies[phone] = [service.process_incoming_message(phone, 'list')['message'] for _ in range(200)]
+
+        # Switch threads as often as possible to interleave the two senders
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=run, args=(phone,)) for phone in (alice, bob)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+    assert all('Alice plant' in reply and 'Bob' not in reply for reply in replies[alice])
+    assert all('Bob plant' in reply and 'Alice' not in reply for reply in replies[bob])
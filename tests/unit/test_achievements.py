@@ -0,0 +1,125 @@
+"""Tests for the event-driven achievement engine."""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import (User, Plant, Watering, Note, GrowthData, Achievement,
+                        UserAchievement, UserProgress, UserStrainHarvest)
+from app.achievements import backfill_achievement_progress
+from app.ingest import record_waterings
+from app.signal_service import SignalCommandHandler
+
+
+@contextmanager
+def captured_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def seed_achievements():
+    db.session.add_all([
+        Achievement(name='Hydrated', description='Water 3 times', icon='💧',
+                    requirement='waterings', requirement_value=3),
+        Achievement(name='Diarist', description='Write a note', icon='📝',
+                    requirement='notes', requirement_value=1),
+        Achievement(name='First Harvest', description='Harvest a plant', icon='🌱',
+                    requirement='harvests', requirement_value=1),
+        Achievement(name='Strain Explorer', description='Harvest 2 strains', icon='🧬',
+                    requirement='unique_strains', requirement_value=2),
+        Achievement(name='Data Nerd', description='Record 2 readings', icon='📈',
+                    requirement='growth_readings', requirement_value=2),
+    ])
+    db.session.commit()
+
+
+def earned(user):
+    return sorted(
+        ua.achievement.name for ua in UserAchievement.query.filter_by(user_id=user.id)
+    )
+
+
+def progress(user):
+    row = db.session.get(UserProgress, user.id)
+    db.session.refresh(row)
+    return (row.waterings, row.harvests, row.unique_strains, row.notes, row.growth_readings)
+
+
+def harvest(plant):
+    plant.is_archived = True
+    plant.archive_reason = 'harvested'
+
+
+def test_thresholds_are_awarded_without_rescanning(app):
+    with app.app_context():
+        seed_achievements()
+        user = User.query.filter_by(username='test_user').first()
+        plants = [Plant(name=f'P{i}', strain=strain, owner_id=user.id)
+                  for i, strain in enumerate(['Haze', 'haze ', 'Kush'])]
+        db.session.add_all(plants)
+        db.session.commit()
+
+        db.session.add(Watering(plant_id=plants[0].id, user_id=user.id, amount=1))
+        db.session.add(Note(plant_id=plants[0].id, user_id=user.id, content='hi'))
+        db.session.commit()
+        assert earned(user) == ['Diarist']
+
+        with captured_statements() as statements:
+            record_waterings(user, [{'plant_id': plants[0].id}, {'plant_id': plants[1].id}])
+        assert not [s for s in statements if 'FROM watering' in s]
+        assert earned(user) == ['Diarist', 'Hydrated']
+
+        db.session.add_all([GrowthData(plant_id=plants[2].id, height=h) for h in (1, 2)])
+        harvest(plants[0])
+        harvest(plants[1])
+        db.session.commit()
+        assert progress(user) == (3, 2, 1, 1, 2)
+        assert 'Strain Explorer' not in earned(user)
+
+        harvest(plants[2])
+        db.session.commit()
+        assert progress(user) == (3, 3, 2, 1, 2)
+        assert earned(user) == ['Data Nerd', 'Diarist', 'First Harvest', 'Hydrated', 'Strain Explorer']
+
+        plants[2].is_archived = False
+        plants[2].archive_reason = None
+        db.session.commit()
+        assert progress(user) == (3, 2, 1, 1, 2)
+        assert UserStrainHarvest.query.filter_by(user_id=user.id).count() == 1
+
+        reply = SignalCommandHandler()
+        reply.set_user(user)
+        assert '🏆 Your Achievements:' in reply.handle_achievements()
+
+
+def test_backfill_computes_counters_in_one_pass(app):
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        plant = Plant(name='Old', strain='Haze', owner_id=user.id,
+                      is_archived=True, archive_reason='harvested')
+        db.session.add(plant)
+        db.session.flush()
+        db.session.add_all([Watering(plant_id=plant.id, user_id=user.id) for _ in range(4)])
+        db.session.commit()
+        live = progress(user)
+
+        # Achievements defined after the fact are awarded by the backfill
+        seed_achievements()
+        db.session.execute(db.delete(UserProgress))
+        db.session.commit()
+        assert backfill_achievement_progress() == 1
+        db.session.commit()
+        assert progress(user) == live == (4, 1, 1, 0, 0)
+        assert earned(user) == ['First Harvest', 'Hydrated']
+
+        handler = SignalCommandHandler()
+        handler.set_user(user)
+        assert 'Strain Explorer (1/2)' in handler.handle_achievements()
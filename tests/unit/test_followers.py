@@ -0,0 +1,124 @@
+"""Tests for the fan-out of public plant updates to followers."""
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.extensions import db, socketio
+from app.followers import fan_out_events
+from app.ingest import record_waterings
+from app.models import User, Plant, Watering, PlantEvent, PlantFollower, FollowerUpdate, OutboundMessage
+from app.notifications import send_digests
+
+
+@contextmanager
+def captured_writes():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('INSERT', 'UPDATE')):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _plant(name, is_public=True):
+    owner = User.query.filter_by(username='test_user').first()
+    plant = Plant(name=name, strain='Test Strain', owner_id=owner.id, is_public=is_public)
+    db.session.add(plant)
+    db.session.flush()
+    return plant
+
+
+def _followers(plant, count):
+    users = []
+    for i in range(count):
+        user = User(username=f'fan{plant.id}_{i}', phone_number=f'+1555{plant.id:03d}{i:04d}')
+        user.set_password('secret')
+        db.session.add(user)
+        users.append(user)
+    db.session.flush()
+    db.session.add_all([PlantFollower(user_id=user.id, plant_id=plant.id) for user in users])
+    db.session.flush()
+    return users
+
+
+def _water(plant):
+    watering = Watering(plant_id=plant.id, amount=1.0)
+    db.session.add(watering)
+    plant.record_watering(watering)
+
+
+def test_only_public_plant_updates_become_events(app):
+    with app.app_context():
+        public, private = _plant('Public'), _plant('Private', is_public=False)
+        _water(public)
+        _water(private)
+        public.advance_growth_stage('seedling')
+        owner = User.query.filter_by(username='test_user').first()
+        record_waterings(owner, [{'plant_id': public.id}, {'plant_id': private.id}])
+
+        events = PlantEvent.query.order_by(PlantEvent.id).all()
+        assert [(e.plant_id, e.kind, e.body) for e in events] == [
+            (public.id, 'watering', 'Public was watered'),
+            (public.id, 'stage', 'Public entered the seedling stage'),
+            (public.id, 'watering', 'Public was watered'),
+        ]
+
+
+def test_events_are_coalesced_per_follower_in_keyset_batches(app):
+    with app.app_context():
+        hot = _plant('Hot')
+        fans = _followers(hot, 7)
+        for _ in range(3):
+            _water(hot)
+            db.session.commit()
+
+        with captured_writes() as statements:
+            stats = fan_out_events(batch_size=3)
+        assert stats == {'events': 3, 'batches': 3}
+        # Two set-based writes per batch of followers plus the event cursor
+        assert len([s for s in statements if 'follower_update' in s]) == 6
+        assert len([s for s in statements if 'plant_event' in s]) == 3
+        updates = FollowerUpdate.query.all()
+        assert len(updates) == 7 and {u.events for u in updates} == {3}
+        assert {u.summary for u in updates} == {'Hot was watered'}
+        assert PlantEvent.query.filter_by(status='pending').count() == 0
+
+        hot.advance_growth_stage('flowering')
+        fan_out_events(batch_size=3)
+        assert {u.events for u in FollowerUpdate.query} == {4}
+
+        # Each follower gets one line for the plant and the counter restarts
+        stats = send_digests(datetime.utcnow())
+        assert stats['digests'] == 7
+        body = OutboundMessage.query.filter_by(recipient=fans[0].phone_number).one().body
+        assert 'Hot entered the flowering stage (+3 more updates)' in body
+        assert {u.events for u in FollowerUpdate.query} == {0}
+
+
+def test_followers_receive_updates_in_their_socket_room(app, client):
+    with app.app_context():
+        plant = _plant('Live')
+        _followers(plant, 1)
+        db.session.commit()
+        plant_id = plant.id
+
+    with app.app_context():
+        client.post('/login', data={'username': f'fan{plant_id}_0', 'password': 'secret'})
+    with app.app_context():
+        socket = socketio.test_client(app, flask_test_client=client)
+
+    with app.app_context():
+        _water(db.session.get(Plant, plant_id))
+        db.session.commit()
+    updates = [e['args'][0] for e in socket.get_received() if e['name'] == 'plant_update']
+    assert [(u['plant_id'], u['kind']) for u in updates] == [(plant_id, 'watering')]
+
+    with app.app_context():
+        socket.disconnect()
+    app.extensions['online_status'].flush()
@@ -0,0 +1,63 @@
+"""Tests for the precomputed community leaderboards."""
+from app.extensions import db
+from app.models import User, Plant, Achievement, UserAchievement, LeaderboardEntry
+from app.leaderboard import refresh_leaderboards, leaderboard
+from app.signal_service import SignalCommandHandler
+
+
+def add_grows(user, strains, harvested):
+    for i, strain in enumerate(strains):
+        db.session.add(Plant(name=f'{user.username}-{i}', strain=strain, owner_id=user.id,
+                             is_archived=True,
+                             archive_reason='harvested' if i < harvested else 'died'))
+
+
+def test_rankings_are_precomputed_per_board(app, client):
+    with app.app_context():
+        app.config['LEADERBOARD_MIN_GROWS'] = 2
+        alice = User.query.filter_by(username='test_user').first()
+        alice.signal_verified = True
+        bob = User(username='bob')
+        bob.set_password('bob_password')
+        db.session.add(bob)
+        db.session.flush()
+        add_grows(alice, ['Haze', 'Haze', 'Kush', 'OG'], harvested=3)
+        add_grows(bob, ['Haze', 'Kush'], harvested=2)
+        badge = Achievement(name='Badge', description='x', requirement='notes', requirement_value=9)
+        db.session.add(badge)
+        db.session.flush()
+        db.session.add(UserAchievement(user_id=bob.id, achievement_id=badge.id))
+        db.session.commit()
+
+        assert refresh_leaderboards() == 7
+        db.session.commit()
+        ranked = {board: [(e.username, e.value) for e in leaderboard(board)]
+                  for board in ('harvests', 'success_rate', 'strains', 'achievements')}
+        assert ranked == {
+            'harvests': [('test_user', 3), ('bob', 2)],
+            'success_rate': [('bob', 100.0), ('test_user', 75.0)],
+            'strains': [('test_user', 2), ('bob', 2)],
+            'achievements': [('bob', 1)],
+        }
+
+        handler = SignalCommandHandler()
+        handler.set_user(alice)
+        reply = handler.handle_message('Leaderboard success')
+        assert reply.splitlines()[1:] == ['🥇 bob - 100.0%', '🥈 test_user - 75.0% ← you']
+        assert 'Unknown leaderboard' in handler.handle_message('leaderboard height')
+        assert 'Successful Harvests: 3' in handler.handle_stats()
+
+        # A refresh replaces the previous rankings wholesale
+        add_grows(bob, ['OG', 'OG'], harvested=2)
+        db.session.commit()
+        refresh_leaderboards(size=1)
+        db.session.commit()
+        assert [(e.username, e.value) for e in leaderboard('harvests')] == [('bob', 4)]
+        assert LeaderboardEntry.query.count() == 4
+
+    client.post('/login', data={'username': 'test_user', 'password': 'test_password'})
+    data = client.get('/api/leaderboard/harvests').get_json()
+    assert data['title'] == 'Harvests'
+    assert data['entries'] == [{'rank': 1, 'user_id': data['entries'][0]['user_id'],
+                                'username': 'bob', 'value': 4.0}]
+    assert client.get('/api/leaderboard/height').status_code == 404
@@ -36,3 +36,38 @@ def test_new_plant():
     assert plant.owner == user
     assert not plant.is_group_grow
     assert plant.is_public
+
+def test_plant_timeline_cache(app):
+    """Cached timeline pointers follow writes and the consistency check."""
+    from app.extensions import db
+    from app.models import Note, Watering
+    from app.commands import find_stale_plant_caches
+
+    with app.app_context():
+        owner = User.query.filter_by(username='test_user').first()
+        plant = Plant(name='Cached', strain='Test Strain', owner_id=owner.id)
+        db.session.add(plant)
+        db.session.flush()
+
+        older = Watering(plant_id=plant.id, amount=1.0, timestamp=datetime(2024, 1, 1))
+        newer = Watering(plant_id=plant.id, amount=1.0, timestamp=datetime(2024, 1, 5))
+        for watering in (newer, older):
+            db.session.add(watering)
+            plant.record_watering(watering)
+        note = Note(content='Looking good', plant_id=plant.id)
+        db.session.add(note)
+        plant.record_note(note)
+        db.session.commit()
+
+        assert plant.last_watered_at == datetime(2024, 1, 5)
+        assert plant.last_note == note
+        assert find_stale_plant_caches() == []
+
+        db.session.delete(newer)
+        db.session.commit()
+        assert find_stale_plant_caches() == [plant]
+
+        plant.refresh_timeline_cache()
+        db.session.commit()
+        assert plant.last_watered_at == datetime(2024, 1, 1)
+        assert find_stale_plant_caches() == []
@@ -0,0 +1,111 @@
+"""Tests for per-recipient notification digests."""
+from datetime import datetime, timedelta
+from itertools import count
+
+from app.extensions import db
+from app.models import User, Plant, GrowthData, NotificationAlert, OutboundMessage
+from app.notifications import queue_alert, send_digests, in_quiet_hours
+from app.signal_service import SignalCommandHandler
+
+
+_numbers = count(1)
+
+
+def _owner(name, **kwargs):
+    user = User(username=name, phone_number=f'+1555000{next(_numbers):04d}', **kwargs)
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def _plant(owner, name):
+    plant = Plant(name=name, strain='Test Strain', owner_id=owner.id)
+    db.session.add(plant)
+    db.session.flush()
+    return plant
+
+
+def test_alerts_are_sent_as_one_digest_and_not_repeated(app):
+    with app.app_context():
+        owner = _owner('grower')
+        plants = [_plant(owner, f'Plant {i}') for i in range(5)]
+        for plant in plants:
+            queue_alert(owner, plant, 'watering', 'due-1', f'{plant.name} needs watering')
+        plants[0].advance_growth_stage('flowering')
+        queue_alert(owner, plants[0], 'stage', 'flowering', 'Plant 0 moved on to the flowering stage')
+        db.session.add(GrowthData(plant_id=plants[0].id, temperature=35.0))
+        db.session.flush()
+        plants[0].refresh_latest_growth_data()
+        db.session.commit()
+
+        now = datetime.utcnow()
+        stats = send_digests(now)
+        assert stats == {'digests': 1, 'alerts': 7, 'suppressed': 0}
+        message = OutboundMessage.query.one()
+        assert message.recipient == owner.phone_number
+        assert message.body.count('needs watering') == 5
+        assert 'Temperature is high' in message.body and 'flowering stage' in message.body
+
+        # Within the window nothing more goes out
+        queue_alert(owner, plants[1], 'watering', 'due-2', 'Plant 1 needs watering')
+        db.session.commit()
+        assert send_digests(now + timedelta(hours=1))['digests'] == 0
+
+        # Next day: the new alert is sent, repeats of the sent ones are not
+        queue_alert(owner, plants[2], 'watering', 'due-1', 'Plant 2 needs watering')
+        db.session.commit()
+        stats = send_digests(now + timedelta(hours=25))
+        assert stats == {'digests': 1, 'alerts': 1, 'suppressed': 1}
+        latest = OutboundMessage.query.order_by(OutboundMessage.id.desc()).first()
+        assert 'Plant 1 needs watering' in latest.body and 'Temperature' not in latest.body
+
+
+def test_quiet_hours_and_opt_outs(app):
+    with app.app_context():
+        sleeper = _owner('sleeper', notification_preferences={'quiet_hours': [22, 7], 'timezone': 'Europe/Berlin'})
+        picky = _owner('picky', notification_preferences={'watering': False})
+        silent = _owner('silent')
+        no_phone = User.query.filter_by(username='test_user').first()
+
+        queue_alert(sleeper, _plant(sleeper, 'Night'), 'watering', 'due', 'Night needs watering')
+        assert queue_alert(picky, _plant(picky, 'Picky'), 'watering', 'due', 'Picky needs watering') is None
+        assert queue_alert(picky, None, 'stage', 'flowering', 'Picky moved on') is not None
+        queue_alert(silent, _plant(silent, 'Silent'), 'watering', 'due', 'Silent needs watering')
+        assert queue_alert(no_phone, None, 'watering', 'due', 'No phone') is None
+        silent.notifications_enabled = False
+        db.session.commit()
+
+        # 23:30 in Berlin
+        night = datetime(2026, 1, 15, 22, 30)
+        assert in_quiet_hours(sleeper, night) and not in_quiet_hours(sleeper, night + timedelta(hours=9))
+        stats = send_digests(night)
+        assert stats == {'digests': 1, 'alerts': 1, 'suppressed': 1}
+        assert [m.recipient for m in OutboundMessage.query] == [picky.phone_number]
+        assert NotificationAlert.query.filter_by(user_id=sleeper.id).one().status == 'pending'
+        assert NotificationAlert.query.filter_by(user_id=silent.id).one().status == 'suppressed'
+
+        assert send_digests(night + timedelta(hours=9))['digests'] == 1
+        assert NotificationAlert.query.filter_by(user_id=sleeper.id).one().status == 'sent'
+
+
+def test_signal_commands_change_digest_settings(app):
+    with app.app_context():
+        user = _owner('texter', signal_verified=True)
+        db.session.commit()
+        handler = SignalCommandHandler()
+        handler.set_user(user)
+
+        assert '❌ watering' in handler.handle_message('notifications off watering')
+        assert handler.handle_message('quiet 22-7 Europe/Berlin').startswith('✅')
+        assert 'Unknown timezone' in handler.handle_message('quiet 22-7 Mars/Base')
+        db.session.expire_all()
+        assert user.notification_preferences == {
+            'watering': False, 'quiet_hours': [22, 7], 'timezone': 'Europe/Berlin'
+        }
+
+        assert handler.handle_message('notifications off').startswith('🔕')
+        assert not User.query.get(user.id).notifications_enabled
+        handler.handle_message('quiet off')
+        db.session.expire_all()
+        assert 'quiet_hours' not in user.notification_preferences
@@ -0,0 +1,72 @@
+"""Tests for coalesced last_seen/is_online writes."""
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import User
+
+
+@contextmanager
+def captured_writes():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, executemany))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_status_changes_are_coalesced_into_one_batched_update(app):
+    tracker = app.extensions['online_status']
+    with app.app_context():
+        users = User.query.order_by(User.id).all()
+        with captured_writes() as statements:
+            for _ in range(50):
+                for user in users:
+                    user.update_user_online_status(True)
+            users[0].set_offline()
+        assert statements == []
+        assert tracker.status(users[0].id)[1] is False
+
+        with captured_writes() as statements:
+            assert tracker.flush() == 2
+        updates = [s for s in statements if s[0].lstrip().upper().startswith('UPDATE')]
+        assert len(updates) == 1 and updates[0][1] is True
+
+        db.session.expire_all()
+        assert [user.is_online for user in User.query.order_by(User.id)] == [False, True]
+        assert all(user.last_seen <= datetime.utcnow() for user in users)
+        assert tracker.flush() == 0
+
+
+def test_failed_flush_keeps_states_for_the_next_one(app):
+    tracker = app.extensions['online_status']
+    with app.app_context():
+        users = User.query.order_by(User.id).all()
+        users[0].set_offline()
+        users[1].update_user_online_status(True)
+
+        def failing_update(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('UPDATE'):
+                # The user comes back while the flush is under way
+                tracker.record(users[0].id, is_online=True)
+                raise RuntimeError('database is locked')
+
+        event.listen(db.engine, 'before_cursor_execute', failing_update)
+        try:
+            assert tracker.flush() == 0
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', failing_update)
+        assert tracker.status(users[0].id)[1] is True
+        assert tracker.status(users[1].id)[1] is True
+
+        assert tracker.flush() == 2
+        db.session.expire_all()
+        assert [user.is_online for user in User.query.order_by(User.id)] == [True, True]
@@ -0,0 +1,32 @@
+"""Unit tests for the per-request plant permission resolver."""
+from app.extensions import db
+from app.models import User, Plant, PlantPermission
+from app.permissions import resolve_access, resolve_access_bulk, invalidate_access
+
+
+def test_access_resolution_is_memoized(app):
+    """Rights are resolved once per request and refreshed after invalidation."""
+    with app.test_request_context():
+        user = User.query.filter_by(username='test_user').first()
+        admin = User.query.filter_by(username='admin').first()
+        own = Plant(name='Mine', owner_id=user.id)
+        shared = Plant(name='Shared', owner_id=admin.id)
+        private = Plant(name='Private', owner_id=admin.id)
+        db.session.add_all([own, shared, private])
+        db.session.flush()
+        permission = PlantPermission(plant_id=shared.id, user_id=user.id,
+                                     can_edit=False, can_water=True, can_add_notes=False)
+        db.session.add(permission)
+        db.session.commit()
+
+        access = resolve_access_bulk([own, shared, private], user)
+        assert access[own.id].is_owner and access[own.id].can_edit
+        assert access[shared.id].can_water and not access[shared.id].can_edit
+        assert not access[private.id].can_view
+        assert resolve_access(shared, user) is access[shared.id]
+
+        permission.can_edit = True
+        db.session.commit()
+        assert not resolve_access(shared, user).can_edit
+        invalidate_access(shared.id, user.id)
+        assert resolve_access(shared, user).can_edit
@@ -0,0 +1,92 @@
+"""Tests for Signal plant name resolution."""
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import User, Plant, GrowthData
+from app.plant_names import plant_name_resolver
+from app.signal_service import SignalCommandHandler
+
+
+def count_selects(statements):
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+    return before_cursor_execute
+
+
+def create_plants(names, archived=()):
+    user = User(username='namer', phone_number='+15550000003', signal_verified=True)
+    db.session.add(user)
+    db.session.flush()
+    for name in names:
+        db.session.add(Plant(name=name, owner_id=user.id, is_archived=name in archived))
+    db.session.commit()
+    return user
+
+
+def test_case_insensitive_prefix_lookup(app):
+    with app.app_context():
+        user = create_plants(['Blue Dream', 'Blueberry', 'Northern Lights', 'Old Timer'], archived=['Old Timer'])
+        resolver = plant_name_resolver()
+
+        def name_of(text):
+            plant_id, error = resolver.lookup(user.id, text)
+            return db.session.get(Plant, plant_id).name if plant_id else error
+
+        assert name_of('blue dream') == 'Blue Dream'
+        assert name_of('NORTH') == 'Northern Lights'
+        assert name_of('blueb') == 'Blueberry'
+        assert name_of('blue') == "❌ 'blue' matches several plants: Blue Dream, Blueberry"
+        assert name_of('old') == 'Old Timer'
+        assert name_of('purple') == "❌ Plant 'purple' not found"
+
+        # Later lookups are served from the cache without touching the database
+        statements = []
+        listener = count_selects(statements)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            for text in ('blue dream', 'North', 'blueb', 'nope'):
+                resolver.lookup(user.id, text)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert statements == []
+
+
+def test_cache_invalidated_on_create_rename_and_archive(app):
+    with app.app_context():
+        user = create_plants(['Basil'])
+        resolver = plant_name_resolver()
+        assert resolver.lookup(user.id, 'bas')[0]
+
+        db.session.add(Plant(name='Bastard Mint', owner_id=user.id))
+        db.session.commit()
+        assert resolver.lookup(user.id, 'bas')[0] is None
+
+        plant = Plant.query.filter_by(name='Bastard Mint').one()
+        plant.name = 'Mint'
+        db.session.commit()
+        assert resolver.lookup(user.id, 'mi')[0] == plant.id
+
+        basil = Plant.query.filter_by(name='Basil').one()
+        db.session.add(Plant(name='Basil', owner_id=user.id))
+        basil.is_archived = True
+        db.session.commit()
+        newest = Plant.query.filter_by(name='Basil', is_archived=False).one()
+        assert resolver.lookup(user.id, 'basil')[0] == newest.id
+
+
+def test_signal_commands_keep_plant_name_case(app):
+    with app.app_context():
+        user = create_plants(['Blue Dream'])
+        handler = SignalCommandHandler()
+        handler.set_user(user)
+        assert 'Recorded watering for Blue Dream' in handler.handle_message('WATER Blue Dream')
+        assert handler.handle_message('note blue: Looks Great') == '📝 Added note to Blue Dream'
+        assert Plant.query.one().last_note.content == 'Looks Great'
+        assert 'Updated growth data for Blue Dream' in handler.handle_message('data blue dream Temp=24, humidity=55')
+        reading = GrowthData.query.one()
+        assert (reading.temperature, reading.humidity) == (24.0, 55.0)
+
+        # Readings without a recognised key are rejected rather than stored empty
+        assert handler.handle_message('data blue dream colour=green').startswith('❌ Invalid data format')
+        assert GrowthData.query.count() == 1
@@ -0,0 +1,101 @@
+"""Tests for batched, cached Signal plant status rendering."""
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import User, Plant, Note, GrowthData
+from app.plant_status import plant_status_cache, render_status
+from app.signal_service import SignalCommandHandler
+
+
+@contextmanager
+def captured_selects():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def add_plants(user, count, start=0):
+    for i in range(start, start + count):
+        plant = Plant(name=f'Plant {i}', strain='Haze', owner_id=user.id)
+        db.session.add(plant)
+        db.session.flush()
+        plant.advance_growth_stage('vegetative')
+        reading = GrowthData(plant_id=plant.id, temperature=35, humidity=50, height=20 + i)
+        note = Note(content=f'note {i}', plant_id=plant.id, user_id=user.id)
+        db.session.add_all([reading, note])
+        plant.record_growth_data(reading)
+        plant.record_note(note)
+    db.session.commit()
+
+
+def status_queries(handler):
+    plant_status_cache().invalidate()
+    db.session.expire_all()
+    handler.user.id
+    with captured_selects() as statements:
+        reply = handler.handle_status()
+    return reply, len(statements)
+
+
+def test_status_query_count_is_constant(app):
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        handler = SignalCommandHandler()
+        handler.set_user(user)
+
+        add_plants(user, 3)
+        reply, few = status_queries(handler)
+        assert reply.count('🌱 Plant') == 3
+        assert 'Temperature is high (35.0°C)' in reply
+
+        add_plants(user, 12, start=3)
+        reply, many = status_queries(handler)
+        assert reply.count('🌱 Plant') == 15
+        assert many == few <= 3
+
+        # Served from the cache apart from listing the plant ids
+        with captured_selects() as statements:
+            assert handler.handle_status() == reply
+        assert len(statements) == 1
+
+
+def test_timeline_writes_invalidate_only_that_plant(app):
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        handler = SignalCommandHandler()
+        handler.set_user(user)
+        add_plants(user, 2)
+        before = handler.handle_status().split('\n\n🌱 ')
+
+        handler.handle_water('Plant 1')
+        handler.handle_note('Plant 1', 'flowering soon')
+        after = handler.handle_status().split('\n\n🌱 ')
+        assert after[0] == before[0]
+        assert 'Last watered: 0 days ago' in after[1]
+        assert 'Latest note: flowering soon' in after[1]
+        assert plant_status_cache().hits >= 1
+
+
+def test_status_valid_until_next_day_boundary(app):
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        start = datetime(2026, 1, 1, 9, 30)
+        plant = Plant(name='Clock', owner_id=user.id, start_date=start,
+                      last_watered_at=datetime(2026, 1, 10, 8, 0))
+        db.session.add(plant)
+        db.session.commit()
+
+        text, valid_until = render_status(plant, datetime(2026, 1, 10, 9, 0))
+        assert 'Age: 8 days' in text
+        assert valid_until == datetime(2026, 1, 10, 9, 30)
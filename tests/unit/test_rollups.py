@@ -0,0 +1,109 @@
+"""Tests for the hourly/daily growth data rollups."""
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import User, Plant, GrowthData, GrowthDataRollup
+from app.rollups import roll_up_growth_data, growth_stats
+from app.signal_service import SignalCommandHandler
+
+
+def add_readings(plant, start, temperatures):
+    for hour, temperature in enumerate(temperatures):
+        db.session.add(GrowthData(plant_id=plant.id, timestamp=start + timedelta(minutes=40 * hour),
+                                  temperature=temperature, height=10 + hour, health_score=90))
+    db.session.commit()
+
+
+def raw_stats(plant):
+    temps = [d.temperature for d in GrowthData.query.filter_by(plant_id=plant.id) if d.temperature is not None]
+    return {'count': len(temps), 'sum': sum(temps), 'min': min(temps), 'max': max(temps)}
+
+
+def test_rollups_match_raw_rows(app):
+    """Rolled-up buckets plus the unrolled tail agree with the raw readings."""
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        plant = Plant(name='Rolled', owner_id=user.id)
+        db.session.add(plant)
+        db.session.commit()
+
+        start = datetime(2026, 3, 1, 22, 0)
+        add_readings(plant, start, [20, 22, None, 26, 19])
+        assert roll_up_growth_data() == 5
+        assert roll_up_growth_data() == 0
+
+        days = GrowthDataRollup.query.filter_by(plant_id=plant.id, period='day').order_by('bucket_start').all()
+        assert [(d.bucket_start.day, d.readings, d.temperature_count) for d in days] == [(1, 3, 2), (2, 2, 2)]
+        assert GrowthDataRollup.query.filter_by(plant_id=plant.id, period='hour').count() == 3
+
+        # A late reading for an already rolled-up hour plus a new, unrolled one
+        add_readings(plant, start, [30])
+        add_readings(plant, start + timedelta(days=3), [15])
+
+        stats = growth_stats(plant.id)
+        expected = raw_stats(plant)
+        assert stats['readings'] == 7
+        assert {k: stats['temperature'][k] for k in expected} == expected
+        assert stats['ph_level'] is None
+
+        roll_up_growth_data()
+        assert growth_stats(plant.id) == stats
+        first_hour = GrowthDataRollup.query.filter_by(plant_id=plant.id, period='hour',
+                                                      bucket_start=start).one()
+        assert (first_hour.readings, first_hour.temperature_max) == (3, 30)
+
+
+def test_plant_stats_command_reads_rollups(app):
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        plant = Plant(name='Stats', owner_id=user.id)
+        db.session.add(plant)
+        db.session.commit()
+        add_readings(plant, datetime(2026, 3, 1), [20, 24])
+        roll_up_growth_data()
+        add_readings(plant, datetime(2026, 3, 5), [28])
+
+        handler = SignalCommandHandler()
+        handler.set_user(user)
+        reply = handler.handle_stats('Stats')
+        assert 'Average: 24.0°C' in reply
+        assert 'Range: 20.0-28.0°C' in reply
+        assert 'Initial Height: 10.0cm' in reply
+        assert 'Current Height: 10.0cm' in reply
+
+
+def test_recent_window_is_rescanned(app):
+    """Readings committed late below the watermark and recent deletes are picked up."""
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        plant = Plant(name='Late', owner_id=user.id)
+        db.session.add(plant)
+        db.session.commit()
+
+        now = datetime.utcnow()
+        recent = now - timedelta(minutes=5)
+        db.session.add_all([
+            GrowthData(id=1000, plant_id=plant.id, timestamp=recent, temperature=20),
+            GrowthData(id=1002, plant_id=plant.id, timestamp=recent, temperature=22),
+        ])
+        db.session.commit()
+        assert roll_up_growth_data(now=now) == 2
+
+        # Id 1001 belonged to a transaction that committed after the run
+        db.session.add(GrowthData(id=1001, plant_id=plant.id, timestamp=recent, temperature=30))
+        db.session.delete(db.session.get(GrowthData, 1000))
+        db.session.commit()
+        assert growth_stats(plant.id)['temperature']['max'] == 22
+
+        assert roll_up_growth_data(now=now) == 0
+        stats = growth_stats(plant.id)
+        assert stats['readings'] == 2
+        assert {k: stats['temperature'][k] for k in ('count', 'min', 'max')} == {'count': 2, 'min': 22, 'max': 30}
+        hour = GrowthDataRollup.query.filter_by(plant_id=plant.id, period='hour').one()
+        assert (hour.readings, hour.temperature_sum) == (2, 52)
+
+        # Once outside the window the hour is left alone
+        db.session.delete(db.session.get(GrowthData, 1001))
+        db.session.commit()
+        roll_up_growth_data(now=now + timedelta(hours=3))
+        assert growth_stats(plant.id)['readings'] == 2
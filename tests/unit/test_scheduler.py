@@ -0,0 +1,123 @@
+"""Tests for the single-leader scheduler runtime."""
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as app_package
+from app import create_app, scheduler as scheduler_module
+from app.extensions import db
+from app.leases import LeaderLease, current_lease
+from app.models import JobRun
+
+
+@pytest.fixture
+def runtime(app):
+    """A scheduler built for the app but never started"""
+    built = scheduler_module.build_scheduler(app)
+    yield built
+    scheduler_module.scheduler = None
+
+
+def test_only_one_process_holds_the_lease(app):
+    with app.app_context():
+        first = LeaderLease('scheduler', holder='web-1', ttl=60)
+        second = LeaderLease('scheduler', holder='web-2', ttl=60)
+        assert first.acquire() and first.is_leader
+        assert not second.acquire() and not second.is_leader
+        assert first.acquire()  # renewal
+        acquired_at = current_lease('scheduler').acquired_at
+
+        # The leader went silent; its lease runs out and the next renewal wins
+        later = datetime.utcnow() + timedelta(seconds=61)
+        assert second.acquire(now=later)
+        assert not first.acquire()
+        db.session.expire_all()
+        lease = current_lease('scheduler')
+        assert lease.holder == 'web-2' and lease.acquired_at > acquired_at
+
+        second.release()
+        assert current_lease('scheduler') is None
+        assert first.acquire()
+
+
+def test_jobs_only_run_on_the_leader_and_are_recorded(app, runtime):
+    calls = []
+
+    def job():
+        calls.append(1)
+        return 7
+
+    def broken():
+        raise ValueError('no plants')
+
+    assert scheduler_module.run_job('demo', job) is None
+    assert calls == []
+
+    assert scheduler_module.renew_lease()
+    assert scheduler_module.run_job('demo', job) == 7
+    assert scheduler_module.run_job('broken', broken) is None
+    assert {job.id for job in runtime.get_jobs()} >= {'renew_scheduler_lease', 'check_watering'}
+
+    with app.app_context():
+        runs = {run.job_id: run for run in JobRun.query}
+        assert runs['demo'].status == 'succeeded' and runs['demo'].rows_processed == 7
+        assert runs['broken'].status == 'failed' and runs['broken'].error == 'ValueError: no plants'
+        assert runs['demo'].holder == runtime.lease.holder and runs['demo'].finished_at
+
+    scheduler_module.release_lease()
+    assert not runtime.lease.is_leader
+
+
+def test_scheduler_status_is_admin_only(app, client, runtime):
+    scheduler_module.renew_lease()
+    scheduler_module.run_job('demo', lambda: 3)
+
+    client.post('/login', data={'username': 'test_user', 'password': 'test_password'})
+    assert client.get('/api/scheduler').status_code == 403
+    client.get('/logout')
+
+    client.post('/login', data={'username': 'admin', 'password': 'admin_password'})
+    data = client.get('/api/scheduler?job=demo').get_json()
+    assert data['leader']['holder'] == runtime.lease.holder
+    assert [(run['job_id'], run['rows_processed']) for run in data['runs']] == [('demo', 3)]
+
+
+def test_jobs_keep_their_cadence_across_leaders(app, runtime):
+    calls = []
+    interval = timedelta(minutes=60)
+    assert scheduler_module.renew_lease()
+
+    with app.app_context():
+        # The previous leader ran the job ten minutes ago
+        db.session.add(JobRun(job_id='hourly', holder='old-leader', status='succeeded',
+                              started_at=datetime.utcnow() - timedelta(minutes=10)))
+        db.session.commit()
+    assert scheduler_module.run_job('hourly', lambda: calls.append(1) or 1, interval) is None
+    assert calls == []
+
+    with app.app_context():
+        # Overdue after a leader change: the first tick runs it
+        JobRun.query.filter_by(job_id='hourly').update({'started_at': datetime.utcnow() - timedelta(minutes=75)})
+        db.session.commit()
+    assert scheduler_module.run_job('hourly', lambda: calls.append(1) or 1, interval) == 1
+    assert scheduler_module.run_job('hourly', lambda: calls.append(1) or 1, interval) is None
+    assert calls == [1]
+
+    ticks = {job.id: job.trigger.interval for job in runtime.get_jobs()}
+    assert ticks['check_watering'] == timedelta(seconds=30)
+    assert ticks['deliver_outbound_messages'] == timedelta(seconds=10)
+
+
+def test_embedded_scheduler_waits_for_the_first_request(app, monkeypatch):
+    started = []
+    monkeypatch.setattr(app_package, 'init_scheduler', started.append)
+    web = create_app({
+        'SQLALCHEMY_DATABASE_URI': app.config['SQLALCHEMY_DATABASE_URI'],
+        'SCHEDULER_EMBEDDED': True
+    })
+    # Building the app, as CLI commands and scripts do, starts nothing
+    assert started == []
+
+    web.test_client().get('/login')
+    web.test_client().get('/login')
+    assert started == [web, web]
@@ -0,0 +1,44 @@
+"""Tests for Signal command routing."""
+import os
+import re
+
+from app.extensions import db
+from app.models import User, Plant
+from app.signal_service import SignalCommandHandler
+
+CORPUS = os.path.join(os.path.dirname(__file__), '..', '..', 'benchmarks', 'signal_corpus.txt')
+
+
+def linear_dispatch(message_text):
+    for command, pattern in SignalCommandHandler.COMMANDS.items():
+        match = re.match(pattern, message_text)
+        if match:
+            return command, match.groups()
+    return None, None
+
+
+def test_keyword_dispatch_matches_linear_scan():
+    """Routing on the first word picks the same command and groups as trying every pattern."""
+    with open(CORPUS) as f:
+        messages = [line.strip().lower() for line in f if line.strip()]
+    messages += ['', '   ', 'statusreport', 'water', 'tipsy plant', 'rate blue dream 9']
+
+    for message in messages:
+        command, match = SignalCommandHandler.dispatch(message)
+        assert (command, match.groups() if match else None) == linear_dispatch(message), message
+
+
+def test_handle_message_routes_to_handlers(app):
+    with app.app_context():
+        user = User(username='signal_user', phone_number='+15550000001', signal_verified=True)
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Plant(name='basil', strain='Genovese', owner_id=user.id))
+        db.session.commit()
+
+        handler = SignalCommandHandler()
+        handler.set_user(user)
+        assert handler.handle_message('List') == 'Your Plants:\n🌱 basil (Genovese)'
+        assert 'Updated growth data for basil' in handler.handle_message('ph basil 6.5')
+        assert handler.handle_message('hello there') == SignalCommandHandler.UNKNOWN_COMMAND
+        assert handler.handle_message('follow someone') == SignalCommandHandler.UNKNOWN_COMMAND
@@ -0,0 +1,97 @@
+"""Tests for the due-time growth stage transition queue."""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app import stage_transitions
+from app.models import User, Plant, GrowthStage
+from app.stage_transitions import init_stage_transitions
+
+
+@contextmanager
+def captured_selects():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_due_transitions_advance_one_plant_at_a_time(app):
+    queue = init_stage_transitions(app, horizon=timedelta(days=30))
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        plants = [Plant(name=f'P{i}', strain='Haze', owner_id=user.id) for i in range(3)]
+        db.session.add_all(plants)
+        db.session.commit()
+        for plant, stage in zip(plants, ('germination', 'seedling', 'flowering')):
+            plant.advance_growth_stage(stage)
+        db.session.commit()
+        plant_ids = [plant.id for plant in plants]
+
+        # Committed schedules are pushed onto the heap; the last stage has no successor
+        assert plants[0].next_stage_at - plants[0].current_stage.start_date == timedelta(days=7)
+        assert plants[2].next_stage_at is None
+        assert len(queue) == 2
+        assert queue.next_due() == plants[0].next_stage_at
+
+        # A plant moved on by hand leaves a stale entry that is skipped
+        plants[1].advance_growth_stage('vegetative')
+        db.session.commit()
+        assert queue.run_due(datetime.utcnow() + timedelta(days=8)) == 1
+        assert queue.skipped == 0
+
+        db.session.expire_all()
+        first = db.session.get(Plant, plant_ids[0])
+        assert first.current_stage.stage_name == 'seedling'
+        assert first.current_stage.notes == 'Advanced automatically'
+        # The stale seedling entry stays queued until it comes up
+        assert len(queue) == 3
+
+        assert queue.run_due(datetime.utcnow() + timedelta(days=30)) == 2
+        assert queue.skipped == 1
+        db.session.expire_all()
+        assert db.session.get(Plant, plant_ids[0]).current_stage.stage_name == 'vegetative'
+        assert db.session.get(Plant, plant_ids[1]).current_stage.stage_name == 'flowering'
+
+        # Rebuilding after a restart is a single indexed range query
+        with captured_selects() as statements:
+            assert queue.sync(datetime.utcnow() + timedelta(days=30)) == 1
+        assert len(statements) == 1
+        plan = db.session.connection().exec_driver_sql(
+            'EXPLAIN QUERY PLAN ' + statements[0].replace('?', "'2100-01-01'"), ()
+        ).fetchall()
+        assert any('ix_plant_next_stage_at' in row[-1] for row in plan)
+
+
+def test_failed_transition_leaves_the_plant_unchanged(app, monkeypatch):
+    queue = init_stage_transitions(app, horizon=timedelta(days=30))
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        plant = Plant(name='Stuck', strain='Haze', owner_id=user.id)
+        db.session.add(plant)
+        db.session.commit()
+        plant.advance_growth_stage('germination')
+        db.session.commit()
+        plant_id, due_at = plant.id, plant.next_stage_at
+
+    def broken_alert(*args):
+        raise RuntimeError('alert table locked')
+
+    monkeypatch.setattr(stage_transitions, 'queue_alert', broken_alert)
+    assert queue.transition(plant_id, due_at) == 0
+    assert queue.failed == 1
+
+    with app.app_context():
+        plant = db.session.get(Plant, plant_id)
+        assert plant.current_stage.stage_name == 'germination'
+        assert plant.next_stage_at == due_at
+        assert GrowthStage.query.filter_by(plant_id=plant_id).count() == 1
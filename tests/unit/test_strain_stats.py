@@ -0,0 +1,80 @@
+"""Tests for the incrementally maintained strain statistics."""
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import User, Plant, Strain, StrainRating
+from app.signal_service import SignalCommandHandler
+from app.strain_stats import rebuild_strain_stats
+
+
+def counters(strain):
+    db.session.refresh(strain)
+    return (strain.total_grows, strain.successful_grows, strain.growth_days_total,
+            strain.total_ratings, strain.rating_sum)
+
+
+def archive(plant, reason, days):
+    plant.is_archived = True
+    plant.archive_reason = reason
+    plant.archive_date = plant.start_date + timedelta(days=days)
+
+
+def test_counters_follow_archive_unarchive_edit_and_delete(app):
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        haze = Strain(name='Haze')
+        kush = Strain(name='Kush')
+        start = datetime(2026, 1, 1)
+        plants = [Plant(name=f'P{i}', strain='Haze', owner_id=user.id, start_date=start) for i in range(3)]
+        db.session.add_all([haze, kush] + plants)
+        db.session.commit()
+        assert counters(haze)[:3] == (0, 0, 0)
+
+        archive(plants[0], 'harvested', 90)
+        archive(plants[1], 'harvested', 100)
+        archive(plants[2], 'died', 20)
+        db.session.commit()
+        assert counters(haze)[:3] == (3, 2, 190)
+        assert round(haze.success_rate, 1) == 66.7 and haze.average_growth_time == 95
+
+        plants[1].is_archived = False
+        plants[1].archive_reason = None
+        plants[1].archive_date = None
+        db.session.commit()
+        assert counters(haze)[:3] == (2, 1, 90)
+
+        plants[0].strain = 'Kush'
+        db.session.delete(plants[2])
+        db.session.commit()
+        assert counters(haze)[:3] == (0, 0, 0)
+        assert counters(kush)[:3] == (1, 1, 90)
+
+        expected = [counters(haze), counters(kush)]
+        haze.total_grows = kush.total_grows = 99
+        db.session.commit()
+        assert rebuild_strain_stats() == 2
+        db.session.commit()
+        assert [counters(haze), counters(kush)] == expected
+
+
+def test_rating_upsert_and_strain_lookup(app):
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').first()
+        strain = Strain(name='Haze', type='sativa', difficulty=3, flowering_time=70)
+        plant = Plant(name='Done', strain='Haze', owner_id=user.id, start_date=datetime(2026, 1, 1))
+        db.session.add_all([strain, plant])
+        db.session.commit()
+        archive(plant, 'harvested', 80)
+        db.session.commit()
+
+        handler = SignalCommandHandler()
+        handler.set_user(user)
+        assert handler.handle_rate('haze', '4') == '✅ Rated Haze 4/5'
+        assert handler.handle_rate('haze', '2', 'meh') == '✅ Rated Haze 2/5\nReview: meh'
+        assert StrainRating.query.count() == 1
+        assert counters(strain)[3:] == (1, 2)
+
+        info = handler.handle_strain('HAZE')
+        assert 'Rating: 2.0/5 (1 ratings)' in info
+        assert 'Success Rate: 100.0%' in info
+        assert 'Average Grow Time: 80 days' in info
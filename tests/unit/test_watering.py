@@ -0,0 +1,109 @@
+"""Unit tests for the set-based watering check."""
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app.extensions import db
+from app import scheduler as scheduler_module
+from app.models import User, Plant, Watering, NotificationAlert
+from app.watering import WateringCheckMetrics, iter_due_plants, WATERING_DEFAULT_INTERVAL
+
+def _plant(owner, name, watered_days_ago=None, **kwargs):
+    plant = Plant(name=name, strain='Test Strain', owner_id=owner.id, **kwargs)
+    db.session.add(plant)
+    db.session.flush()
+    if watered_days_ago is not None:
+        _water(plant, watered_days_ago)
+    return plant
+
+def _water(plant, days_ago):
+    watering = Watering(plant_id=plant.id, amount=1.0,
+                        timestamp=datetime.utcnow() - timedelta(days=days_ago))
+    db.session.add(watering)
+    plant.record_watering(watering)
+
+def test_interval_estimate_tracks_waterings(app):
+    """The estimate adapts to the plant's rhythm and survives edits and deletes."""
+    with app.app_context():
+        owner = User.query.filter_by(username='test_user').first()
+        plant = _plant(owner, 'Thirsty', watered_days_ago=4)
+        assert plant.watering_interval_mean is None
+        assert plant.next_watering_due == plant.last_watered_at + WATERING_DEFAULT_INTERVAL
+
+        for days_ago in (3, 2, 1):
+            _water(plant, days_ago)
+        assert abs(plant.watering_interval_mean - 24) < 1e-6
+        assert plant.watering_interval_var < 1e-6
+        assert abs((plant.next_watering_due - plant.last_watered_at).total_seconds() - 24 * 3600) < 1
+
+        # A watering within the minimum interval only moves the cache
+        mean = plant.watering_interval_mean
+        _water(plant, 1 - 1 / (24 * 60))
+        assert plant.watering_interval_mean == mean
+        db.session.commit()
+
+        # Dropping a watering refits from the remaining history
+        for watering in plant.waterings.order_by(Watering.timestamp).all()[1:2]:
+            db.session.delete(watering)
+        plant.refresh_last_watering()
+        db.session.commit()
+        assert plant.watering_interval_mean > 24
+        assert plant.watering_interval_var > 0
+        assert plant.next_watering_due > plant.last_watered_at + timedelta(hours=plant.watering_interval_mean)
+
+def test_iter_due_plants(app):
+    """Unannounced plants due by the end are selected by a single range query."""
+    with app.app_context():
+        owner = User.query.filter_by(username='test_user').first()
+        now = datetime.utcnow()
+        due = _plant(owner, 'Due', watered_days_ago=1.98)
+        _plant(owner, 'Later', watered_days_ago=1)
+        overdue = _plant(owner, 'Long overdue', watered_days_ago=5)
+        _plant(owner, 'Archived', watered_days_ago=1.98, is_archived=True)
+        _plant(owner, 'Announced', watered_days_ago=1.98).watering_alerted_at = now
+        db.session.commit()
+
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        metrics = WateringCheckMetrics()
+        try:
+            plants = list(iter_due_plants(now + timedelta(hours=1), metrics=metrics))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        metrics.finish()
+
+        assert [(plant.name, user.username) for plant, user, _ in plants] == [
+            ('Long overdue', 'test_user'), ('Due', 'test_user')
+        ]
+        assert [due for _, _, due in plants] == [overdue.next_watering_due, due.next_watering_due]
+        assert len(statements) == 1 and 'watering_alerted_at IS NULL' in statements[0]
+        assert metrics.plants_due == 2
+        assert metrics.to_dict()['wall_time'] is not None
+
+def test_watering_check_announces_each_prediction_once(app):
+    """Overdue plants are alerted once, and again only after their prediction moves."""
+    with app.app_context():
+        owner = User.query.filter_by(username='test_user').first()
+        owner.phone_number = '+15550009999'
+        plant = _plant(owner, 'Forgotten', watered_days_ago=5)
+        _plant(owner, 'Fine', watered_days_ago=0)
+        db.session.commit()
+        plant_id = plant.id
+
+    scheduler_module.build_scheduler(app)
+    try:
+        assert scheduler_module.check_watering_schedule() == 1
+        assert scheduler_module.check_watering_schedule() == 0
+        with app.app_context():
+            assert [a.plant_id for a in NotificationAlert.query.filter_by(kind='watering')] == [plant_id]
+
+            # Watered, then forgotten again: the new prediction is announced
+            plant = db.session.get(Plant, plant_id)
+            _water(plant, 3)
+            assert plant.watering_alerted_at is None
+            db.session.commit()
+        assert scheduler_module.check_watering_schedule() == 1
+        with app.app_context():
+            assert NotificationAlert.query.filter_by(kind='watering').count() == 2
+    finally:
+        scheduler_module.scheduler = None